@@ -22,6 +22,7 @@ class Settings(BaseSettings):
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_key: str = os.getenv("SUPABASE_ANON_KEY", "")
     supabase_service_key: str = os.getenv("SUPABASE_SERVICE_KEY", "")
+    supabase_executor_workers: int = 16  # threads running blocking Supabase requests
     
     # React App Supabase Settings (for frontend)
     react_app_supabase_url: Optional[str] = None
@@ -31,6 +32,25 @@ class Settings(BaseSettings):
     database_url: str = os.getenv("DATABASE_URL", "")
     database_pool_size: int = 10
     database_max_overflow: int = 20
+    database_pool_acquire_timeout: float = 10.0  # seconds to wait for a free connection
+    database_statement_cache_size: int = 500  # prepared statements kept per connection
+    database_replica_urls: str = os.getenv("DATABASE_REPLICA_URLS", "")  # comma-separated read replica DSNs
+    database_replica_pool_size: int = 10
+    database_replica_max_lag: float = 30.0  # seconds; replicas further behind stop receiving reads
+    database_replica_health_interval: float = 10.0  # seconds between replica lag checks
+    query_stats_max_fingerprints: int = 500  # distinct statements tracked before folding into <other>
+    query_stats_prometheus_top_n: int = 20  # fingerprints exported to /metrics
+    count_cache_ttl: int = 30  # seconds list totals/counts are reused per filter set
+    dataloader_max_batch_size: int = 1000  # keys per batched ANY($1) lookup
+    database_stream_batch_size: int = 1000  # rows fetched per server-side cursor round-trip
+    materialized_view_check_interval: float = 5.0  # seconds between materialized view staleness checks
+    query_deadline_fast: float = 5.0  # seconds of query time for cashier lookups and payment entry
+    query_deadline_report: float = 60.0  # seconds of query time for reports and dashboards
+    slow_query_explain_sample_rate: float = 0.1  # share of slow reads re-run under EXPLAIN ANALYZE (0 disables)
+    slow_query_explain_interval: float = 300.0  # seconds between plan captures of the same fingerprint
+    slow_query_explain_timeout: float = 30.0  # seconds an EXPLAIN ANALYZE re-run may take
+    slow_query_plan_fingerprints: int = 100  # distinct statements whose plans are kept
+    slow_query_plan_history: int = 5  # plans kept per fingerprint
     
     # CORS Settings
     cors_origins: str = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:3001,https://feemaster.onrender.com,https://feemaster-admin-frontend.onrender.com,https://master-fees.com")
@@ -87,6 +107,20 @@ class Settings(BaseSettings):
     # Redis Settings (for caching)
     redis_url: Optional[str] = None
     redis_password: Optional[str] = None
+    cache_local_max_entries: int = 10000  # entries kept in each worker's in-process cache tier
+    cache_local_max_bytes: int = 64 * 1024 * 1024  # approximate payload bytes kept in-process
+    cache_local_ttl: int = 60  # seconds an entry may be served in-process before rechecking Redis
+    cache_invalidation_channel: str = "feemaster:cache:invalidate"  # Redis pub/sub channel for cross-worker invalidation
+    cache_tag_prefix: str = "tag:"  # Redis sets listing the keys stored under each cache tag
+    cache_tag_ttl: int = 86400  # minimum seconds a tag set is kept after its last member was added
+    cache_invalidation_batch_size: int = 500  # keys per SCAN/SSCAN page and per pipelined UNLINK batch
+    cache_stale_ttl: int = 300  # seconds get_or_set may serve an expired value while it refreshes
+    cache_xfetch_beta: float = 1.0  # >1 refreshes hot keys earlier, <1 later
+    cache_lock_timeout: float = 30.0  # seconds a worker may hold a key's recompute lock
+    cache_lock_wait: float = 10.0  # seconds a worker waits for another's recompute before doing it itself
+    cache_codec: str = "auto"  # auto, msgpack, orjson or json; auto picks the fastest installed
+    cache_compression: str = "auto"  # auto, lz4, zlib or none; auto prefers lz4
+    cache_compression_threshold: int = 4096  # bytes; smaller encoded values are stored uncompressed
     
     # Logging Settings
     log_level: str = "INFO"
@@ -124,6 +158,7 @@ class Settings(BaseSettings):
     audit_retention_days: int = 365
     bulk_operation_max_records: int = 1000
     bulk_operation_timeout: int = 300  # 5 minutes
+    bulk_insert_chunk_size: int = 1000  # rows per COPY/executemany batch
     report_generation_enabled: bool = True
     report_storage_path: str = "reports"
     report_retention_days: int = 90
@@ -133,6 +168,11 @@ class Settings(BaseSettings):
         """Convert cors_origins string to list"""
         return [origin.strip() for origin in self.cors_origins.split(",")]
     
+    @property
+    def database_replica_url_list(self) -> List[str]:
+        """Convert database_replica_urls string to list"""
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
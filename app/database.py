@@ -1,13 +1,27 @@
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Union
-from datetime import datetime
+import re
+import base64
+from typing import Dict, List, Any, Optional, Union, Tuple, NamedTuple, AsyncIterator, Awaitable, Callable
+from datetime import datetime, date, timezone
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from collections import OrderedDict
 import json
 from .config import settings
 import asyncpg
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlsplit
 import time
-from prometheus_client import Counter, Histogram, Gauge
+import random
+from concurrent.futures import ThreadPoolExecutor
+from prometheus_client import Counter, Histogram, Gauge, REGISTRY
+from .utils.query_stats import QueryStatsRegistry, QueryStatsCollector
+from .utils.query_plans import PlanStore
+from .utils.dataloader import DataLoader
+from .utils.columnar import column_sql, records_to_columns, rows_to_columns
 
 logger = logging.getLogger(__name__)
 
@@ -15,15 +29,403 @@ logger = logging.getLogger(__name__)
 QUERY_DURATION = Histogram('query_duration_seconds', 'Time spent executing queries', ['operation'])
 QUERY_COUNT = Counter('query_count_total', 'Total number of queries executed', ['operation', 'status'])
 ACTIVE_CONNECTIONS = Gauge('active_db_connections', 'Number of active database connections')
+POOL_SIZE = Gauge('db_pool_size', 'Number of open connections in the pool')
+POOL_CHECKED_OUT = Gauge('db_pool_checked_out_connections', 'Number of connections currently checked out of the pool')
+POOL_WAIT_TIME = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting to acquire a pool connection',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+POOL_ACQUIRE_TIMEOUTS = Counter('db_pool_acquire_timeouts_total', 'Number of pool acquisitions that timed out')
+SUPABASE_IN_FLIGHT = Gauge('supabase_requests_in_flight', 'Supabase requests submitted to the executor and not yet finished')
+SUPABASE_QUEUE_WAIT = Histogram(
+    'supabase_executor_queue_seconds',
+    'Time Supabase requests wait for a free executor thread',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+SUPABASE_REQUEST_DURATION = Histogram('supabase_request_duration_seconds', 'Time spent executing Supabase requests', ['operation'])
+REPLICA_LAG = Gauge('db_replica_lag_seconds', 'Replication lag observed on each read replica', ['replica'])
+REPLICA_HEALTHY = Gauge('db_replica_healthy', 'Whether a read replica is currently receiving reads (1) or ejected (0)', ['replica'])
+QUERY_DEADLINE_EXCEEDED = Counter('db_query_deadline_exceeded_total', 'Queries stopped because the request deadline ran out', ['route'])
+FANOUT_FAILURES = Counter('db_fanout_failures_total', 'Queries run through db.fan_out() that failed', ['reason'])
+PLAN_CAPTURES = Counter('db_plan_captures_total', 'EXPLAIN ANALYZE re-runs of slow queries', ['status'])
 SLOW_QUERY_THRESHOLD = 1.0  # seconds
+COUNT_CACHE_SIZE = 1024  # distinct (table, filters) counts kept by execute_query
+
+# Per-fingerprint statistics shared by the process; the top entries are exported to Prometheus
+query_stats = QueryStatsRegistry(
+    max_fingerprints=settings.query_stats_max_fingerprints,
+    slow_threshold=SLOW_QUERY_THRESHOLD
+)
+REGISTRY.register(QueryStatsCollector(query_stats, top_n=settings.query_stats_prometheus_top_n))
+
+QUERY_OPERATIONS = ("select", "insert", "update", "delete", "upsert", "count")
+
+# Filter suffixes accepted by execute_query, e.g. {"amount__gte": 100}
+FILTER_OPERATORS = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "like": "LIKE",
+    "ilike": "ILIKE",
+}
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+_ORDER_TERM = r"[A-Za-z_][\w\.]*(\s+(asc|desc))?(\s+nulls\s+(first|last))?"
+_ORDER_BY_RE = re.compile(rf"^\s*{_ORDER_TERM}(\s*,\s*{_ORDER_TERM})*\s*$", re.IGNORECASE)
+_EMBED_RE = re.compile(r"([A-Za-z_]\w*)(![A-Za-z_]\w*)?\s*\(")
+_SQL_FUNCTIONS = {
+    "count", "sum", "avg", "min", "max", "coalesce", "distinct", "lower", "upper",
+    "date", "date_trunc", "concat", "json_agg", "array_agg", "extract", "round", "nullif"
+}
+
+
+class _QueryShape(NamedTuple):
+    """Everything that determines the SQL text of a generated query"""
+    table: str
+    operation: str
+    select_fields: str
+    columns: Tuple[str, ...]
+    row_masks: Tuple[Tuple[bool, ...], ...]
+    conditions: Tuple[Tuple[str, str], ...]
+    order_by: Optional[str]
+    has_limit: bool
+    has_offset: bool
+    join_tables: Tuple[str, ...]
+    on_conflict: Optional[str]
+    keyset: Tuple[str, ...] = ()
+    keyset_desc: bool = False
+    with_total: bool = False
+
+
+def _identifier(name: str) -> str:
+    """Validate a table or column name before it is placed in SQL"""
+    name = name.strip()
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return name
+
+
+def _is_embedded_select(select_fields: str) -> bool:
+    """Whether a select string uses PostgREST resource embedding"""
+    return any(
+        match.group(2) or match.group(1).lower() not in _SQL_FUNCTIONS
+        for match in _EMBED_RE.finditer(select_fields)
+    )
+
+
+def _adapt_value(value: Any) -> Any:
+    """Convert Python values that asyncpg cannot encode directly"""
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _keyset_order(order_by: Optional[str]) -> Tuple[Tuple[str, ...], bool]:
+    """Parse an order_by into keyset columns and direction.
+
+    Keyset pagination compares rows as a tuple, so every term must sort in
+    the same direction. ``id`` is appended as a tie-breaker when missing so
+    the ordering is total and pages never overlap or skip rows.
+    """
+    order_by = order_by or "created_at desc"
+    if not _ORDER_BY_RE.match(order_by):
+        raise ValueError(f"Invalid order_by: {order_by!r}")
+    columns = []
+    directions = set()
+    for term in order_by.split(","):
+        parts = term.split()
+        if len(parts) > 2:
+            raise ValueError("NULLS FIRST/LAST is not supported with cursor pagination")
+        columns.append(parts[0])
+        directions.add(parts[1].lower() if len(parts) == 2 else "asc")
+    if len(directions) > 1:
+        raise ValueError("Cursor pagination requires all order_by columns to sort in the same direction")
+    if "id" not in [column.split(".")[-1] for column in columns]:
+        columns.append("id")
+    return tuple(columns), directions == {"desc"}
+
+
+def _cursor_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the keyset values of the last row into an opaque cursor"""
+    payload = json.dumps(values, default=_cursor_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _split_filters(filters: Optional[Dict[str, Any]]) -> Tuple[Tuple[Tuple[str, str], ...], List[Any]]:
+    """Split a filter dict into (field, operator) conditions and bound values"""
+    conditions = []
+    params = []
+    for key, value in (filters or {}).items():
+        field, _, operator = key.partition("__")
+        operator = operator or "eq"
+        value = _adapt_value(value)
+        
+        if operator in ("eq", "is") and value is None:
+            conditions.append((field, "isnull"))
+        elif operator == "neq" and value is None:
+            conditions.append((field, "notnull"))
+        elif operator == "is":
+            conditions.append((field, "istrue" if value else "isfalse"))
+        elif operator == "in":
+            conditions.append((field, "in"))
+            params.append([_adapt_value(item) for item in value])
+        elif operator in ("like", "ilike"):
+            conditions.append((field, operator))
+            params.append(f"%{value}%")
+        elif operator in FILTER_OPERATORS:
+            conditions.append((field, operator))
+            params.append(value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+    return tuple(conditions), params
+
+
+@lru_cache(maxsize=1024)
+def _compile_query(shape: _QueryShape) -> str:
+    """Render the SQL text for a query shape; cached so hot shapes are built once"""
+    table = _identifier(shape.table)
+    position = 0
+    
+    def placeholder() -> str:
+        nonlocal position
+        position += 1
+        return f"${position}"
+    
+    def where_clause() -> str:
+        clauses = []
+        for field, operator in shape.conditions:
+            column = _identifier(field)
+            if shape.join_tables and "." not in column:
+                column = f"{table}.{column}"
+            if operator == "isnull":
+                clauses.append(f"{column} IS NULL")
+            elif operator == "notnull":
+                clauses.append(f"{column} IS NOT NULL")
+            elif operator == "istrue":
+                clauses.append(f"{column} IS TRUE")
+            elif operator == "isfalse":
+                clauses.append(f"{column} IS FALSE")
+            elif operator == "in":
+                clauses.append(f"{column} = ANY({placeholder()})")
+            else:
+                clauses.append(f"{column} {FILTER_OPERATORS[operator]} {placeholder()}")
+        if shape.keyset:
+            # Row comparison lets Postgres seek straight to the cursor position on a matching index
+            columns = [
+                f"{table}.{column}" if shape.join_tables and "." not in column else column
+                for column in map(_identifier, shape.keyset)
+            ]
+            comparison = "<" if shape.keyset_desc else ">"
+            clauses.append(
+                f"({', '.join(columns)}) {comparison} ({', '.join(placeholder() for _ in columns)})"
+            )
+        return " WHERE " + " AND ".join(clauses) if clauses else ""
+    
+    def join_clause() -> str:
+        joins = ""
+        for join_table in shape.join_tables:
+            join_table = _identifier(join_table)
+            joins += f" LEFT JOIN {join_table} ON {table}.id = {join_table}.{table}_id"
+        return joins
+    
+    if shape.operation in ("insert", "upsert"):
+        columns = [_identifier(column) for column in shape.columns]
+        values = ", ".join(
+            "(" + ", ".join(placeholder() if present else "DEFAULT" for present in mask) + ")"
+            for mask in shape.row_masks
+        )
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values}"
+        if shape.operation == "upsert":
+            target = [_identifier(column) for column in (shape.on_conflict or "id").split(",")]
+            updates = [f"{column} = EXCLUDED.{column}" for column in columns if column not in target]
+            action = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+            query += f" ON CONFLICT ({', '.join(target)}) {action}"
+        return query + " RETURNING *"
+    
+    if shape.operation == "update":
+        assignments = ", ".join(f"{_identifier(column)} = {placeholder()}" for column in shape.columns)
+        return f"UPDATE {table} SET {assignments}{where_clause()} RETURNING *"
+    
+    if shape.operation == "delete":
+        return f"DELETE FROM {table}{where_clause()} RETURNING *"
+    
+    if shape.operation == "count":
+        return f"SELECT COUNT(*) AS count FROM {table}{join_clause()}{where_clause()}"
+    
+    select_fields = shape.select_fields
+    if shape.with_total:
+        # The window runs before LIMIT/OFFSET, so every row carries the full match count
+        select_fields += ", COUNT(*) OVER() AS total_count"
+    query = f"SELECT {select_fields} FROM {table}{join_clause()}{where_clause()}"
+    if shape.order_by:
+        if not _ORDER_BY_RE.match(shape.order_by):
+            raise ValueError(f"Invalid order_by: {shape.order_by!r}")
+        query += f" ORDER BY {shape.order_by}"
+    if shape.has_limit:
+        query += f" LIMIT {placeholder()}"
+    if shape.has_offset:
+        query += f" OFFSET {placeholder()}"
+    return query
+
+
+def _bulk_insert_sql(table: str, columns: Tuple[str, ...], on_conflict: Optional[str], conflict_action: str) -> str:
+    """Single-row INSERT used by bulk_insert for executemany and row-by-row retries"""
+    column_list = [_identifier(column) for column in columns]
+    placeholders = ", ".join(f"${position}" for position in range(1, len(column_list) + 1))
+    query = f"INSERT INTO {_identifier(table)} ({', '.join(column_list)}) VALUES ({placeholders})"
+    if on_conflict:
+        target = [_identifier(column) for column in on_conflict.split(",")]
+        updates = [f"{column} = EXCLUDED.{column}" for column in column_list if column not in target]
+        if conflict_action == "update" and updates:
+            query += f" ON CONFLICT ({', '.join(target)}) DO UPDATE SET {', '.join(updates)}"
+        else:
+            query += f" ON CONFLICT ({', '.join(target)}) DO NOTHING"
+    return query
+
+
+def _is_multi_statement(query: str) -> bool:
+    """Whether a SQL string contains more than one statement"""
+    return ";" in query.strip().rstrip(";")
+
+
+_READ_QUERY_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_WRITE_KEYWORD_RE = re.compile(
+    r"\b(insert|update|delete|merge|create|drop|alter|truncate|refresh|grant|revoke|lock|nextval|setval)\b"
+    r"|\bfor\s+(update|share|no\s+key\s+update|key\s+share)\b",
+    re.IGNORECASE
+)
+
+
+_WRITE_TABLE_RE = re.compile(r"^\s*(?:insert\s+into|update|delete\s+from)\s+([A-Za-z_][\w\.]*)", re.IGNORECASE)
+
+
+def _written_table(query: str) -> Optional[str]:
+    """Table targeted by a plain INSERT/UPDATE/DELETE statement, if any"""
+    match = _WRITE_TABLE_RE.match(query)
+    return match.group(1).split(".")[-1] if match else None
+
+
+def _is_read_only(query: str) -> bool:
+    """Conservatively decide whether raw SQL can run on a read replica"""
+    return (
+        bool(_READ_QUERY_RE.match(query))
+        and not _WRITE_KEYWORD_RE.search(query)
+        and not _is_multi_statement(query)
+    )
+
+
+# Set once a request has written, so its later reads see its own writes
+_primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+# Connection of the db.transaction() the current task is running in, if any
+_transaction_connection: ContextVar[Optional[Any]] = ContextVar("transaction_connection", default=None)
+
+# DataLoaders memoized for the current request (or loader_scope)
+_request_loaders: ContextVar[Optional[Dict[Tuple[Any, ...], DataLoader]]] = ContextVar("request_loaders", default=None)
+
+# (monotonic expiry, route label) of the current request's query budget, if any
+_query_deadline: ContextVar[Optional[Tuple[float, str]]] = ContextVar("query_deadline", default=None)
+
+
+class QueryDeadlineExceeded(Exception):
+    """A query ran past the deadline of the current request"""
+
+
+class _Replica:
+    """A read replica pool and its last observed health"""
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+        self.healthy = True
+        self.lag = 0.0
+
+
+def _coerce_param(type_name: str, value: Any) -> Any:
+    """Coerce a bound value to the Python type asyncpg expects for a Postgres type.
+
+    Values that cannot be converted are returned unchanged so asyncpg can
+    report the original error.
+    """
+    if value is None:
+        return None
+    try:
+        if type_name == "date":
+            if isinstance(value, datetime):
+                return value.date()
+            if isinstance(value, str):
+                return date.fromisoformat(value[:10])
+        elif type_name in ("timestamp", "timestamptz"):
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            elif isinstance(value, date) and not isinstance(value, datetime):
+                value = datetime.combine(value, datetime.min.time())
+            if type_name == "timestamp" and value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            return value
+        elif type_name == "numeric":
+            if not isinstance(value, Decimal):
+                return Decimal(str(value))
+        elif type_name in ("int2", "int4", "int8"):
+            if not isinstance(value, int):
+                return int(value)
+        elif type_name in ("float4", "float8"):
+            if not isinstance(value, float):
+                return float(value)
+        elif type_name == "bool":
+            if isinstance(value, str):
+                return value.strip().lower() in ("true", "t", "1", "yes")
+        elif type_name in ("json", "jsonb"):
+            if not isinstance(value, str):
+                return json.dumps(value, default=str)
+        elif type_name in ("text", "varchar", "bpchar", "uuid"):
+            if not isinstance(value, str):
+                return str(value)
+    except (ValueError, TypeError, ArithmeticError):
+        return value
+    return value
+
 
 class Database:
     def __init__(self):
         self.supabase_client = None
         self.pool = None
-        self._connection_lock = asyncio.Lock()
-        self._query_log = []
-        self._max_query_log_size = 1000
+        self._monitor_task = None
+        self._replica_task = None
+        self.replicas: List[_Replica] = []
+        self._replica_index = 0
+        self._supabase_executor = None
+        self._column_types: Dict[str, Dict[str, str]] = {}
+        self._count_cache: "OrderedDict[Tuple[Any, ...], Tuple[float, int]]" = OrderedDict()
+        self._write_listeners: List[Callable[[str, int], None]] = []
+        self._plan_tasks: set = set()
+        self.query_stats = query_stats
+        self.query_plans = PlanStore(
+            max_fingerprints=settings.slow_query_plan_fingerprints,
+            history=settings.slow_query_plan_history,
+            min_interval=settings.slow_query_explain_interval
+        )
         
     async def connect(self):
         """Initialize database connections"""
@@ -36,6 +438,10 @@ class Database:
                         settings.supabase_url,
                         settings.supabase_service_key
                     )
+                    self._supabase_executor = ThreadPoolExecutor(
+                        max_workers=settings.supabase_executor_workers,
+                        thread_name_prefix="supabase"
+                    )
                     logger.info("Supabase connection initialized")
                 except Exception as e:
                     logger.warning(f"Failed to initialize Supabase connection: {e}")
@@ -43,19 +449,24 @@ class Database:
             
             # Initialize connection pool if database_url is provided
             if settings.database_url:
+                # database_pool_size connections are kept warm; up to
+                # database_max_overflow more are opened under load and
+                # closed again once they sit idle.
                 self.pool = await asyncpg.create_pool(
                     settings.database_url,
-                    min_size=5,
-                    max_size=settings.database_pool_size,
+                    min_size=settings.database_pool_size,
+                    max_size=settings.database_pool_size + settings.database_max_overflow,
                     max_queries=50000,
                     max_inactive_connection_lifetime=300.0,
                     command_timeout=60.0,
-                    statement_cache_size=100
+                    statement_cache_size=settings.database_statement_cache_size
                 )
                 
                 # Set up connection monitoring
-                asyncio.create_task(self._monitor_connections())
+                self._monitor_task = asyncio.create_task(self._monitor_connections())
                 logger.info("PostgreSQL connection pool initialized")
+                
+                await self._connect_replicas()
             else:
                 logger.warning("No DATABASE_URL provided - using Supabase only")
             
@@ -65,6 +476,88 @@ class Database:
             logger.error(f"Database connection failed: {e}")
             raise
 
+    async def _connect_replicas(self):
+        """Open a pool per configured read replica and start health checks"""
+        for dsn in settings.database_replica_url_list:
+            parts = urlsplit(dsn)
+            name = f"{parts.hostname}:{parts.port or 5432}{parts.path}"
+            try:
+                pool = await asyncpg.create_pool(
+                    dsn,
+                    min_size=1,
+                    max_size=settings.database_replica_pool_size,
+                    max_inactive_connection_lifetime=300.0,
+                    command_timeout=60.0,
+                    statement_cache_size=settings.database_statement_cache_size
+                )
+            except Exception as e:
+                logger.warning(f"Failed to connect to read replica {name}: {e}")
+                continue
+            self.replicas.append(_Replica(name, pool))
+            REPLICA_HEALTHY.labels(replica=name).set(1)
+            logger.info(f"Read replica pool initialized: {name}")
+        
+        if self.replicas:
+            self._replica_task = asyncio.create_task(self._monitor_replicas())
+
+    async def _monitor_replicas(self):
+        """Measure replica lag and eject replicas that fail or fall too far behind"""
+        lag_query = """
+            SELECT CASE
+                WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+            END AS lag
+        """
+        while True:
+            try:
+                for replica in self.replicas:
+                    try:
+                        async with replica.pool.acquire(timeout=settings.database_pool_acquire_timeout) as conn:
+                            replica.lag = float(await conn.fetchval(lag_query, timeout=5))
+                        healthy = replica.lag <= settings.database_replica_max_lag
+                    except Exception as e:
+                        logger.warning(f"Read replica {replica.name} health check failed: {e}")
+                        healthy = False
+                    if healthy != replica.healthy:
+                        logger.warning(f"Read replica {replica.name} {'restored' if healthy else 'ejected'} (lag {replica.lag:.1f}s)")
+                    replica.healthy = healthy
+                    REPLICA_LAG.labels(replica=replica.name).set(replica.lag)
+                    REPLICA_HEALTHY.labels(replica=replica.name).set(1 if healthy else 0)
+                await asyncio.sleep(settings.database_replica_health_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Replica monitoring failed: {e}")
+                await asyncio.sleep(settings.database_replica_health_interval)
+
+    def _pick_replica(self, max_lag: Optional[float] = None) -> Optional[_Replica]:
+        """Round-robin over healthy replicas within the lag budget; None means use the primary"""
+        if not self.replicas or _primary_pinned.get():
+            return None
+        max_lag = settings.database_replica_max_lag if max_lag is None else max_lag
+        candidates = [replica for replica in self.replicas if replica.healthy and replica.lag <= max_lag]
+        if not candidates:
+            return None
+        self._replica_index = (self._replica_index + 1) % len(candidates)
+        return candidates[self._replica_index]
+
+    @contextmanager
+    def use_primary(self):
+        """Route every query in this block (and task) to the primary"""
+        token = _primary_pinned.set(True)
+        try:
+            yield
+        finally:
+            _primary_pinned.reset(token)
+
+    def replica_status(self) -> List[Dict[str, Any]]:
+        """Health and lag of each read replica"""
+        return [
+            {"name": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag}
+            for replica in self.replicas
+        ]
+
     async def initialize(self):
         """Initialize database connections (alias for connect)"""
         await self.connect()
@@ -75,10 +568,10 @@ class Database:
             if self.pool:
                 async with self.get_connection() as conn:
                     await conn.fetchval("SELECT 1")
-                return {"status": "connected", "type": "postgresql"}
+                return {"status": "connected", "type": "postgresql", "replicas": self.replica_status()}
             elif self.supabase_client:
                 # Simple test query for Supabase
-                result = self.supabase_client.table("schools").select("id").limit(1).execute()
+                await self._run_supabase(self.supabase_client.table("schools").select("id").limit(1), "health")
                 return {"status": "connected", "type": "supabase"}
             else:
                 return {"status": "disconnected", "type": "none"}
@@ -89,13 +582,27 @@ class Database:
     async def close(self):
         """Close database connections"""
         try:
+            if self._monitor_task:
+                self._monitor_task.cancel()
+                self._monitor_task = None
             if self.pool:
                 await self.pool.close()
                 logger.info("PostgreSQL connection pool closed")
+            if self._replica_task:
+                self._replica_task.cancel()
+                self._replica_task = None
+            for task in list(self._plan_tasks):
+                task.cancel()
+            for replica in self.replicas:
+                await replica.pool.close()
+            self.replicas = []
             if self.supabase_client:
                 # Supabase client doesn't need explicit closing
                 self.supabase_client = None
                 logger.info("Supabase connection closed")
+            if self._supabase_executor:
+                self._supabase_executor.shutdown(wait=False)
+                self._supabase_executor = None
         except Exception as e:
             logger.error(f"Error closing database connections: {e}")
 
@@ -104,60 +611,341 @@ class Database:
         while True:
             try:
                 if self.pool:
-                    ACTIVE_CONNECTIONS.set(len(self.pool._holders))
-                await asyncio.sleep(60)  # Check every minute
+                    size = self.pool.get_size()
+                    POOL_SIZE.set(size)
+                    ACTIVE_CONNECTIONS.set(size - self.pool.get_idle_size())
+                await asyncio.sleep(15)
+            except asyncio.CancelledError:
+                break
             except Exception as e:
                 logger.error(f"Connection monitoring failed: {e}")
+                await asyncio.sleep(15)
 
-    def _log_query(self, operation: str, query: str, duration: float, status: str):
-        """Log query execution details"""
-        log_entry = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'operation': operation,
-            'query': query,
-            'duration': duration,
-            'status': status
-        }
-        
-        self._query_log.append(log_entry)
-        if len(self._query_log) > self._max_query_log_size:
-            self._query_log.pop(0)
+    def _log_query(
+        self,
+        operation: str,
+        query: str,
+        duration: float,
+        status: str,
+        rows: Optional[int] = None,
+        params: Optional[List[Any]] = None
+    ):
+        """Log query execution details.
+
+        Pool reads slower than SLOW_QUERY_THRESHOLD are sampled for plan
+        capture when their bound ``params`` are supplied.
+        """
+        self.query_stats.record(operation, query, duration, status, rows)
             
         if duration > SLOW_QUERY_THRESHOLD:
             logger.warning(f"Slow query detected: {duration:.2f}s - {query}")
+            if params is not None and status == "success":
+                self._maybe_capture_plan(query, params, duration)
+
+    def _record_query(
+        self,
+        operation: str,
+        query: str,
+        start_time: float,
+        status: str,
+        rows: Optional[int] = None,
+        params: Optional[List[Any]] = None
+    ):
+        """Record timing and outcome of a query in the query stats and Prometheus"""
+        duration = time.time() - start_time
+        self._log_query(operation, query, duration, status, rows, params)
+        QUERY_DURATION.labels(operation=operation).observe(duration)
+        QUERY_COUNT.labels(operation=operation, status=status).inc()
+
+    def _maybe_capture_plan(self, query: str, params: List[Any], duration: float):
+        """Sample a slow read for a background EXPLAIN (ANALYZE, BUFFERS) re-run"""
+        if (
+            not self.pool
+            or random.random() >= settings.slow_query_explain_sample_rate
+            or not _is_read_only(query)
+            or not self.query_plans.should_capture(query)
+        ):
+            return
+        task = asyncio.create_task(self._capture_plan(query, list(params), duration))
+        self._plan_tasks.add(task)
+        task.add_done_callback(self._plan_tasks.discard)
+
+    async def _capture_plan(self, query: str, params: List[Any], duration: float):
+        """Re-run a slow read under EXPLAIN (ANALYZE, BUFFERS) and store its plan.
+
+        ANALYZE executes the statement, so it runs on a read replica when one
+        is healthy and always inside a read-only transaction that is rolled
+        back. The task starts from a copy of the request's context, so the
+        request's deadline and transaction connection are cleared first.
+        """
+        _query_deadline.set(None)
+        _transaction_connection.set(None)
+        _primary_pinned.set(False)
+        try:
+            async with self.get_connection(readonly=True) as conn:
+                transaction = conn.transaction(readonly=True)
+                await transaction.start()
+                try:
+                    timeout = settings.slow_query_explain_timeout
+                    await conn.execute(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+                    result = await self._fetch(conn, f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", params)
+                finally:
+                    await transaction.rollback()
+            plan = result[0][0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            capture = self.query_plans.add(query, duration, plan[0])
+            PLAN_CAPTURES.labels(status="changed" if capture.diff else "captured").inc()
+            if capture.diff:
+                logger.warning(f"Query plan changed for slow query: {query[:200]}")
+        except Exception as e:
+            PLAN_CAPTURES.labels(status="error").inc()
+            logger.warning(f"Failed to capture plan for slow query: {e}")
+        finally:
+            self.query_plans.finish(query)
+
+    async def _run_supabase(self, request, operation: str = "query"):
+        """Execute a Supabase request without blocking the event loop.
+
+        supabase-py only offers a synchronous ``execute()``, so requests are
+        handed to a bounded thread pool (``settings.supabase_executor_workers``)
+        and concurrent handlers overlap their PostgREST round-trips.
+        """
+        if self._supabase_executor is None:
+            self._supabase_executor = ThreadPoolExecutor(
+                max_workers=settings.supabase_executor_workers,
+                thread_name_prefix="supabase"
+            )
+        
+        submitted = time.perf_counter()
+        
+        def run():
+            started = time.perf_counter()
+            SUPABASE_QUEUE_WAIT.observe(started - submitted)
+            try:
+                return request.execute()
+            finally:
+                SUPABASE_REQUEST_DURATION.labels(operation=operation).observe(time.perf_counter() - started)
+        
+        SUPABASE_IN_FLIGHT.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._supabase_executor, run)
+        finally:
+            SUPABASE_IN_FLIGHT.dec()
+
+    @contextmanager
+    def deadline(self, seconds: float, route: str = "unknown"):
+        """Bound every query made inside the block to ``seconds`` in total.
+
+        The remaining budget is applied as asyncpg's ``timeout`` on each call,
+        which sends a cancel request to the server when it runs out, so a
+        runaway query is stopped there too; db.transaction() blocks also
+        get it as ``SET LOCAL statement_timeout``. Nested deadlines can
+        only tighten the budget. Queries that run out raise
+        QueryDeadlineExceeded (execute_query reports it as a failed result)
+        and are counted per route.
+        """
+        token = self.set_deadline(seconds, route)
+        try:
+            yield
+        finally:
+            _query_deadline.reset(token)
+    
+    def set_deadline(self, seconds: float, route: str = "unknown"):
+        """Set the query budget for the rest of the current task (see deadline())"""
+        expires_at = time.monotonic() + seconds
+        current = _query_deadline.get()
+        if current is not None and current[0] <= expires_at:
+            expires_at, route = current
+        return _query_deadline.set((expires_at, route))
+    
+    def _deadline_timeout(self) -> Optional[float]:
+        """Seconds left in the current deadline, or None when unbounded"""
+        current = _query_deadline.get()
+        if current is None:
+            return None
+        remaining = current[0] - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        return remaining
+    
+    @contextmanager
+    def _enforce_deadline(self):
+        """Turn client and server timeouts under a deadline into QueryDeadlineExceeded"""
+        try:
+            yield
+        except (asyncio.TimeoutError, asyncpg.exceptions.QueryCanceledError) as e:
+            current = _query_deadline.get()
+            if current is None:
+                raise
+            QUERY_DEADLINE_EXCEEDED.labels(route=current[1]).inc()
+            raise QueryDeadlineExceeded(f"Query deadline exceeded for {current[1]}") from e
+    
+    async def _fetch(self, conn, query: str, params: Optional[List[Any]] = None) -> List[Any]:
+        """Run a query through the connection's prepared-statement cache.
+
+        Callers frequently pass ISO strings for date/numeric columns. asyncpg
+        is strict about argument types, so if binding fails the statement is
+        prepared explicitly and the arguments are coerced to the parameter
+        types Postgres reports before retrying once. Only client-side
+        encoding errors are retried: the statement never reached the server,
+        so the connection and any pinned transaction are still usable.
+        """
+        params = list(params or [])
+        with self._enforce_deadline():
+            try:
+                return await conn.fetch(query, *params, timeout=self._deadline_timeout())
+            except (ValueError, TypeError) as e:
+                # asyncpg's client-side DataError is a ValueError; server-side SQLSTATE 22
+                # errors are PostgresErrors and surface unchanged
+                if not params or isinstance(e, asyncpg.exceptions.PostgresError):
+                    raise
+                statement = await conn.prepare(query)
+                coerced = [
+                    _coerce_param(param_type.name, value)
+                    for param_type, value in zip(statement.get_parameters(), params)
+                ]
+                return await statement.fetch(*coerced, timeout=self._deadline_timeout())
 
     async def execute_query(
         self,
         table: str,
         operation: str,
-        data: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None,
         filters: Optional[Dict[str, Any]] = None,
-        select_fields: str = "*",
+        select_fields: Union[str, List[str]] = "*",
         limit: Optional[int] = None,
         offset: Optional[int] = None,
         order_by: Optional[str] = None,
-        join_tables: Optional[List[str]] = None
+        join_tables: Optional[List[str]] = None,
+        on_conflict: Optional[str] = None,
+        cursor: Optional[str] = None,
+        keyset: bool = False,
+        with_total: bool = False,
+        approximate: bool = False,
+        cache_ttl: Optional[int] = None,
+        max_lag: Optional[float] = None
     ) -> Dict[str, Any]:
-        """Execute database operations with monitoring"""
+        """Execute database operations with monitoring.
+
+        Supported operations are select, insert, update, delete, upsert and
+        count. Writes return the affected rows (``RETURNING *``); count
+        returns the number of matching rows under ``"count"``.
+
+        Counting: ``approximate=True`` makes count return the planner's row
+        estimate instead of scanning, which is fine for badges on large
+        tables like audit_logs. ``with_total=True`` on a select folds
+        ``COUNT(*) OVER()`` into the page query and returns ``"total"``.
+        With ``cache_ttl`` (seconds) counts are cached per table and filter
+        set; any write through execute_query drops a table's cached counts.
+
+        Selects and counts are served by read replicas when configured;
+        ``max_lag`` lets stale-tolerant callers accept more replication lag.
+        Writes go to the primary and pin the rest of the request to it.
+
+        Selects can page with ``limit``/``offset`` or, with ``keyset=True``
+        (implied by passing ``cursor``), by cursor: rows after the position
+        encoded in ``cursor`` are returned in ``order_by`` order (default
+        ``created_at desc``, with ``id`` as tie-breaker) and the response
+        carries ``next_cursor`` while more pages may follow. Keyset mode
+        still honours ``offset`` so offset pages also hand out a cursor.
+        """
         start_time = time.time()
+        if isinstance(select_fields, (list, tuple)):
+            select_fields = ", ".join(select_fields)
         try:
+            if operation not in QUERY_OPERATIONS:
+                raise ValueError(f"Unsupported operation: {operation}")
+            
+            keyset_columns: Tuple[str, ...] = ()
+            keyset_desc = False
+            cursor_values: Optional[List[Any]] = None
+            if keyset or cursor:
+                if operation != "select" or not limit:
+                    raise ValueError("Cursor pagination needs a select with a limit")
+                keyset_columns, keyset_desc = _keyset_order(order_by)
+                order_by = ", ".join(
+                    f"{column} {'desc' if keyset_desc else 'asc'}" for column in keyset_columns
+                )
+                if cursor:
+                    cursor_values = decode_cursor(cursor, len(keyset_columns))
+            
+            count_key = None
+            cached_count = None
+            if cache_ttl and (operation == "count" or with_total):
+                count_key = self._count_cache_key(table, filters, join_tables, approximate and operation == "count")
+                cached_count = self._cached_count(count_key)
+                if cached_count is not None and operation == "count":
+                    return {"success": True, "count": cached_count, "data": []}
+            
             # Ensure we have a connection
             if not self.pool and not self.supabase_client:
                 await self.connect()
             
+            # PostgREST resource embedding (e.g. "*, students(first_name)")
+            # has no SQL equivalent, so those selects stay on Supabase.
+            use_pool = self.pool and not (
+                self.supabase_client and _is_embedded_select(select_fields)
+            )
+            
             # Use direct PostgreSQL connection if available
-            if self.pool:
-                async with self.get_connection() as conn:
-                    query = self._build_query(
-                        table, operation, data, filters,
-                        select_fields, limit, offset, order_by, join_tables
+            if use_pool:
+                if operation == "count" and approximate:
+                    query, params = self._build_query(
+                        table, "select", filters=filters, select_fields="1", join_tables=join_tables
                     )
-                    result = await conn.fetch(query)
-                    duration = time.time() - start_time
-                    self._log_query(operation, query, duration, "success")
-                    QUERY_DURATION.labels(operation=operation).observe(duration)
-                    QUERY_COUNT.labels(operation=operation, status="success").inc()
-                    return {"success": True, "data": [dict(row) for row in result]}
+                    query = f"EXPLAIN (FORMAT JSON) {query}"
+                    async with self.get_connection(readonly=True, max_lag=max_lag) as conn:
+                        result = await self._fetch(conn, query, params)
+                    self._record_query(operation, query, start_time, "success")
+                    plan = result[0][0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    count = int(plan[0]["Plan"]["Plan Rows"])
+                    self._store_count(count_key, count, cache_ttl)
+                    return {"success": True, "count": count, "data": [], "approximate": True}
+                
+                # A cursor narrows the page query, so its window count would not be the full total
+                fold_total = with_total and operation == "select" and cursor_values is None and cached_count is None
+                query, params = self._build_query(
+                    table, operation, data, filters,
+                    select_fields, limit, offset, order_by, join_tables, on_conflict,
+                    keyset_columns, keyset_desc, cursor_values, fold_total
+                )
+                readonly = operation in ("select", "count")
+                if not readonly:
+                    _primary_pinned.set(True)
+                async with self.get_connection(readonly=readonly, max_lag=max_lag) as conn:
+                    result = await self._fetch(conn, query, params)
+                self._record_query(operation, query, start_time, "success", len(result), params if readonly else None)
+                
+                if operation == "count":
+                    count = result[0]["count"] if result else 0
+                    self._store_count(count_key, count, cache_ttl)
+                    return {"success": True, "count": count, "data": []}
+                
+                rows = [dict(row) for row in result]
+                response = {"success": True, "data": rows}
+                if operation == "delete":
+                    response["deleted_count"] = len(rows)
+                if operation != "select":
+                    self._notify_write(table, len(rows))
+                if keyset_columns:
+                    response["next_cursor"] = self._next_cursor(rows, keyset_columns, limit)
+                if with_total:
+                    total = cached_count
+                    if fold_total:
+                        total = rows[0]["total_count"] if rows else (0 if not offset else None)
+                        for row in rows:
+                            row.pop("total_count", None)
+                    if total is None:
+                        total = (await self.execute_query(
+                            table, "count", filters=filters, join_tables=join_tables,
+                            cache_ttl=cache_ttl, max_lag=max_lag
+                        )).get("count", 0)
+                    self._store_count(count_key, total, cache_ttl)
+                    response["total"] = total
+                return response
             
             # Use Supabase for simple operations if available
             if self.supabase_client:
@@ -167,13 +955,17 @@ class Database:
                     if join_tables:
                         select_fields = self._build_join_select(table, join_tables, select_fields)
                     
-                    query = query.select(select_fields)
+                    query = query.select(select_fields, count="exact" if with_total and cached_count is None else None)
                     
                     if filters:
                         query = self._apply_filters(query, filters)
                     
-                    if order_by:
-                        query = query.order(order_by)
+                    if cursor_values is not None:
+                        query = query.or_(self._keyset_filter(keyset_columns, keyset_desc, cursor_values))
+                    
+                    for term in (order_by.split(",") if order_by else []):
+                        column, _, direction = term.strip().partition(" ")
+                        query = query.order(column, desc=direction.strip().lower() == "desc")
                     
                     if limit:
                         query = query.limit(limit)
@@ -181,68 +973,240 @@ class Database:
                     if offset:
                         query = query.offset(offset)
                     
-                    result = query.execute()
-                    duration = time.time() - start_time
-                    self._log_query(operation, str(query), duration, "success")
-                    QUERY_DURATION.labels(operation=operation).observe(duration)
-                    QUERY_COUNT.labels(operation=operation, status="success").inc()
-                    return {"success": True, "data": result.data}
+                elif operation == "count":
+                    query = query.select("*", count="planned" if approximate else "exact", head=True)
+                    if filters:
+                        query = self._apply_filters(query, filters)
+                    result = await self._run_supabase(query, operation)
+                    self._record_query(operation, f"supabase {operation} {table}", start_time, "success")
+                    self._store_count(count_key, result.count or 0, cache_ttl)
+                    response = {"success": True, "count": result.count or 0, "data": []}
+                    if approximate:
+                        response["approximate"] = True
+                    return response
                     
                 elif operation == "insert":
-                    result = query.insert(data).execute()
-                    duration = time.time() - start_time
-                    self._log_query(operation, str(query), duration, "success")
-                    QUERY_DURATION.labels(operation=operation).observe(duration)
-                    QUERY_COUNT.labels(operation=operation, status="success").inc()
-                    return {"success": True, "data": result.data}
+                    query = query.insert(data)
+                    
+                elif operation == "upsert":
+                    query = query.upsert(data, on_conflict=on_conflict or "id")
                     
                 elif operation == "update":
-                    query = query.update(data)
-                    if filters:
-                        query = self._apply_filters(query, filters)
-                    result = query.execute()
-                    duration = time.time() - start_time
-                    self._log_query(operation, str(query), duration, "success")
-                    QUERY_DURATION.labels(operation=operation).observe(duration)
-                    QUERY_COUNT.labels(operation=operation, status="success").inc()
-                    return {"success": True, "data": result.data}
+                    if not filters:
+                        raise ValueError("Refusing to update without filters")
+                    query = self._apply_filters(query.update(data), filters)
                     
                 elif operation == "delete":
-                    if filters:
-                        query = self._apply_filters(query, filters)
-                    result = query.delete().execute()
-                    duration = time.time() - start_time
-                    self._log_query(operation, str(query), duration, "success")
-                    QUERY_DURATION.labels(operation=operation).observe(duration)
-                    QUERY_COUNT.labels(operation=operation, status="success").inc()
-                    return {"success": True, "data": result.data}
+                    if not filters:
+                        raise ValueError("Refusing to delete without filters")
+                    query = self._apply_filters(query.delete(), filters)
+                
+                result = await self._run_supabase(query, operation)
+                self._record_query(operation, f"supabase {operation} {table}", start_time, "success", len(result.data or []))
+                response = {"success": True, "data": result.data}
+                if operation == "delete":
+                    response["deleted_count"] = len(result.data or [])
+                if operation != "select":
+                    self._notify_write(table, len(result.data or []))
+                if keyset_columns:
+                    response["next_cursor"] = self._next_cursor(result.data or [], keyset_columns, limit)
+                if with_total:
+                    total = cached_count if cached_count is not None else result.count or 0
+                    self._store_count(count_key, total, cache_ttl)
+                    response["total"] = total
+                return response
             
             # If neither PostgreSQL nor Supabase is available
             raise Exception("No database connection available")
                 
         except Exception as e:
-            duration = time.time() - start_time
-            self._log_query(operation, str(query) if 'query' in locals() else "N/A", duration, "error")
-            QUERY_DURATION.labels(operation=operation).observe(duration)
-            QUERY_COUNT.labels(operation=operation, status="error").inc()
+            self._record_query(
+                operation,
+                query if isinstance(locals().get('query'), str) else f"supabase {operation} {table}",
+                start_time,
+                "error"
+            )
             logger.error(f"Query execution failed: {e}")
             return {"success": False, "error": str(e), "data": []}
 
-    async def get_query_stats(self) -> Dict[str, Any]:
-        """Get query execution statistics"""
-        return {
-            "total_queries": len(self._query_log),
-            "slow_queries": len([q for q in self._query_log if q['duration'] > SLOW_QUERY_THRESHOLD]),
-            "average_duration": sum(q['duration'] for q in self._query_log) / len(self._query_log) if self._query_log else 0,
-            "recent_slow_queries": [q for q in self._query_log[-10:] if q['duration'] > SLOW_QUERY_THRESHOLD]
-        }
+    async def _get_column_types(self, conn, table: str) -> Dict[str, str]:
+        """Return {column: postgres type name} for a table, cached per process"""
+        if table not in self._column_types:
+            rows = await conn.fetch(
+                """
+                SELECT a.attname, t.typname
+                FROM pg_attribute a
+                JOIN pg_type t ON a.atttypid = t.oid
+                WHERE a.attrelid = $1::regclass AND a.attnum > 0 AND NOT a.attisdropped
+                """,
+                _identifier(table)
+            )
+            self._column_types[table] = {row["attname"]: row["typname"] for row in rows}
+        return self._column_types[table]
+
+    async def execute_many(self, query: str, params_list: List[List[Any]]) -> Dict[str, Any]:
+        """Execute one statement for many parameter sets in a single transaction.
+
+        The statement is prepared once and every argument list is coerced to
+        the parameter types Postgres reports before being sent.
+        """
+        start_time = time.time()
+        try:
+            if not self.pool:
+                raise Exception("execute_many requires a PostgreSQL connection pool")
+            
+            async with self.get_connection() as conn:
+                statement = await conn.prepare(query)
+                param_types = [param_type.name for param_type in statement.get_parameters()]
+                records = [
+                    [_coerce_param(type_name, _adapt_value(value)) for type_name, value in zip(param_types, params)]
+                    for params in params_list
+                ]
+                async with conn.transaction():
+                    await statement.executemany(records)
+            
+            self._record_query("execute_many", query, start_time, "success", len(records))
+            if _written_table(query):
+                self._notify_write(_written_table(query), len(records))
+            return {"success": True, "count": len(records)}
+            
+        except Exception as e:
+            self._record_query("execute_many", query, start_time, "error")
+            logger.error(f"execute_many failed: {e}")
+            return {"success": False, "error": str(e), "count": 0}
+
+    async def bulk_insert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        on_conflict: Optional[str] = None,
+        conflict_action: str = "nothing",
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Insert many rows in chunks, reporting failures per row.
+
+        Without ``on_conflict`` each chunk is loaded with COPY
+        (``copy_records_to_table``); with it, rows go through ``executemany``
+        using ``ON CONFLICT (<on_conflict>) DO NOTHING`` or, when
+        ``conflict_action="update"``, ``DO UPDATE``. A chunk that fails is
+        retried row by row so only the offending rows are reported.
+
+        Returns ``{"success", "total", "inserted", "failed"}`` where ``failed``
+        is a list of ``{"index", "error"}`` entries indexing into ``rows``.
+        """
+        start_time = time.time()
+        chunk_size = chunk_size or settings.bulk_insert_chunk_size
+        inserted = 0
+        failed: List[Dict[str, Any]] = []
+        try:
+            if conflict_action not in ("nothing", "update"):
+                raise ValueError(f"Unsupported conflict_action: {conflict_action}")
+            if not rows:
+                return {"success": True, "total": 0, "inserted": 0, "failed": []}
+            
+            if not self.pool and not self.supabase_client:
+                await self.connect()
+            
+            if self.pool:
+                async with self.get_connection() as conn:
+                    column_types = await self._get_column_types(conn, table)
+                    for chunk_start in range(0, len(rows), chunk_size):
+                        # Rows are grouped by column set so omitted columns keep their defaults
+                        groups: Dict[Tuple[str, ...], List[int]] = {}
+                        for index in range(chunk_start, min(chunk_start + chunk_size, len(rows))):
+                            groups.setdefault(tuple(rows[index]), []).append(index)
+                        
+                        for columns, indexes in groups.items():
+                            records = [
+                                tuple(
+                                    _coerce_param(column_types.get(column, ""), _adapt_value(rows[index][column]))
+                                    for column in columns
+                                )
+                                for index in indexes
+                            ]
+                            insert_sql = _bulk_insert_sql(table, columns, on_conflict, conflict_action)
+                            try:
+                                async with conn.transaction():
+                                    if on_conflict:
+                                        await conn.executemany(insert_sql, records)
+                                    else:
+                                        await conn.copy_records_to_table(
+                                            _identifier(table), records=records, columns=list(columns)
+                                        )
+                                inserted += len(records)
+                            except Exception as e:
+                                logger.warning(f"Bulk insert chunk into {table} failed ({e}); retrying row by row")
+                                for index, record in zip(indexes, records):
+                                    try:
+                                        # A savepoint per row, so a bad row cannot abort an enclosing db.transaction()
+                                        async with conn.transaction():
+                                            await conn.execute(insert_sql, *record)
+                                        inserted += 1
+                                    except Exception as row_error:
+                                        failed.append({"index": index, "error": str(row_error)})
+            
+            elif self.supabase_client:
+                for chunk_start in range(0, len(rows), chunk_size):
+                    chunk = rows[chunk_start:chunk_start + chunk_size]
+                    
+                    def build(payload):
+                        request = self.supabase_client.table(table)
+                        if on_conflict:
+                            return request.upsert(
+                                payload,
+                                on_conflict=on_conflict,
+                                ignore_duplicates=conflict_action == "nothing"
+                            )
+                        return request.insert(payload)
+                    
+                    try:
+                        await self._run_supabase(build(chunk), "bulk_insert")
+                        inserted += len(chunk)
+                    except Exception as e:
+                        logger.warning(f"Bulk insert chunk into {table} failed ({e}); retrying row by row")
+                        for offset, row in enumerate(chunk):
+                            try:
+                                await self._run_supabase(build(row), "insert")
+                                inserted += 1
+                            except Exception as row_error:
+                                failed.append({"index": chunk_start + offset, "error": str(row_error)})
+            
+            else:
+                raise Exception("No database connection available")
+            
+            self._record_query("bulk_insert", f"bulk insert into {table} ({len(rows)} rows)", start_time, "success", inserted)
+            if inserted:
+                self._notify_write(table, inserted)
+            return {"success": True, "total": len(rows), "inserted": inserted, "failed": failed}
+            
+        except Exception as e:
+            self._record_query("bulk_insert", f"bulk insert into {table} ({len(rows)} rows)", start_time, "error")
+            logger.error(f"Bulk insert into {table} failed: {e}")
+            return {"success": False, "error": str(e), "total": len(rows), "inserted": inserted, "failed": failed}
+
+    async def get_query_stats(self, limit: int = 20, sort_by: str = "total_time") -> Dict[str, Any]:
+        """Get query execution statistics, including the most expensive fingerprints"""
+        stats = self.query_stats.summary()
+        stats["top_queries"] = self.query_stats.top(limit, sort_by)
+        return stats
     
     async def disconnect(self):
         """Close database connections"""
         try:
+            if self._monitor_task:
+                self._monitor_task.cancel()
+                self._monitor_task = None
             if self.pool:
                 await self.pool.close()
                 logger.info("Database pool closed")
+            if self._replica_task:
+                self._replica_task.cancel()
+                self._replica_task = None
+            for task in list(self._plan_tasks):
+                task.cancel()
+            for replica in self.replicas:
+                await replica.pool.close()
+            self.replicas = []
             
             # Supabase client doesn't need explicit disconnection
             logger.info("Database connections closed successfully")
@@ -252,74 +1216,371 @@ class Database:
             raise
     
     @asynccontextmanager
-    async def get_connection(self):
-        """Get a database connection from the pool"""
+    async def get_connection(self, timeout: Optional[float] = None, readonly: bool = False, max_lag: Optional[float] = None):
+        """Get a database connection from the pool.
+
+        Acquisition is left to the pool itself so concurrent requests each get
+        their own connection; waiting longer than ``timeout`` (defaults to
+        ``settings.database_pool_acquire_timeout``) raises ``asyncio.TimeoutError``.
+
+        ``readonly`` connections come from a healthy read replica whose lag is
+        within ``max_lag`` (default ``settings.database_replica_max_lag``)
+        unless the request is pinned to the primary; a replica that cannot
+        hand out a connection is ejected and the primary is used instead.
+        Checkout costs no extra round-trip: the query deadline is enforced
+        per call (see deadline()).
+        """
         if not self.pool:
             raise Exception("Database pool not initialized")
+        
+        # Inside db.transaction() every statement shares the transaction's connection
+        transaction_conn = _transaction_connection.get()
+        if transaction_conn is not None:
+            yield transaction_conn
+            return
+        
+        timeout = timeout if timeout is not None else settings.database_pool_acquire_timeout
+        with self._enforce_deadline():
+            remaining = self._deadline_timeout()
+        if remaining is not None:
+            # Waiting for a connection counts against the request budget too
+            timeout = min(timeout, remaining)
+        replica = self._pick_replica(max_lag) if readonly else None
+        pool = replica.pool if replica else self.pool
+        wait_start = time.perf_counter()
+        with self._enforce_deadline():
+            try:
+                try:
+                    conn = await pool.acquire(timeout=timeout)
+                except (OSError, asyncpg.exceptions.PostgresError, asyncpg.exceptions.InterfaceError) as e:
+                    if replica is None:
+                        raise
+                    logger.warning(f"Read replica {replica.name} unavailable, ejecting: {e}")
+                    replica.healthy = False
+                    REPLICA_HEALTHY.labels(replica=replica.name).set(0)
+                    pool = self.pool
+                    conn = await pool.acquire(timeout=timeout)
+            except asyncio.TimeoutError:
+                POOL_ACQUIRE_TIMEOUTS.inc()
+                logger.warning(f"Timed out after {timeout:.1f}s waiting for a database connection")
+                raise
+            finally:
+                POOL_WAIT_TIME.observe(time.perf_counter() - wait_start)
+        
+        POOL_CHECKED_OUT.inc()
+        try:
+            yield conn
+        finally:
+            POOL_CHECKED_OUT.dec()
+            await pool.release(conn)
+    
+    @asynccontextmanager
+    async def transaction(self, isolation: str = "read_committed"):
+        """Unit of work: run the enclosed database calls atomically.
+
+        One primary connection is pinned for the block and every
+        execute_query / execute_raw_query / bulk_insert made by this task
+        inside it runs on that connection in a single transaction, committed
+        on exit and rolled back if the block raises. Since execute_query
+        reports failures instead of raising, callers must raise on an
+        unsuccessful result to roll back. Nested blocks become savepoints.
+        Statements share one connection, so do not gather() them inside.
+
+        Without a PostgreSQL pool (Supabase only) the block still runs but
+        its statements are not atomic.
+        """
+        if not self.pool and not self.supabase_client:
+            await self.connect()
+        
+        if not self.pool:
+            logger.warning("No PostgreSQL pool configured; db.transaction() statements are not atomic")
+            yield self
+            return
+        
+        current = _transaction_connection.get()
+        if current is not None:
+            async with current.transaction():
+                yield self
+            return
+        
+        _primary_pinned.set(True)
+        async with self.get_connection() as conn:
+            token = _transaction_connection.set(conn)
+            try:
+                async with conn.transaction(isolation=isolation):
+                    with self._enforce_deadline():
+                        remaining = self._deadline_timeout()
+                    if remaining is not None:
+                        # Server-side backstop for the request budget, one round-trip per transaction
+                        await conn.execute(f"SET LOCAL statement_timeout = {max(int(remaining * 1000), 1)}")
+                    yield self
+            finally:
+                _transaction_connection.reset(token)
+    
+    async def fan_out(self, *calls: Awaitable[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Run independent queries concurrently and return their results in order.
+
+        ``calls`` are un-awaited execute_query / execute_raw_query /
+        fetch_columns coroutines. Each runs in its own task and checks out its
+        own pool connection, so the caller waits for the slowest query rather
+        than the sum. They share the current deadline, tightened to
+        ``timeout`` seconds when given, and any still running when it
+        expires are cancelled. Failures stay per call: one that raises or is
+        cancelled yields ``{"success": False, "error": ..., "data": []}``
+        while the others keep their results. Inside db.transaction() the
+        calls run one after another on the transaction's connection.
+
+        Usage::
+
+            totals, methods = await db.fan_out(
+                db.execute_raw_query(totals_query),
+                db.execute_raw_query(methods_query)
+            )
+        """
+        if not calls:
+            return []
+        token = self.set_deadline(timeout, "fan_out") if timeout is not None else None
+        try:
+            if _transaction_connection.get() is not None:
+                results = []
+                for call in calls:
+                    try:
+                        results.append(await call)
+                    except Exception as e:
+                        results.append(self._fan_out_failure("error", str(e)))
+                return results
             
-        async with self._connection_lock:
-            conn = await self.pool.acquire()
+            # Tasks copy the current context, deadline included
+            tasks = [asyncio.ensure_future(call) for call in calls]
             try:
-                yield conn
+                current = _query_deadline.get()
+                remaining = None if current is None else max(current[0] - time.monotonic(), 0)
+                await asyncio.wait(tasks, timeout=remaining)
             finally:
-                await self.pool.release(conn)
+                # Also runs if the caller is cancelled, so no query outlives the request
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            if token is not None:
+                _query_deadline.reset(token)
+        
+        results = []
+        for task in tasks:
+            if task.cancelled():
+                if current is not None:
+                    QUERY_DEADLINE_EXCEEDED.labels(route=current[1]).inc()
+                results.append(self._fan_out_failure("deadline", "Query deadline exceeded"))
+            elif task.exception() is not None:
+                results.append(self._fan_out_failure("error", str(task.exception())))
+            else:
+                result = task.result()
+                if isinstance(result, dict) and not result.get("success", True):
+                    FANOUT_FAILURES.labels(reason="error").inc()
+                results.append(result)
+        return results
+    
+    def _fan_out_failure(self, reason: str, error: str) -> Dict[str, Any]:
+        FANOUT_FAILURES.labels(reason=reason).inc()
+        logger.warning(f"Fanned-out query failed ({reason}): {error}")
+        return {"success": False, "error": error, "data": []}
     
     def _build_query(
         self,
         table: str,
         operation: str,
-        data: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None,
         filters: Optional[Dict[str, Any]] = None,
         select_fields: str = "*",
         limit: Optional[int] = None,
         offset: Optional[int] = None,
         order_by: Optional[str] = None,
-        join_tables: Optional[List[str]] = None
-    ) -> str:
-        """Build SQL query for direct PostgreSQL execution"""
+        join_tables: Optional[List[str]] = None,
+        on_conflict: Optional[str] = None,
+        keyset: Tuple[str, ...] = (),
+        keyset_desc: bool = False,
+        cursor_values: Optional[List[Any]] = None,
+        with_total: bool = False
+    ) -> Tuple[str, List[Any]]:
+        """Build a parameterized SQL query for direct PostgreSQL execution.
+
+        Values are always bound as ``$n`` parameters. The SQL text depends
+        only on the query shape (table, columns, filter keys and operators),
+        so repeated calls produce identical statements that hit asyncpg's
+        per-connection prepared-statement cache.
+        """
+        conditions, filter_params = _split_filters(filters)
+        
+        rows: List[Dict[str, Any]] = []
+        if operation in ("insert", "upsert"):
+            rows = data if isinstance(data, list) else [data] if data else []
+            if not rows:
+                raise ValueError(f"No data provided for {operation}")
+        elif operation == "update" and not data:
+            raise ValueError("No data provided for update")
+        if operation in ("update", "delete") and not conditions:
+            raise ValueError(f"Refusing to {operation} without filters")
+        
+        columns: Tuple[str, ...] = ()
+        row_masks: Tuple[Tuple[bool, ...], ...] = ()
+        params: List[Any] = []
+        if rows:
+            ordered: Dict[str, None] = {}
+            for row in rows:
+                ordered.update(dict.fromkeys(row))
+            columns = tuple(ordered)
+            row_masks = tuple(tuple(column in row for column in columns) for row in rows)
+            for row in rows:
+                params.extend(_adapt_value(row[column]) for column in columns if column in row)
+        elif operation == "update":
+            columns = tuple(data)
+            params.extend(_adapt_value(value) for value in data.values())
+        
+        params.extend(filter_params)
         if operation == "select":
-            query = f"SELECT {select_fields} FROM {table}"
-            
-            if join_tables:
-                for join_table in join_tables:
-                    query += f" LEFT JOIN {join_table} ON {table}.id = {join_table}.{table}_id"
-            
-            if filters:
-                conditions = []
-                for key, value in filters.items():
-                    if "__" in key:
-                        field, operator = key.split("__", 1)
-                        if operator == "gte":
-                            conditions.append(f"{field} >= '{value}'")
-                        elif operator == "lte":
-                            conditions.append(f"{field} <= '{value}'")
-                        elif operator == "like":
-                            conditions.append(f"{field} LIKE '%{value}%'")
-                        elif operator == "ilike":
-                            conditions.append(f"{field} ILIKE '%{value}%'")
-                        elif operator == "in":
-                            conditions.append(f"{field} IN ({','.join(map(str, value))})")
-                        elif operator == "neq":
-                            conditions.append(f"{field} != '{value}'")
-                    else:
-                        conditions.append(f"{key} = '{value}'")
-                
-                if conditions:
-                    query += " WHERE " + " AND ".join(conditions)
-            
-            if order_by:
-                query += f" ORDER BY {order_by}"
-            
-            if limit:
-                query += f" LIMIT {limit}"
-            
+            if cursor_values is not None:
+                params.extend(cursor_values)
+            if limit is not None:
+                params.append(limit)
             if offset:
-                query += f" OFFSET {offset}"
-            
-            return query
+                params.append(offset)
+        
+        shape = _QueryShape(
+            table=table,
+            operation=operation,
+            select_fields=select_fields or "*",
+            columns=columns,
+            row_masks=row_masks,
+            conditions=conditions,
+            order_by=order_by if operation == "select" else None,
+            has_limit=operation == "select" and limit is not None,
+            has_offset=operation == "select" and bool(offset),
+            join_tables=tuple(join_tables or ()),
+            on_conflict=on_conflict if operation == "upsert" else None,
+            keyset=keyset if cursor_values is not None else (),
+            keyset_desc=keyset_desc,
+            with_total=with_total and operation == "select"
+        )
+        return _compile_query(shape), params
+    
+    def _count_cache_key(self, table: str, filters: Optional[Dict[str, Any]], join_tables: Optional[List[str]], approximate: bool) -> Tuple[Any, ...]:
+        return (table, json.dumps(filters or {}, default=str, sort_keys=True), tuple(join_tables or ()), approximate)
+    
+    def _cached_count(self, key: Tuple[Any, ...]) -> Optional[int]:
+        entry = self._count_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, count = entry
+        if expires_at < time.monotonic():
+            del self._count_cache[key]
+            return None
+        return count
+    
+    def _store_count(self, key: Optional[Tuple[Any, ...]], count: int, ttl: Optional[int]):
+        if key is None or not ttl:
+            return
+        self._count_cache[key] = (time.monotonic() + ttl, count)
+        self._count_cache.move_to_end(key)
+        while len(self._count_cache) > COUNT_CACHE_SIZE:
+            self._count_cache.popitem(last=False)
+    
+    def _notify_write(self, table: str, rows: int = 1):
+        """Drop cached counts and memoized loader results for a table after a write
+        and tell registered write listeners about it"""
+        for key in [key for key in self._count_cache if key[0] == table]:
+            del self._count_cache[key]
+        loaders = _request_loaders.get()
+        if loaders:
+            for key in [key for key in loaders if key[0] == table]:
+                del loaders[key]
+        for listener in self._write_listeners:
+            try:
+                listener(table, rows)
+            except Exception as e:
+                logger.error(f"Write listener failed for {table}: {e}")
+    
+    def add_write_listener(self, listener: Callable[[str, int], None]):
+        """Register ``listener(table, rows)`` to be called after writes made through Database"""
+        self._write_listeners.append(listener)
+    
+    def loader(
+        self,
+        table: str,
+        key: str = "id",
+        select_fields: Union[str, List[str]] = "*",
+        many: bool = False,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> DataLoader:
+        """Request-scoped DataLoader resolving ``table`` rows by ``key``.
+
+        Loads issued in the same event-loop tick are answered by one
+        ``WHERE <key> = ANY($1)`` select. Each key resolves to its row (or
+        None), or with ``many=True`` to the list of matching rows. Loaders are
+        memoized per request, so use ``load_many`` or ``asyncio.gather`` to
+        batch, and ``loader_scope()`` in long-running background tasks.
+        """
+        if isinstance(select_fields, (list, tuple)):
+            select_fields = ", ".join(select_fields)
+        if select_fields.strip() != "*" and key not in [field.strip() for field in select_fields.split(",")]:
+            select_fields = f"{key}, {select_fields}"
         
-        # Add other operation types as needed
-        raise NotImplementedError(f"Operation {operation} not implemented for direct PostgreSQL")
+        loaders = _request_loaders.get()
+        if loaders is None:
+            loaders = {}
+            _request_loaders.set(loaders)
+        loader_key = (table, key, select_fields, many, json.dumps(filters or {}, default=str, sort_keys=True))
+        if loader_key not in loaders:
+            async def batch(keys: List[Any]) -> List[Any]:
+                result = await self.execute_query(
+                    table,
+                    "select",
+                    filters={**(filters or {}), f"{key}__in": list(keys)},
+                    select_fields=select_fields
+                )
+                if not result["success"]:
+                    raise Exception(result.get("error", f"Failed to load {table}"))
+                grouped: Dict[str, Any] = {}
+                for row in result["data"]:
+                    # asyncpg returns UUID objects while callers usually hold strings
+                    if many:
+                        grouped.setdefault(str(row[key]), []).append(row)
+                    else:
+                        grouped.setdefault(str(row[key]), row)
+                return [grouped.get(str(value), [] if many else None) for value in keys]
+            
+            loaders[loader_key] = DataLoader(batch, max_batch_size=settings.dataloader_max_batch_size)
+        return loaders[loader_key]
+    
+    @contextmanager
+    def loader_scope(self):
+        """Give the enclosed block its own loader memo (for work outside a request)"""
+        token = _request_loaders.set({})
+        try:
+            yield
+        finally:
+            _request_loaders.reset(token)
+    
+    def _next_cursor(self, rows: List[Dict[str, Any]], keyset: Tuple[str, ...], limit: int) -> Optional[str]:
+        """Cursor pointing after the last row of a full page, or None on the last page"""
+        if len(rows) < limit:
+            return None
+        last_row = rows[-1]
+        columns = [column.split(".")[-1] for column in keyset]
+        missing = [column for column in columns if column not in last_row]
+        if missing:
+            raise ValueError(f"Cursor pagination requires {', '.join(missing)} in select_fields")
+        return encode_cursor([last_row[column] for column in columns])
+    
+    def _keyset_filter(self, keyset: Tuple[str, ...], descending: bool, values: List[Any]) -> str:
+        """Expand a row comparison into a PostgREST or=() filter for the Supabase path"""
+        operator = "lt" if descending else "gt"
+        branches = []
+        for index, column in enumerate(keyset):
+            terms = [f'{keyset[i]}.eq."{values[i]}"' for i in range(index)]
+            terms.append(f'{column}.{operator}."{values[index]}"')
+            branches.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+        return ",".join(branches)
     
     def _apply_filters(self, query, filters: Dict[str, Any]):
         """Apply filters to Supabase query"""
@@ -328,8 +1589,12 @@ class Database:
                 field, operator = key.split("__", 1)
                 if operator == "gte":
                     query = query.gte(field, value)
+                elif operator == "gt":
+                    query = query.gt(field, value)
                 elif operator == "lte":
                     query = query.lte(field, value)
+                elif operator == "lt":
+                    query = query.lt(field, value)
                 elif operator == "like":
                     query = query.like(field, f"%{value}%")
                 elif operator == "ilike":
@@ -338,6 +1603,10 @@ class Database:
                     query = query.in_(field, value)
                 elif operator == "neq":
                     query = query.neq(field, value)
+                elif operator == "is":
+                    query = query.is_(field, "null" if value is None else value)
+            elif value is None:
+                query = query.is_(key, "null")
             else:
                 query = query.eq(key, value)
         return query
@@ -371,97 +1640,173 @@ class Database:
                 """
         return select_fields
     
-    async def execute_raw_query(self, query: str, params: List[Any] = None) -> Dict[str, Any]:
-        """Execute raw SQL query using Supabase RPC"""
+    async def execute_raw_query(self, query: str, params: List[Any] = None, max_lag: Optional[float] = None) -> Dict[str, Any]:
+        """Execute raw SQL with ``$n`` parameters.
+
+        Runs on the asyncpg pool with natively bound parameters and the
+        per-connection statement cache. The Supabase ``execute_sql`` RPC is
+        only used when no pool is configured. Plain SELECT/WITH queries are
+        sent to a read replica when one is available (see execute_query).
+        """
+        start_time = time.time()
         try:
-            if not self.supabase_client:
+            if not self.pool and not self.supabase_client:
                 await self.connect()
             
-            # For raw SQL queries, we'll use Supabase RPC function
-            # You'll need to create this function in your Supabase
-            result = self.supabase_client.rpc('execute_sql', {
-                'query': query,
-                'params': params or []
-            }).execute()
+            if self.pool:
+                readonly = _is_read_only(query)
+                if not readonly:
+                    _primary_pinned.set(True)
+                async with self.get_connection(readonly=readonly, max_lag=max_lag) as conn:
+                    if not params and _is_multi_statement(query):
+                        # Several statements (e.g. DDL batches) need the simple query protocol
+                        with self._enforce_deadline():
+                            await conn.execute(query, timeout=self._deadline_timeout())
+                        rows = []
+                    else:
+                        rows = await self._fetch(conn, query, params)
+                self._record_query("raw", query, start_time, "success", len(rows), (params or []) if readonly else None)
+                if not readonly and _written_table(query):
+                    self._notify_write(_written_table(query), max(len(rows), 1))
+                return {"success": True, "data": [dict(row) for row in rows]}
+            
+            if self.supabase_client:
+                # Fallback: Supabase RPC function (see setup_supabase.py)
+                result = await self._run_supabase(
+                    self.supabase_client.rpc('execute_sql', {
+                        'query': query,
+                        'params': params or []
+                    }),
+                    "rpc"
+                )
+                self._record_query("raw", query, start_time, "success", len(result.data or []))
+                return {"success": True, "data": result.data}
             
-            return {"success": True, "data": result.data}
+            raise Exception("No database connection available")
             
         except Exception as e:
+            self._record_query("raw", query, start_time, "error")
             logger.error(f"Raw query failed: {e}")
             return {"success": False, "error": str(e), "data": []}
     
-    async def get_dashboard_stats(self) -> Dict[str, Any]:
-        """Get real-time dashboard statistics with caching"""
+    async def stream(
+        self,
+        query: str,
+        params: Optional[List[Any]] = None,
+        batch_size: Optional[int] = None,
+        max_lag: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the rows of a query one at a time from a server-side cursor.
+
+        Rows are fetched ``batch_size`` at a time (default
+        ``settings.database_stream_batch_size``), so exports run in constant
+        memory and can start sending output before the query finishes. The
+        connection and its transaction are held until the generator is
+        exhausted or closed. Without a pool the Supabase RPC result is
+        fetched whole and replayed.
+        """
+        batch_size = batch_size or settings.database_stream_batch_size
+        if not self.pool and not self.supabase_client:
+            await self.connect()
+        
+        if not self.pool:
+            result = await self.execute_raw_query(query, params)
+            if not result["success"]:
+                raise Exception(result["error"])
+            for row in result["data"] or []:
+                yield row
+            return
+        
+        start_time = time.time()
+        status = "error"
+        row_count = 0
+        readonly = _is_read_only(query)
         try:
-            # Use materialized view for better performance
-            stats_query = """
-                CREATE MATERIALIZED VIEW IF NOT EXISTS dashboard_stats AS
-                WITH current_term AS (
-                    SELECT id, term_name 
-                    FROM academic_terms 
-                    WHERE is_current = true
-                    LIMIT 1
-                ),
-                fee_stats AS (
-                    SELECT 
-                        COUNT(*) as total_students,
-                        SUM(CASE WHEN is_paid = true THEN 1 ELSE 0 END) as paid_students,
-                        SUM(CASE WHEN is_paid = false AND due_date < CURRENT_DATE THEN 1 ELSE 0 END) as overdue_students,
-                        SUM(amount) as total_fees,
-                        SUM(CASE WHEN is_paid = true THEN amount ELSE 0 END) as paid_amount,
-                        SUM(CASE WHEN is_paid = false AND due_date < CURRENT_DATE THEN amount ELSE 0 END) as overdue_amount
-                    FROM student_fees sf
-                    JOIN current_term ct ON sf.academic_term_id = ct.id
-                ),
-                payment_stats AS (
-                    SELECT 
-                        COUNT(*) as total_payments,
-                        SUM(amount) as total_revenue,
-                        COUNT(DISTINCT student_id) as students_paid,
-                        COUNT(CASE WHEN payment_status = 'completed' THEN 1 END) as successful_payments
-                    FROM payments
-                    WHERE payment_date >= CURRENT_DATE - INTERVAL '30 days'
-                ),
-                recent_activities AS (
-                    SELECT 
-                        p.id,
-                        p.payment_date,
-                        s.student_id,
-                        CONCAT(s.first_name, ' ', s.last_name) as student_name,
-                        p.amount,
-                        p.payment_status
-                    FROM payments p
-                    JOIN students s ON p.student_id = s.id
-                    ORDER BY p.payment_date DESC
-                    LIMIT 5
-                )
-                SELECT 
-                    fs.*,
-                    ps.*,
-                    json_agg(ra.*) as recent_activities
-                FROM fee_stats fs
-                CROSS JOIN payment_stats ps
-                CROSS JOIN recent_activities ra
-                GROUP BY 
-                    fs.total_students, fs.paid_students, fs.overdue_students,
-                    fs.total_fees, fs.paid_amount, fs.overdue_amount,
-                    ps.total_payments, ps.total_revenue, ps.students_paid,
-                    ps.successful_payments;
-            """
+            async with self.get_connection(readonly=readonly, max_lag=max_lag) as conn:
+                # Server-side cursors only live inside a transaction (a savepoint inside db.transaction())
+                nested = _transaction_connection.get() is not None
+                async with conn.transaction(readonly=readonly and not nested):
+                    statement = await conn.prepare(query)
+                    args = [
+                        _coerce_param(param_type.name, _adapt_value(value))
+                        for param_type, value in zip(statement.get_parameters(), params or [])
+                    ]
+                    cursor = await statement.cursor(*args)
+                    while True:
+                        with self._enforce_deadline():
+                            rows = await cursor.fetch(batch_size, timeout=self._deadline_timeout())
+                        if not rows:
+                            break
+                        row_count += len(rows)
+                        for row in rows:
+                            yield dict(row)
+            status = "success"
+        except GeneratorExit:
+            status = "cancelled"
+            raise
+        finally:
+            self._record_query("stream", query, start_time, status, row_count)
+    
+    async def fetch_columns(
+        self,
+        table: str,
+        columns: Dict[str, str],
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        max_lag: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Select rows as column-major NumPy arrays instead of dicts.
+
+        ``columns`` maps each column to a kind: ``datetime64`` (datetime64[us],
+        UTC), ``float64``, ``minor_units`` (int64 cents), ``int64``, ``bool`` or
+        ``object``. On the pool the conversions run in Postgres and the arrays
+        are filled straight from the asyncpg records, so scanning a large
+        table costs no per-row dict. Returns ``{"data": {column: array},
+        "count": rows}``.
+        """
+        start_time = time.time()
+        query = f"columnar {table}"
+        try:
+            if not self.pool and not self.supabase_client:
+                await self.connect()
             
-            # Create index on materialized view
-            index_query = """
-                CREATE UNIQUE INDEX IF NOT EXISTS idx_dashboard_stats ON dashboard_stats(total_students);
-            """
+            if self.pool:
+                select_fields = ", ".join(column_sql(_identifier(column), kind) for column, kind in columns.items())
+                query, params = self._build_query(
+                    table, "select", filters=filters, select_fields=select_fields,
+                    limit=limit, order_by=order_by
+                )
+                async with self.get_connection(readonly=True, max_lag=max_lag) as conn:
+                    records = await self._fetch(conn, query, params)
+                self._record_query("columnar", query, start_time, "success", len(records), params)
+                return {"success": True, "data": records_to_columns(records, columns), "count": len(records)}
             
-            # Execute view creation and indexing
-            await self.execute_raw_query(stats_query)
-            await self.execute_raw_query(index_query)
+            if self.supabase_client:
+                request = self.supabase_client.table(table).select(",".join(columns))
+                if filters:
+                    request = self._apply_filters(request, filters)
+                for term in (order_by.split(",") if order_by else []):
+                    column, _, direction = term.strip().partition(" ")
+                    request = request.order(column, desc=direction.strip().lower() == "desc")
+                if limit:
+                    request = request.limit(limit)
+                result = await self._run_supabase(request, "columnar")
+                rows = result.data or []
+                self._record_query("columnar", query, start_time, "success", len(rows))
+                return {"success": True, "data": rows_to_columns(rows, columns), "count": len(rows)}
             
-            # Refresh materialized view
-            refresh_query = "REFRESH MATERIALIZED VIEW CONCURRENTLY dashboard_stats;"
-            await self.execute_raw_query(refresh_query)
+            raise Exception("No database connection available")
             
+        except Exception as e:
+            self._record_query("columnar", query, start_time, "error")
+            logger.error(f"Columnar query failed: {e}")
+            return {"success": False, "error": str(e), "data": {}, "count": 0}
+    
+    async def get_dashboard_stats(self) -> Dict[str, Any]:
+        """Get real-time dashboard statistics with caching"""
+        try:
+            # dashboard_stats is created and kept fresh by the materialized view service
             # Get stats
             result = await self.execute_raw_query("SELECT * FROM dashboard_stats;")
             
@@ -0,0 +1,189 @@
+"""
+Index advisor: replay captured query fingerprints with EXPLAIN and report
+sequential scans on large tables.
+
+Run with:
+    python -m app.index_advisor                      # fingerprints from pg_stat_statements
+    python -m app.index_advisor --stats-file q.json  # saved GET /monitoring/query-stats response
+    python -m app.index_advisor --url https://host --token <admin JWT>
+
+Parameterized statements ($1, $2, ...) are planned with EXPLAIN (GENERIC_PLAN),
+which needs PostgreSQL 16 or later; on older servers they are reported as
+skipped. Queries are only planned, never executed.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+from .database import db, _is_read_only
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_RE = re.compile(r"\$\d+")
+_FILTER_COLUMN_RE = re.compile(r"\(?([a-z_][a-z0-9_]*)\)?(?:::\w+)?\s*(?:=|<>|<=|>=|<|>|~~\*?|!~~\*?)", re.IGNORECASE)
+
+
+def _load_stats_file(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        payload = json.load(f)
+    # Accept either the APIResponse envelope or its data payload
+    payload = payload.get("data", payload)
+    return payload.get("top_queries", [])
+
+
+async def _load_from_api(url: str, token: str, limit: int) -> List[Dict[str, Any]]:
+    async with httpx.AsyncClient(timeout=30) as client:
+        response = await client.get(
+            f"{url.rstrip('/')}/monitoring/query-stats",
+            params={"limit": limit, "sort_by": "total_time"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()
+        return response.json()["data"]["top_queries"]
+
+
+async def _load_from_pg_stat_statements(conn, limit: int) -> List[Dict[str, Any]]:
+    rows = await conn.fetch(
+        """
+        SELECT query, calls, total_exec_time / 1000.0 AS total_time
+        FROM pg_stat_statements
+        WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+        ORDER BY total_exec_time DESC
+        LIMIT $1
+        """,
+        limit
+    )
+    return [
+        {"fingerprint": row["query"], "sample": row["query"], "calls": row["calls"], "total_time": row["total_time"]}
+        for row in rows
+    ]
+
+
+def _walk_plan(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+async def _explain(conn, query: str) -> Dict[str, Any]:
+    options = "FORMAT JSON, GENERIC_PLAN" if _PLACEHOLDER_RE.search(query) else "FORMAT JSON"
+    plan = await conn.fetchval(f"EXPLAIN ({options}) {query}")
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def _table_rows(conn, cache: Dict[str, int], table: str) -> int:
+    if table not in cache:
+        cache[table] = int(await conn.fetchval(
+            "SELECT COALESCE(MAX(reltuples), 0)::bigint FROM pg_class WHERE relname = $1 AND relkind IN ('r', 'p', 'm')",
+            table
+        ) or 0)
+    return cache[table]
+
+
+async def analyze(entries: List[Dict[str, Any]], conn, min_rows: int) -> Dict[str, Any]:
+    """EXPLAIN each captured statement and collect sequential scans on tables of at least ``min_rows``"""
+    findings = []
+    skipped = []
+    table_rows: Dict[str, int] = {}
+    for entry in entries:
+        query = entry.get("sample") or ""
+        if not _is_read_only(query):
+            # Writes, Supabase placeholders ("supabase select table") and DDL are not replayed
+            continue
+        try:
+            plan = await _explain(conn, query)
+        except Exception as e:
+            skipped.append({"fingerprint": entry.get("fingerprint"), "reason": str(e).splitlines()[0]})
+            continue
+
+        for node in _walk_plan(plan):
+            if node.get("Node Type") != "Seq Scan":
+                continue
+            table = node.get("Relation Name")
+            rows = await _table_rows(conn, table_rows, table)
+            if rows < min_rows:
+                continue
+            scan_filter = node.get("Filter")
+            findings.append({
+                "fingerprint": entry.get("fingerprint"),
+                "calls": entry.get("calls"),
+                "total_time": entry.get("total_time"),
+                "table": table,
+                "table_rows": rows,
+                "filter": scan_filter,
+                "candidate_columns": sorted(set(_FILTER_COLUMN_RE.findall(scan_filter or ""))),
+            })
+
+    findings.sort(key=lambda finding: finding["total_time"] or 0, reverse=True)
+    return {"findings": findings, "skipped": skipped}
+
+
+def _print_report(report: Dict[str, Any]):
+    if not report["findings"]:
+        print("No sequential scans on large tables found")
+    for finding in report["findings"]:
+        print(f"Seq Scan on {finding['table']} (~{finding['table_rows']} rows)")
+        print(f"  calls={finding['calls']} total_time={finding['total_time']}")
+        print(f"  query:  {finding['fingerprint'][:200]}")
+        if finding["filter"]:
+            print(f"  filter: {finding['filter']}")
+        if finding["candidate_columns"]:
+            print(f"  consider an index on: {', '.join(finding['candidate_columns'])}")
+        print()
+    for skipped in report["skipped"]:
+        print(f"Skipped: {skipped['fingerprint'][:120]} ({skipped['reason']})")
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report sequential scans in captured queries")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--stats-file", help="saved GET /monitoring/query-stats response")
+    source.add_argument("--url", help="base URL of a running backend to read /monitoring/query-stats from")
+    parser.add_argument("--token", help="admin bearer token for --url")
+    parser.add_argument("--limit", type=int, default=50, help="number of fingerprints to replay")
+    parser.add_argument("--min-rows", type=int, default=10000, help="ignore scans on tables smaller than this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.url and not args.token:
+        parser.error("--url needs --token")
+
+    try:
+        await db.connect()
+        if not db.pool:
+            print("The index advisor needs DATABASE_URL to run EXPLAIN")
+            return 1
+
+        async with db.get_connection() as conn:
+            if args.stats_file:
+                entries = _load_stats_file(args.stats_file)[:args.limit]
+            elif args.url:
+                entries = await _load_from_api(args.url, args.token, args.limit)
+            else:
+                entries = await _load_from_pg_stat_statements(conn, args.limit)
+            report = await analyze(entries, conn, args.min_rows)
+    except Exception as e:
+        print(f"Index advisor failed: {e}")
+        return 1
+    finally:
+        await db.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(main()))
@@ -3,7 +3,7 @@ import logging
 from fastapi import FastAPI, HTTPException, Depends, Query, status, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
@@ -12,6 +12,7 @@ import csv
 import io
 import os
 import time
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 # Import settings first
 from app.config import settings
@@ -44,9 +45,9 @@ sentry_sdk.init(
     enable_tracing=True,
 )
 
-from app.database import db
+from app.database import db, QueryDeadlineExceeded
 
-from app.routes import auth, students, payments, dashboard, reports, integrations, settings as settings_routes, financial, parents, quickbooks, errors, parent_portal, test_sentry, tumeny
+from app.routes import auth, students, payments, dashboard, reports, integrations, settings as settings_routes, financial, parents, quickbooks, errors, parent_portal, test_sentry, tumeny, monitoring
 
 # Import models
 from app.models import (
@@ -64,6 +65,7 @@ from app.services.notification_service import notification_service
 from app.services.receipt_service import receipt_service
 from app.services.analytics_service import analytics_service
 from app.services.cache_service import cache_service
+from app.services.event_bus import event_bus
 from app.services.integration_service import integration_service
 from app.services.quickbooks_service import quickbooks_service
 from app.services.twilio_service import twilio_service
@@ -72,6 +74,7 @@ from app.services.whatsapp_service import whatsapp_service
 from app.services.websocket_service import websocket_service
 from app.services.audit_service import audit_service
 from app.services.bulk_operations_service import bulk_operations_service
+from app.services.materialized_view_service import materialized_view_service
 
 # Configure logging
 logging.basicConfig(
@@ -234,6 +237,12 @@ async def api_info():
         "debug": settings.debug
     }
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose Prometheus metrics (query timings, connection pool usage)"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(students.router, prefix="/students", tags=["students"])
@@ -249,6 +258,7 @@ app.include_router(errors.router, prefix="/errors", tags=["errors"])
 app.include_router(parent_portal.router, prefix="/parent-portal", tags=["parent-portal"])
 app.include_router(test_sentry.router, prefix="/test-sentry", tags=["test-sentry"])
 app.include_router(tumeny.router, prefix="/tumeny", tags=["tumeny"])
+app.include_router(monitoring.router, prefix="/monitoring", tags=["monitoring"])
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -277,6 +287,20 @@ async def http_exception_handler(request, exc):
         }
     )
 
+# Query deadline handler (for paths that let QueryDeadlineExceeded propagate)
+@app.exception_handler(QueryDeadlineExceeded)
+async def query_deadline_exception_handler(request, exc):
+    """Query deadline exceeded handler"""
+    logger.warning(f"Query deadline exceeded: {request.method} {request.url.path}")
+    return JSONResponse(
+        status_code=504,
+        content={
+            "success": False,
+            "message": "The request took too long to complete",
+            "status_code": 504
+        }
+    )
+
 # Application startup
 @app.on_event("startup")
 async def startup_event():
@@ -302,6 +326,7 @@ async def startup_event():
             websocket_service,
             audit_service,
             bulk_operations_service,
+            materialized_view_service,
             tumeny_service
         ]
         
@@ -328,6 +353,9 @@ async def shutdown_event():
         # Cleanup services
         if hasattr(whatsapp_service, 'cleanup'):
             await whatsapp_service.cleanup()
+        await materialized_view_service.cleanup()
+        await event_bus.cleanup()
+        await cache_service.cleanup()
         
         # Close database connections
         await db.close()
@@ -0,0 +1,171 @@
+"""
+Managed schema migrations (indexes for the hot query shapes).
+
+Run with:  python -m app.migrations [--dry-run] [--list]
+
+Indexes are built with CREATE INDEX CONCURRENTLY so they can be applied to a
+live database without blocking writes. Applied migrations are recorded in
+schema_migrations and skipped on later runs.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from typing import List, NamedTuple, Optional, Tuple
+
+import asyncpg
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Serializes concurrent runners (e.g. several instances starting a deploy)
+MIGRATION_LOCK_ID = 7283401
+
+
+class IndexSpec(NamedTuple):
+    name: str
+    table: str
+    columns: str
+    method: str = "btree"
+    where: Optional[str] = None
+
+    def create_sql(self) -> str:
+        sql = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.name} ON {self.table} USING {self.method} ({self.columns})"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+
+class Migration(NamedTuple):
+    id: str
+    description: str
+    extensions: Tuple[str, ...] = ()
+    indexes: Tuple[IndexSpec, ...] = ()
+
+    def statements(self) -> List[str]:
+        return (
+            [f"CREATE EXTENSION IF NOT EXISTS {extension}" for extension in self.extensions]
+            + [index.create_sql() for index in self.indexes]
+        )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        id="0001_hot_query_indexes",
+        description="Indexes for payment, fee and student search filters",
+        extensions=("pg_trgm",),
+        indexes=(
+            # Payment lists, summaries and reports filter on status over a date range
+            IndexSpec("idx_payments_status_date", "payments", "payment_status, payment_date DESC"),
+            IndexSpec("idx_payments_student_date", "payments", "student_id, payment_date DESC"),
+            # Fee lookups per student, usually narrowed to unpaid fees
+            IndexSpec("idx_student_fees_student_paid", "student_fees", "student_id, is_paid"),
+            # Overdue/outstanding queries only ever look at unpaid fees
+            IndexSpec("idx_student_fees_unpaid_due", "student_fees", "due_date, student_id", where="is_paid = false"),
+            IndexSpec("idx_student_fees_term", "student_fees", "academic_term_id"),
+            # Student search uses ILIKE '%term%', which only trigram indexes can serve
+            IndexSpec("idx_students_first_name_trgm", "students", "first_name gin_trgm_ops", method="gin"),
+            IndexSpec("idx_students_last_name_trgm", "students", "last_name gin_trgm_ops", method="gin"),
+            IndexSpec("idx_students_student_id_trgm", "students", "student_id gin_trgm_ops", method="gin"),
+            IndexSpec("idx_payment_allocations_payment", "payment_allocations", "payment_id"),
+        )
+    ),
+]
+
+
+async def _applied_migrations(conn) -> set:
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            id TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
+    return {row["id"] for row in await conn.fetch("SELECT id FROM schema_migrations")}
+
+
+async def _drop_invalid_index(conn, name: str):
+    """A failed CONCURRENTLY build leaves an INVALID index that IF NOT EXISTS would skip"""
+    invalid = await conn.fetchval(
+        "SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = $1",
+        name
+    )
+    if invalid:
+        logger.warning(f"Dropping invalid index {name} left by an earlier failed build")
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+async def apply_migrations(dry_run: bool = False) -> List[str]:
+    """Apply pending migrations and return their ids.
+
+    Needs a direct PostgreSQL connection (DATABASE_URL); statements run
+    outside a transaction because concurrent index builds cannot run inside
+    one. The connection is opened without the pool's command_timeout or a
+    statement_timeout: an index build on a large table can take far longer,
+    and one cut short leaves an INVALID index behind.
+    """
+    if not settings.database_url:
+        raise RuntimeError("Migrations need DATABASE_URL; run the SQL from --dry-run in the Supabase SQL editor instead")
+
+    applied: List[str] = []
+    conn = await asyncpg.connect(
+        settings.database_url,
+        command_timeout=None,
+        server_settings={"statement_timeout": "0"}
+    )
+    try:
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        try:
+            done = await _applied_migrations(conn)
+            for migration in MIGRATIONS:
+                if migration.id in done:
+                    continue
+                if dry_run:
+                    applied.append(migration.id)
+                    continue
+                logger.info(f"Applying migration {migration.id}: {migration.description}")
+                for extension in migration.extensions:
+                    await conn.execute(f"CREATE EXTENSION IF NOT EXISTS {extension}")
+                for index in migration.indexes:
+                    await _drop_invalid_index(conn, index.name)
+                    await conn.execute(index.create_sql())
+                await conn.execute("INSERT INTO schema_migrations (id) VALUES ($1)", migration.id)
+                applied.append(migration.id)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+    finally:
+        await conn.close()
+    return applied
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply Fee Master schema migrations")
+    parser.add_argument("--dry-run", action="store_true", help="show pending migrations without applying them")
+    parser.add_argument("--list", action="store_true", help="print the SQL of every migration and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for migration in MIGRATIONS:
+            print(f"-- {migration.id}: {migration.description}")
+            for statement in migration.statements():
+                print(f"{statement};")
+            print()
+        return 0
+
+    try:
+        applied = await apply_migrations(dry_run=args.dry_run)
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return 1
+
+    if not applied:
+        print("Schema is up to date")
+    for migration_id in applied:
+        print(f"{'Pending' if args.dry_run else 'Applied'}: {migration_id}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main()))
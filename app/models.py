@@ -497,6 +497,7 @@ class PaginatedResponse(BaseModel):
     page: int
     per_page: int
     total_pages: int
+    next_cursor: Optional[str] = None
 
 # File upload models
 class FileUpload(BaseModel):
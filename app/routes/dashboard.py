@@ -3,12 +3,19 @@ from typing import Optional
 from datetime import datetime, date, timedelta
 import logging
 
+from ..config import settings
 from ..models import DashboardStats, APIResponse
 from ..database import db
+from ..utils.deadlines import query_deadline
+from ..utils.route_cache import cached_route, uncached
 from .auth import get_current_user
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["dashboard"],
+    dependencies=[Depends(query_deadline(settings.query_deadline_report))]
+)
 
 @router.get("/stats", response_model=APIResponse)
 async def get_dashboard_stats():
@@ -95,6 +102,7 @@ async def get_financial_summary(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/revenue-chart")
+@cached_route(ttl=600, vary_on=["period"], tags=["payments"])
 async def get_revenue_chart_data(
     period: str = Query("week", regex="^(week|month|quarter|year)$")
 ):
@@ -145,18 +153,18 @@ async def get_revenue_chart_data(
                     "tension": 0.4,
                 }]
             }
-            return APIResponse(
+            return uncached(APIResponse(
                 success=True,
                 message="Revenue chart data retrieved successfully (fallback)",
                 data=chart_data
-            )
+            ))
         
         # Format data for Chart.js
         labels = []
         revenue_data = []
         transaction_data = []
         
-        data_rows = result["data"]["data"] if result["data"]["data"] else []
+        data_rows = result["data"] or []
         for row in data_rows:
             labels.append(str(row["period"]))
             revenue_data.append(float(row["revenue"]))
@@ -254,6 +262,7 @@ async def get_payment_methods_chart(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/grade-distribution")
+@cached_route(ttl=600, tags=["students", "student_fees"])
 async def get_grade_distribution():
     """Get student grade distribution with payment progress"""
     try:
@@ -277,21 +286,21 @@ async def get_grade_distribution():
         
         result = await db.execute_raw_query(distribution_query)
         
-        if not result["success"] or not result["data"]["data"]:
+        if not result["success"] or not result["data"]:
             # Return fallback data based on actual student grades
             fallback_data = [
                 { "grade": "Grade 7", "students": 2, "progress": 50 },
                 { "grade": "Grade 8", "students": 3, "progress": 67 }
             ]
-            return APIResponse(
+            return uncached(APIResponse(
                 success=True,
                 message="Grade distribution retrieved successfully (fallback)",
                 data=fallback_data
-            )
+            ))
         
         # Format the data for the frontend
         grade_data = []
-        for row in result["data"]["data"]:
+        for row in result["data"]:
             grade_data.append({
                 "grade": row["grade"],
                 "students": int(row["active_count"]),
@@ -311,11 +320,11 @@ async def get_grade_distribution():
             { "grade": "Grade 7", "students": 2, "progress": 50 },
             { "grade": "Grade 8", "students": 3, "progress": 67 }
         ]
-        return APIResponse(
+        return uncached(APIResponse(
             success=True,
             message="Grade distribution retrieved successfully (fallback)",
             data=fallback_data
-        )
+        ))
 
 @router.get("/quick-actions")
 async def get_quick_actions():
@@ -373,7 +382,7 @@ async def get_quick_actions():
             )
         
         # Process the counts and add them to default actions
-        actions_data = result["data"]["data"] if result["data"]["data"] else []
+        actions_data = result["data"] or []
         counts = {}
         
         for action in actions_data:
@@ -1,13 +1,20 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File, Header
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
 from datetime import datetime, date, timedelta
 import logging
 import csv
 from io import StringIO
 import os
 
+from ..config import settings
 from ..models import APIResponse
 from ..database import db
+from ..services.cache_service import cache_service, ACADEMIC_CONTEXT_KEY
+from ..services.event_bus import event_bus, FEE_UPDATED, PAYMENT_CREATED
+from ..utils.deadlines import query_deadline
+from ..utils.export import stream_csv
+from ..utils.route_cache import cached_route
 from .auth import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -15,7 +22,7 @@ router = APIRouter(prefix="/financial", tags=["financial"])
 
 ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "your-very-secret-key")
 
-@router.get("/dashboard/overview")
+@router.get("/dashboard/overview", dependencies=[Depends(query_deadline(settings.query_deadline_report))])
 async def get_financial_overview(
     period: str = Query("current-term"),
     start_date: Optional[date] = Query(None),
@@ -53,9 +60,11 @@ async def get_financial_overview(
             WHERE sf.is_paid = false
         """
         
-        revenue_result = await db.execute_raw_query(revenue_query)
-        collected_result = await db.execute_raw_query(collected_query)
-        outstanding_result = await db.execute_raw_query(outstanding_query)
+        revenue_result, collected_result, outstanding_result = await db.fan_out(
+            db.execute_raw_query(revenue_query),
+            db.execute_raw_query(collected_query),
+            db.execute_raw_query(outstanding_query)
+        )
         
         revenue_data = revenue_result["data"][0] if revenue_result["success"] and revenue_result["data"] else {}
         collected_data = collected_result["data"][0] if collected_result["success"] and collected_result["data"] else {}
@@ -242,6 +251,7 @@ async def get_monthly_collections_breakdown(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/dashboard/outstanding-by-grade")
+@cached_route(ttl=600, tags=["students", "student_fees"])
 async def get_outstanding_by_grade(
     current_user: dict = Depends(get_current_user)
 ):
@@ -343,23 +353,18 @@ async def export_financial_data(
             ORDER BY p.payment_date DESC
         """
         
-        result = await db.execute_raw_query(export_query)
-        
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail="Failed to export financial data")
-        
-        # Convert result to CSV
-        output = StringIO()
-        csv_writer = csv.writer(output)
-        csv_writer.writerow(["Receipt Number", "Payment Date", "Student Name", "Student ID", "Grade", "Amount", "Payment Method", "Payment Status", "Payment Type", "Notes"])
-        for row in result["data"]:
-            csv_writer.writerow([row["receipt_number"], row["payment_date"], row["student_name"], row["student_id"], row["grade"], row["amount"], row["payment_method"], row["payment_status"], row["payment_type"], row["notes"]])
-        csv_data = output.getvalue()
+        # Rows are streamed from a server-side cursor straight into the response
+        csv_chunks = stream_csv(
+            db.stream(export_query),
+            columns=["receipt_number", "payment_date", "student_name", "student_id", "grade", "amount", "payment_method", "payment_status", "payment_type", "notes"],
+            headers=["Receipt Number", "Payment Date", "Student Name", "Student ID", "Grade", "Amount", "Payment Method", "Payment Status", "Payment Type", "Notes"]
+        )
         
-        return APIResponse(
-            success=True,
-            message="Financial data exported successfully",
-            data={"download_url": "data:application/csv;base64," + csv_data}
+        filename = f"financial_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        return StreamingResponse(
+            csv_chunks,
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
         
     except Exception as e:
@@ -532,6 +537,8 @@ async def create_academic_year(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await cache_service.delete(ACADEMIC_CONTEXT_KEY)
+        
         return APIResponse(
             success=True,
             message="Academic year created successfully",
@@ -589,6 +596,8 @@ async def update_academic_year(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await cache_service.delete(ACADEMIC_CONTEXT_KEY)
+        
         return APIResponse(
             success=True,
             message="Academic year updated successfully",
@@ -631,6 +640,8 @@ async def delete_academic_year(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await cache_service.delete(ACADEMIC_CONTEXT_KEY)
+        
         return APIResponse(
             success=True,
             message="Academic year deleted successfully"
@@ -659,6 +670,8 @@ async def create_academic_term(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await cache_service.delete(ACADEMIC_CONTEXT_KEY)
+        
         return APIResponse(
             success=True,
             message="Academic term created successfully",
@@ -727,6 +740,8 @@ async def update_academic_term(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await cache_service.delete(ACADEMIC_CONTEXT_KEY)
+        
         return APIResponse(
             success=True,
             message="Academic term updated successfully",
@@ -769,6 +784,8 @@ async def delete_academic_term(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await cache_service.delete(ACADEMIC_CONTEXT_KEY)
+        
         return APIResponse(
             success=True,
             message="Academic term deleted successfully"
@@ -797,6 +814,14 @@ async def create_student_fee(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        created_fee = result["data"][0] if result["data"] else {}
+        await event_bus.publish(
+            FEE_UPDATED,
+            action="created",
+            student_fee_ids=[str(created_fee["id"])] if created_fee.get("id") else [],
+            student_ids=[str(student_fee_data.get("student_id"))]
+        )
+        
         return APIResponse(
             success=True,
             message="Student fee created successfully",
@@ -880,6 +905,8 @@ async def update_student_fee(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await event_bus.publish(FEE_UPDATED, action="updated", student_fee_ids=[student_fee_id])
+        
         return APIResponse(
             success=True,
             message="Student fee updated successfully",
@@ -922,6 +949,8 @@ async def delete_student_fee(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await event_bus.publish(FEE_UPDATED, action="deleted", student_fee_ids=[student_fee_id])
+        
         return APIResponse(
             success=True,
             message="Student fee deleted successfully"
@@ -937,6 +966,17 @@ async def verify_admin_api_key(x_api_key: str = Header(...)):
     if x_api_key != ADMIN_API_KEY:
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
+async def _bulk_insert_rows(table: str, rows: List[Dict], row_numbers: List[int], errors: List[str]):
+    """Insert validated CSV rows in bulk, appending per-row errors; returns (successful, failed)"""
+    skipped = len(errors)
+    result = await db.bulk_insert(table, rows)
+    if not result["success"] and not result.get("failed"):
+        errors.extend(f"Row {row_num}: {result.get('error', 'Insert failed')}" for row_num in row_numbers)
+    else:
+        errors.extend(f"Row {row_numbers[failure['index']]}: {failure['error']}" for failure in result["failed"])
+    successful = result.get("inserted", 0)
+    return successful, skipped + len(rows) - successful
+
 @router.post("/student-fees/bulk-import", response_model=APIResponse)
 async def bulk_import_student_fees(
     file: UploadFile = File(...),
@@ -950,9 +990,9 @@ async def bulk_import_student_fees(
         content = await file.read()
         csv_content = content.decode('utf-8')
         csv_reader = csv.DictReader(StringIO(csv_content))
-        successful_imports = 0
-        failed_imports = 0
         errors = []
+        fees = []
+        row_numbers = []
         for row_num, row in enumerate(csv_reader, start=2):
             try:
                 fee_data = {
@@ -963,17 +1003,19 @@ async def bulk_import_student_fees(
                 }
                 if not all([fee_data["student_id"], fee_data["fee_type_id"], fee_data["amount"], fee_data["due_date"]]):
                     errors.append(f"Row {row_num}: Missing required fields")
-                    failed_imports += 1
                     continue
-                result = await db.execute_query("student_fees", "insert", data=fee_data)
-                if result["success"]:
-                    successful_imports += 1
-                else:
-                    errors.append(f"Row {row_num}: {result['error']}")
-                    failed_imports += 1
+                fees.append(fee_data)
+                row_numbers.append(row_num)
             except Exception as e:
                 errors.append(f"Row {row_num}: {str(e)}")
-                failed_imports += 1
+        successful_imports, failed_imports = await _bulk_insert_rows("student_fees", fees, row_numbers, errors)
+        if successful_imports:
+            await event_bus.publish(
+                FEE_UPDATED,
+                action="imported",
+                count=successful_imports,
+                student_ids=sorted({fee["student_id"] for fee in fees})
+            )
         return APIResponse(
             success=True,
             message=f"Import completed: {successful_imports} successful, {failed_imports} failed",
@@ -1001,9 +1043,9 @@ async def bulk_import_payments(
         content = await file.read()
         csv_content = content.decode('utf-8')
         csv_reader = csv.DictReader(StringIO(csv_content))
-        successful_imports = 0
-        failed_imports = 0
         errors = []
+        payments = []
+        row_numbers = []
         for row_num, row in enumerate(csv_reader, start=2):
             try:
                 payment_data = {
@@ -1015,17 +1057,19 @@ async def bulk_import_payments(
                 }
                 if not all([payment_data["student_id"], payment_data["amount"], payment_data["payment_method"], payment_data["payment_date"], payment_data["receipt_number"]]):
                     errors.append(f"Row {row_num}: Missing required fields")
-                    failed_imports += 1
                     continue
-                result = await db.execute_query("payments", "insert", data=payment_data)
-                if result["success"]:
-                    successful_imports += 1
-                else:
-                    errors.append(f"Row {row_num}: {result['error']}")
-                    failed_imports += 1
+                payments.append(payment_data)
+                row_numbers.append(row_num)
             except Exception as e:
                 errors.append(f"Row {row_num}: {str(e)}")
-                failed_imports += 1
+        successful_imports, failed_imports = await _bulk_insert_rows("payments", payments, row_numbers, errors)
+        if successful_imports:
+            await event_bus.publish(
+                PAYMENT_CREATED,
+                imported=True,
+                count=successful_imports,
+                student_ids=sorted({payment["student_id"] for payment in payments})
+            )
         return APIResponse(
             success=True,
             message=f"Import completed: {successful_imports} successful, {failed_imports} failed",
@@ -0,0 +1,179 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+import logging
+
+from ..models import APIResponse
+from ..database import db
+from ..services.materialized_view_service import materialized_view_service
+from ..services.cache_service import cache_service
+from ..services.event_bus import event_bus
+from .auth import get_current_user
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/query-stats", response_model=APIResponse)
+async def get_query_stats(
+    limit: int = Query(20, ge=1, le=200),
+    sort_by: str = Query("total_time"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get per-fingerprint query statistics (admin only)"""
+    try:
+        if current_user["role"] not in ["admin", "super_admin"]:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        try:
+            stats = await db.get_query_stats(limit=limit, sort_by=sort_by)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return APIResponse(
+            success=True,
+            message="Query statistics retrieved successfully",
+            data=stats
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get query stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/query-stats/reset", response_model=APIResponse)
+async def reset_query_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Reset query statistics (admin only)"""
+    try:
+        if current_user["role"] not in ["admin", "super_admin"]:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        db.query_stats.reset()
+        
+        return APIResponse(
+            success=True,
+            message="Query statistics reset successfully"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to reset query stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/slow-query-plans", response_model=APIResponse)
+async def get_slow_query_plans(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the latest captured plan of each slow query fingerprint (admin only)"""
+    try:
+        if current_user["role"] not in ["admin", "super_admin"]:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        return APIResponse(
+            success=True,
+            message="Slow query plans retrieved successfully",
+            data={"plans": db.query_plans.summary()}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get slow query plans: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/slow-query-plans/detail", response_model=APIResponse)
+async def get_slow_query_plan_history(
+    fingerprint: str = Query(...),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get every retained plan of one fingerprint with diffs to the previous plan (admin only)"""
+    try:
+        if current_user["role"] not in ["admin", "super_admin"]:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        history = db.query_plans.get(fingerprint)
+        if history is None:
+            raise HTTPException(status_code=404, detail="No plans captured for this fingerprint")
+        
+        return APIResponse(
+            success=True,
+            message="Slow query plan history retrieved successfully",
+            data=history
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get slow query plan history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache", response_model=APIResponse)
+async def get_cache_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get in-process cache tier and domain event subscription statistics (admin only)"""
+    try:
+        if current_user["role"] not in ["admin", "super_admin"]:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        return APIResponse(
+            success=True,
+            message="Cache statistics retrieved successfully",
+            data={**cache_service.get_stats(), "events": event_bus.stats()}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/materialized-views", response_model=APIResponse)
+async def get_materialized_views(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get refresh state of the managed materialized views (admin only)"""
+    try:
+        if current_user["role"] not in ["admin", "super_admin"]:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        return APIResponse(
+            success=True,
+            message="Materialized views retrieved successfully",
+            data=materialized_view_service.get_status()
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get materialized views: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/materialized-views/{name}/refresh", response_model=APIResponse)
+async def refresh_materialized_view(
+    name: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Refresh a materialized view now (admin only)"""
+    try:
+        if current_user["role"] not in ["admin", "super_admin"]:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        if name not in materialized_view_service.views:
+            raise HTTPException(status_code=404, detail="Materialized view not found")
+        
+        result = await materialized_view_service.refresh(name, force=True)
+        if not result["success"]:
+            raise HTTPException(status_code=500, detail=result["error"])
+        
+        return APIResponse(
+            success=True,
+            message=f"Materialized view {name} refreshed successfully"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to refresh materialized view: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -245,6 +245,18 @@ async def delete_parent(parent_id: str, current_user: dict = Depends(get_current
             detail=str(e)
         )
 
+def _normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Compare phone numbers by digits, keeping a leading +"""
+    if not phone:
+        return None
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    if not digits:
+        return None
+    return "+" + digits if phone.strip().startswith("+") else digits
+
+def _normalize_email(email: Optional[str]) -> Optional[str]:
+    return email.strip().lower() if email else None
+
 @router.post("/bulk-import", response_model=APIResponse)
 async def bulk_import_parents(
     file: UploadFile = File(...),
@@ -258,9 +270,8 @@ async def bulk_import_parents(
         content = await file.read()
         csv_content = content.decode('utf-8')
         csv_reader = csv.DictReader(StringIO(csv_content))
-        successful_imports = 0
-        failed_imports = 0
         errors = []
+        candidates = []
         for row_num, row in enumerate(csv_reader, start=2):
             try:
                 parent_data = {
@@ -273,28 +284,58 @@ async def bulk_import_parents(
                 }
                 if not all([parent_data["first_name"], parent_data["last_name"], parent_data["relationship"]]) or (not parent_data["phone"] and not parent_data["email"]):
                     errors.append(f"Row {row_num}: Missing required fields")
-                    failed_imports += 1
-                    continue
-                # Check if parent already exists (by phone or email)
-                filters = {}
-                if parent_data["phone"]:
-                    filters["phone"] = parent_data["phone"]
-                if parent_data["email"]:
-                    filters["email"] = parent_data["email"]
-                existing = await db.execute_query("parents", "select", filters=filters, select_fields="id")
-                if existing["success"] and existing["data"]:
-                    errors.append(f"Row {row_num}: Parent already exists")
-                    failed_imports += 1
                     continue
-                result = await db.execute_query("parents", "insert", data=parent_data)
-                if result["success"]:
-                    successful_imports += 1
-                else:
-                    errors.append(f"Row {row_num}: {result['error']}")
-                    failed_imports += 1
+                candidates.append((row_num, parent_data))
             except Exception as e:
                 errors.append(f"Row {row_num}: {str(e)}")
-                failed_imports += 1
+        
+        # Check which parents already exist (by phone and email) with one lookup per column
+        existing_parents = []
+        for column in ("phone", "email"):
+            values = list({data[column] for _, data in candidates if data[column]})
+            if values:
+                existing = await db.execute_query(
+                    "parents", "select", filters={f"{column}__in": values}, select_fields="id, phone, email"
+                )
+                if existing["success"]:
+                    existing_parents.extend(existing["data"])
+        # Known contacts keyed by normalized phone, email and the pair, so each row is an O(1) lookup
+        known_phones, known_emails, known_pairs = set(), set(), set()
+        
+        def remember(data):
+            phone, email = _normalize_phone(data["phone"]), _normalize_email(data["email"])
+            if phone:
+                known_phones.add(phone)
+            if email:
+                known_emails.add(email)
+            known_pairs.add((phone, email))
+        
+        def already_exists(data):
+            phone, email = _normalize_phone(data["phone"]), _normalize_email(data["email"])
+            if phone and email:
+                return (phone, email) in known_pairs
+            return phone in known_phones if phone else email in known_emails
+        
+        for parent in existing_parents:
+            remember(parent)
+        
+        parents = []
+        row_numbers = []
+        for row_num, parent_data in candidates:
+            if already_exists(parent_data):
+                errors.append(f"Row {row_num}: Parent already exists")
+                continue
+            remember(parent_data)
+            parents.append(parent_data)
+            row_numbers.append(row_num)
+        
+        result = await db.bulk_insert("parents", parents)
+        if not result["success"] and not result.get("failed"):
+            errors.extend(f"Row {row_num}: {result.get('error', 'Insert failed')}" for row_num in row_numbers)
+        else:
+            errors.extend(f"Row {row_numbers[failure['index']]}: {failure['error']}" for failure in result["failed"])
+        successful_imports = result.get("inserted", 0)
+        failed_imports = len(errors)
         return APIResponse(
             success=True,
             message=f"Import completed: {successful_imports} successful, {failed_imports} failed",
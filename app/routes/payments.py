@@ -5,20 +5,23 @@ import uuid
 from datetime import datetime, date
 import logging
 
+from ..config import settings
 from ..models import (
     Payment, PaymentCreate, PaymentPlan, PaymentPlanCreate,
     PaymentReceipt, APIResponse, PaginatedResponse, PaymentStatus
 )
-from ..database import db
+from ..database import db, encode_cursor, decode_cursor
 from ..services.receipt_service import receipt_service
 from ..services.notification_service import notification_service
 from ..services.analytics_service import analytics_service
+from ..services.event_bus import event_bus, PAYMENT_CREATED, PAYMENT_UPDATED
+from ..utils.deadlines import query_deadline
 from .auth import get_current_user
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/payments", tags=["payments"])
 
-@router.post("/", response_model=APIResponse)
+@router.post("/", response_model=APIResponse, dependencies=[Depends(query_deadline(settings.query_deadline_fast))])
 async def create_payment(
     payment: PaymentCreate,
     allocations: Optional[List[dict]] = None,
@@ -39,59 +42,74 @@ async def create_payment(
         
         student = student_result["data"][0]
         
-        # Generate receipt number
-        receipt_number = await generate_receipt_number()
-        
-        # Create payment record
         payment_data = payment.dict()
-        payment_data["receipt_number"] = receipt_number
         payment_data["payment_date"] = datetime.utcnow()
         payment_data["payment_status"] = PaymentStatus.completed.value
         
-        payment_result = await db.execute_query("payments", "insert", data=payment_data)
-        
-        if not payment_result["success"]:
-            raise HTTPException(status_code=500, detail=payment_result["error"])
-        
-        created_payment = payment_result["data"][0]
-        payment_id = created_payment["id"]
-        
-        # Handle fee allocations
-        total_allocated = 0
-        if allocations:
-            for allocation in allocations:
-                allocation_data = {
-                    "payment_id": payment_id,
-                    "student_fee_id": allocation["student_fee_id"],
-                    "amount": allocation["amount"]
-                }
+        # Payment, allocations and fee status are written atomically with a
+        # fixed number of round-trips however many allocations there are
+        async with db.transaction():
+            # Serialize receipt numbering so concurrent cashiers cannot draw the same number
+            await db.execute_raw_query("SELECT pg_advisory_xact_lock(hashtext('payments.receipt_number'))")
+            
+            # Generate receipt number
+            receipt_number = await generate_receipt_number()
+            payment_data["receipt_number"] = receipt_number
+            
+            # Create payment record
+            payment_result = await db.execute_query("payments", "insert", data=payment_data)
+            
+            if not payment_result["success"]:
+                raise HTTPException(status_code=500, detail=payment_result["error"])
+            
+            created_payment = payment_result["data"][0]
+            payment_id = created_payment["id"]
+            
+            # Handle fee allocations
+            if allocations:
+                allocation_result = await db.execute_query(
+                    "payment_allocations",
+                    "insert",
+                    data=[
+                        {
+                            "payment_id": payment_id,
+                            "student_fee_id": allocation["student_fee_id"],
+                            "amount": allocation["amount"]
+                        }
+                        for allocation in allocations
+                    ]
+                )
+                
+                if not allocation_result["success"]:
+                    raise HTTPException(status_code=500, detail=allocation_result["error"])
                 
-                # Create allocation
-                allocation_result = await db.execute_query("payment_allocations", "insert", data=allocation_data)
+                # Mark every allocated fee that is now fully covered as paid
+                fee_result = await db.execute_raw_query("""
+                    UPDATE student_fees sf
+                    SET is_paid = true
+                    FROM (
+                        SELECT student_fee_id, SUM(amount) as total_paid
+                        FROM payment_allocations
+                        WHERE student_fee_id = ANY($1)
+                        GROUP BY student_fee_id
+                    ) paid
+                    WHERE sf.id = paid.student_fee_id
+                    AND paid.total_paid >= sf.amount
+                """, [[allocation["student_fee_id"] for allocation in allocations]])
                 
-                if allocation_result["success"]:
-                    total_allocated += float(allocation["amount"])
-                    
-                    # Update student fee paid status if fully paid
-                    fee_check = await db.execute_raw_query("""
-                        SELECT 
-                            sf.amount,
-                            COALESCE(SUM(pa.amount), 0) as total_paid
-                        FROM student_fees sf
-                        LEFT JOIN payment_allocations pa ON sf.id = pa.student_fee_id
-                        WHERE sf.id = $1
-                        GROUP BY sf.amount
-                    """, [allocation["student_fee_id"]])
-                    
-                    if fee_check["success"] and fee_check["data"]:
-                        fee_data = fee_check["data"][0]
-                        if float(fee_data["total_paid"]) >= float(fee_data["amount"]):
-                            await db.execute_query(
-                                "student_fees",
-                                "update",
-                                data={"is_paid": True},
-                                filters={"id": allocation["student_fee_id"]}
-                            )
+                if not fee_result["success"]:
+                    raise HTTPException(status_code=500, detail=fee_result["error"])
+        
+        await event_bus.publish(
+            PAYMENT_CREATED,
+            payment_id=str(payment_id),
+            student_id=str(payment.student_id),
+            student_name=f"{student['first_name']} {student['last_name']}",
+            receipt_number=receipt_number,
+            amount=float(payment.amount),
+            payment_method=payment.payment_method.value,
+            student_fee_ids=[str(allocation["student_fee_id"]) for allocation in allocations or []]
+        )
         
         # Generate and send receipt
         try:
@@ -146,7 +164,7 @@ async def create_payment(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=PaginatedResponse)
+@router.get("/", response_model=PaginatedResponse, dependencies=[Depends(query_deadline(settings.query_deadline_fast))])
 async def get_payments(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
@@ -155,51 +173,24 @@ async def get_payments(
     payment_method: Optional[str] = Query(None),
     date_from: Optional[str] = Query(None),
     date_to: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides page"),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get paginated list of payments with filters"""
+    """Get paginated list of payments with filters.
+
+    Results are ordered by (payment_date, id) descending. Every full page
+    returns ``next_cursor``; passing it back seeks straight to the next page
+    instead of scanning past ``(page - 1) * per_page`` rows.
+    """
     try:
-        # Build complex query with joins using materialized view
-        payment_view_query = """
-            CREATE MATERIALIZED VIEW IF NOT EXISTS payment_details AS
-            SELECT 
-                p.*,
-                s.student_id as student_number,
-                s.first_name || ' ' || s.last_name as student_name,
-                s.grade,
-                pr.receipt_number as receipt_issued,
-                pr.file_url as receipt_url,
-                COALESCE(
-                    json_agg(
-                        json_build_object(
-                            'fee_type_name', ft.name,
-                            'fee_type', ft.fee_type,
-                            'allocated_amount', pa.amount
-                        )
-                    ) FILTER (WHERE pa.id IS NOT NULL), 
-                    '[]'
-                ) as fee_allocations
-            FROM payments p
-            JOIN students s ON p.student_id = s.id
-            LEFT JOIN payment_receipts pr ON p.id = pr.payment_id
-            LEFT JOIN payment_allocations pa ON p.id = pa.payment_id
-            LEFT JOIN student_fees sf ON pa.student_fee_id = sf.id
-            LEFT JOIN fee_types ft ON sf.fee_type_id = ft.id
-            GROUP BY p.id, s.student_id, s.first_name, s.last_name, s.grade, pr.receipt_number, pr.file_url
-            WITH DATA;
-        """
-        
-        # Create index on materialized view
-        payment_view_index = """
-            CREATE UNIQUE INDEX IF NOT EXISTS idx_payment_details_id ON payment_details(id);
-            CREATE INDEX IF NOT EXISTS idx_payment_details_date ON payment_details(payment_date);
-            CREATE INDEX IF NOT EXISTS idx_payment_details_status ON payment_details(payment_status);
-        """
-        
-        # Execute view creation
-        await db.execute_raw_query(payment_view_query)
-        await db.execute_raw_query(payment_view_index)
-        
+        cursor_values = None
+        if cursor:
+            try:
+                cursor_values = decode_cursor(cursor, 2)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        # payment_details is created and kept fresh by the materialized view service
         # Build where conditions
         where_conditions = []
         params = []
@@ -232,15 +223,28 @@ async def get_payments(
         
         where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
         
+        # Keyset pagination: seek past the last (payment_date, id) of the previous page
+        page_conditions = list(where_conditions)
+        page_params = list(params)
+        if cursor_values:
+            page_params.extend(cursor_values)
+            page_conditions.append(f"(payment_date, id) < (${len(page_params) - 1}, ${len(page_params)})")
+        page_params.append(per_page)
+        pagination = f"LIMIT ${len(page_params)}"
+        if not cursor_values:
+            page_params.append((page - 1) * per_page)
+            pagination += f" OFFSET ${len(page_params)}"
+        page_where_clause = "WHERE " + " AND ".join(page_conditions) if page_conditions else ""
+        
         # Query using materialized view
         query = f"""
             SELECT * FROM payment_details
-            {where_clause}
-            ORDER BY payment_date DESC
-            LIMIT {per_page} OFFSET {(page - 1) * per_page}
+            {page_where_clause}
+            ORDER BY payment_date DESC, id DESC
+            {pagination}
         """
         
-        result = await db.execute_raw_query(query, params)
+        result = await db.execute_raw_query(query, page_params)
         
         # Get total count using materialized view
         count_query = f"""
@@ -256,19 +260,27 @@ async def get_payments(
         
         total_pages = (total + per_page - 1) // per_page
         
+        next_cursor = None
+        if len(result["data"]) == per_page:
+            last_row = result["data"][-1]
+            next_cursor = encode_cursor([last_row["payment_date"], last_row["id"]])
+        
         return PaginatedResponse(
             success=True,
             data=result["data"],
             total=total,
             page=page,
             per_page=per_page,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{payment_id}", response_model=APIResponse)
+@router.get("/{payment_id}", response_model=APIResponse, dependencies=[Depends(query_deadline(settings.query_deadline_fast))])
 async def get_payment(
     payment_id: str,
     current_user: dict = Depends(get_current_user)
@@ -364,6 +376,14 @@ async def update_payment_status(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await event_bus.publish(
+            PAYMENT_UPDATED,
+            payment_id=payment_id,
+            receipt_number=existing["data"][0]["receipt_number"],
+            old_status=existing["data"][0]["payment_status"],
+            new_status=status.value
+        )
+        
         # Log status change
         await analytics_service.log_activity(
             "payment_status_updated",
@@ -498,7 +518,7 @@ async def send_payment_receipt(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/summary/financial", response_model=APIResponse)
+@router.get("/summary/financial", response_model=APIResponse, dependencies=[Depends(query_deadline(settings.query_deadline_report))])
 async def get_payments_summary(
     date_from: Optional[str] = Query(None),
     date_to: Optional[str] = Query(None),
@@ -533,11 +553,6 @@ async def get_payments_summary(
             WHERE 1=1 {date_filter}
         """
         
-        result = await db.execute_raw_query(summary_query, params)
-        
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result["error"])
-        
         # Get payment methods breakdown
         methods_query = f"""
             SELECT 
@@ -550,7 +565,13 @@ async def get_payments_summary(
             ORDER BY total_amount DESC
         """
         
-        methods_result = await db.execute_raw_query(methods_query, params)
+        result, methods_result = await db.fan_out(
+            db.execute_raw_query(summary_query, params),
+            db.execute_raw_query(methods_query, params)
+        )
+        
+        if not result["success"]:
+            raise HTTPException(status_code=500, detail=result["error"])
         
         summary_data = result["data"][0] if result["data"] else {}
         summary_data["payment_methods_breakdown"] = methods_result["data"] if methods_result["success"] else []
@@ -601,15 +622,17 @@ async def create_payment_plan(
         # Create installments
         installment_amount = plan.total_amount / plan.number_of_installments
         
-        for i in range(plan.number_of_installments):
-            installment_data = {
+        installments = [
+            {
                 "payment_plan_id": plan_id,
                 "installment_number": i + 1,
                 "amount": installment_amount,
                 "due_date": datetime.utcnow().date()  # You might want to calculate proper due dates
             }
-            
-            await db.execute_query("payment_plan_installments", "insert", data=installment_data)
+            for i in range(plan.number_of_installments)
+        ]
+        
+        await db.bulk_insert("payment_plan_installments", installments)
         
         return APIResponse(
             success=True,
@@ -6,12 +6,19 @@ import csv
 import io
 import logging
 
+from ..config import settings
 from ..models import ReportRequest, ReportResponse, APIResponse
 from ..database import db
+from ..utils.deadlines import query_deadline
+from ..utils.route_cache import cached_route
 from .auth import get_current_user
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/reports", tags=["reports"])
+router = APIRouter(
+    prefix="/reports",
+    tags=["reports"],
+    dependencies=[Depends(query_deadline(settings.query_deadline_report))]
+)
 
 @router.get("/financial")
 async def get_financial_report(
@@ -344,6 +351,7 @@ async def get_outstanding_fees_report(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/summary")
+@cached_route(ttl=600, tags=["payments", "students", "student_fees"])
 async def get_reports_summary(current_user: dict = Depends(get_current_user)):
     """Get summary statistics for reports dashboard"""
     try:
@@ -408,8 +416,6 @@ async def get_reports_overview(
             WHERE payment_status = 'completed' {date_filter}
         """
         
-        collections_result = await db.execute_raw_query(collections_query)
-        
         # Get outstanding balance
         outstanding_query = f"""
             SELECT 
@@ -418,15 +424,17 @@ async def get_reports_overview(
             WHERE sf.is_paid = false
         """
         
-        outstanding_result = await db.execute_raw_query(outstanding_query)
-        
         # Calculate collection rate
         total_expected_query = f"""
             SELECT COALESCE(SUM(amount), 0) as total_expected
             FROM student_fees
         """
         
-        expected_result = await db.execute_raw_query(total_expected_query)
+        collections_result, outstanding_result, expected_result = await db.fan_out(
+            db.execute_raw_query(collections_query),
+            db.execute_raw_query(outstanding_query),
+            db.execute_raw_query(total_expected_query)
+        )
         
         collections_data = collections_result["data"][0] if collections_result["success"] and collections_result["data"] else {}
         outstanding_data = outstanding_result["data"][0] if outstanding_result["success"] and outstanding_result["data"] else {}
@@ -4,27 +4,52 @@ import uuid
 import csv
 from io import StringIO
 
-from ..database import db
+from ..config import settings
+from ..database import db, encode_cursor, decode_cursor
 from ..models import (
     Student, StudentCreate, StudentUpdate, APIResponse, PaginatedResponse
 )
 from ..services.analytics_service import analytics_service
+from ..services.cache_service import cache_service, ACADEMIC_CONTEXT_KEY
+from ..services.event_bus import event_bus, STUDENT_CHANGED
+from ..utils.deadlines import query_deadline
 from ..auth import get_current_user
 
 router = APIRouter(prefix="/students", tags=["students"])
 
-@router.get("/", response_model=PaginatedResponse)
+async def _get_academic_context() -> dict:
+    """Current academic year and term, served from the cache between changes"""
+    context = await cache_service.get(ACADEMIC_CONTEXT_KEY)
+    if context is None:
+        context = await db.get_current_academic_context()
+        if context["success"]:
+            await cache_service.set(ACADEMIC_CONTEXT_KEY, context, ttl=3600)
+    return context
+
+@router.get("/", response_model=PaginatedResponse, dependencies=[Depends(query_deadline(settings.query_deadline_fast))])
 async def get_students(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
     search: Optional[str] = Query(None),
     grade: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides page"),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get paginated list of students with search and filters"""
+    """Get paginated list of students with search and filters.
+
+    Results are ordered by (created_at, id) descending. Every full page
+    returns ``next_cursor``; passing it back seeks straight to the next page
+    instead of scanning past ``(page - 1) * per_page`` rows.
+    """
     try:
         filters = {}
+        cursor_values = None
+        if cursor:
+            try:
+                cursor_values = decode_cursor(cursor, 2)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
         # Add filters based on query parameters
         if grade:
@@ -33,76 +58,74 @@ async def get_students(
             filters["status"] = status
         if search:
             # Optimized search query with parameterized values
-            search_query = """
-                WITH student_data AS (
-                    SELECT 
-                        s.*,
-                        psl.relationship,
-                        p.first_name as parent_first_name,
-                        p.last_name as parent_last_name,
-                        p.phone as parent_phone
-                    FROM students s
-                    LEFT JOIN parent_student_links psl ON s.id = psl.student_id AND psl.is_primary_contact = true
-                    LEFT JOIN parents p ON psl.parent_id = p.id
-                    WHERE (
-                        s.first_name ILIKE $1 
-                        OR s.last_name ILIKE $1 
-                        OR s.student_id ILIKE $1
-                    )
-                    {grade_filter}
-                    {status_filter}
-                )
-                SELECT * FROM student_data
-                ORDER BY created_at DESC
-                LIMIT $2 OFFSET $3
-            """.format(
-                grade_filter=f"AND s.grade = ${param_count + 1}" if grade else "",
-                status_filter=f"AND s.status = ${param_count + 2}" if status else ""
-            )
-            
-            # Prepare parameters
-            search_param = f"%{search}%"
-            params = [search_param]
+            params = [f"%{search}%"]
+            conditions = ["(s.first_name ILIKE $1 OR s.last_name ILIKE $1 OR s.student_id ILIKE $1)"]
             if grade:
                 params.append(grade)
+                conditions.append(f"s.grade = ${len(params)}")
             if status:
                 params.append(status)
-            params.extend([per_page, (page - 1) * per_page])
+                conditions.append(f"s.status = ${len(params)}")
+            filter_params = list(params)
+            where_clause = " AND ".join(conditions)
+            
+            if cursor:
+                params.extend(cursor_values)
+                where_clause += f" AND (s.created_at, s.id) < (${len(params) - 1}, ${len(params)})"
+            
+            params.append(per_page)
+            pagination = f"LIMIT ${len(params)}"
+            if not cursor:
+                params.append((page - 1) * per_page)
+                pagination += f" OFFSET ${len(params)}"
+            
+            search_query = f"""
+                SELECT 
+                    s.*,
+                    psl.relationship,
+                    p.first_name as parent_first_name,
+                    p.last_name as parent_last_name,
+                    p.phone as parent_phone
+                FROM students s
+                LEFT JOIN parent_student_links psl ON s.id = psl.student_id AND psl.is_primary_contact = true
+                LEFT JOIN parents p ON psl.parent_id = p.id
+                WHERE {where_clause}
+                ORDER BY s.created_at DESC, s.id DESC
+                {pagination}
+            """
             
             result = await db.execute_raw_query(search_query, params)
             
             # Optimized count query
-            count_query = """
+            count_query = f"""
                 SELECT COUNT(*)
                 FROM students s
-                WHERE (
-                    s.first_name ILIKE $1 
-                    OR s.last_name ILIKE $1 
-                    OR s.student_id ILIKE $1
-                )
-                {grade_filter}
-                {status_filter}
-            """.format(
-                grade_filter=f"AND s.grade = ${param_count + 1}" if grade else "",
-                status_filter=f"AND s.status = ${param_count + 2}" if status else ""
-            )
+                WHERE {" AND ".join(conditions)}
+            """
             
-            count_result = await db.execute_raw_query(count_query, params[:-2])  # Exclude pagination params
+            count_result = await db.execute_raw_query(count_query, filter_params)
             total = count_result["data"][0]["count"] if count_result["success"] and count_result["data"] else 0
+            
+            next_cursor = None
+            if result["success"] and len(result["data"]) == per_page:
+                last_row = result["data"][-1]
+                next_cursor = encode_cursor([last_row["created_at"], last_row["id"]])
         else:
-            # Simple query without complex joins for testing
             result = await db.execute_query(
                 "students",
                 "select",
                 filters=filters,
                 select_fields="*",
                 limit=per_page,
-                offset=(page - 1) * per_page
+                offset=None if cursor else (page - 1) * per_page,
+                order_by="created_at desc, id desc",
+                cursor=cursor,
+                keyset=True,
+                with_total=True,
+                cache_ttl=settings.count_cache_ttl
             )
-            
-            # Get total count
-            count_result = await db.execute_query("students", "select", filters=filters, select_fields="*")
-            total = len(count_result["data"]) if count_result["success"] else 0
+            next_cursor = result.get("next_cursor")
+            total = result.get("total", 0)
         
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
@@ -115,13 +138,16 @@ async def get_students(
             total=total,
             page=page,
             per_page=per_page,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{student_id}", response_model=APIResponse)
+@router.get("/{student_id}", response_model=APIResponse, dependencies=[Depends(query_deadline(settings.query_deadline_fast))])
 async def get_student(
     student_id: str,
     current_user: dict = Depends(get_current_user)
@@ -152,7 +178,7 @@ async def get_student(
         student = result["data"][0]
         
         # Get academic context
-        academic_context = await db.get_current_academic_context()
+        academic_context = await _get_academic_context()
         
         # Get student fees for current academic year
         if academic_context["success"] and academic_context["data"]["academic_year"]:
@@ -219,6 +245,14 @@ async def create_student(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        created_student = result["data"][0] if result["data"] else {}
+        await event_bus.publish(
+            STUDENT_CHANGED,
+            action="created",
+            student_ids=[str(created_student["id"])] if created_student.get("id") else [],
+            student_name=f"{student.first_name} {student.last_name}"
+        )
+        
         # Log the action
         await analytics_service.log_activity(
             "student_created",
@@ -272,6 +306,13 @@ async def update_student(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await event_bus.publish(
+            STUDENT_CHANGED,
+            action="updated",
+            student_ids=[student_id],
+            student_name=f"{existing['data'][0]['first_name']} {existing['data'][0]['last_name']}"
+        )
+        
         # Log the action
         await analytics_service.log_activity(
             "student_updated",
@@ -334,6 +375,13 @@ async def delete_student(
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        await event_bus.publish(
+            STUDENT_CHANGED,
+            action="deactivated",
+            student_ids=[student_id],
+            student_name=f"{existing['data'][0]['first_name']} {existing['data'][0]['last_name']}"
+        )
+        
         # Log the action
         await analytics_service.log_activity(
             "student_deleted",
@@ -366,7 +414,7 @@ async def get_student_fees(
             filters["academic_year_id"] = academic_year_id
         else:
             # Get current academic year
-            academic_context = await db.get_current_academic_context()
+            academic_context = await _get_academic_context()
             if academic_context["success"] and academic_context["data"]["academic_year"]:
                 filters["academic_year_id"] = academic_context["data"]["academic_year"]["id"]
         
@@ -450,9 +498,8 @@ async def bulk_import_students(
         csv_content = content.decode('utf-8')
         csv_reader = csv.DictReader(StringIO(csv_content))
         
-        successful_imports = 0
-        failed_imports = 0
         errors = []
+        candidates = []
         
         for row_num, row in enumerate(csv_reader, start=2):
             try:
@@ -473,34 +520,39 @@ async def bulk_import_students(
                 if not all([student_data["student_id"], student_data["first_name"], 
                            student_data["last_name"], student_data["grade"]]):
                     errors.append(f"Row {row_num}: Missing required fields")
-                    failed_imports += 1
                     continue
                 
-                # Check if student already exists
-                existing = await db.execute_query(
-                    "students",
-                    "select",
-                    filters={"student_id": student_data["student_id"]},
-                    select_fields="id"
-                )
-                
-                if existing["success"] and existing["data"]:
-                    errors.append(f"Row {row_num}: Student ID {student_data['student_id']} already exists")
-                    failed_imports += 1
-                    continue
-                
-                # Create student
-                result = await db.execute_query("students", "insert", data=student_data)
-                
-                if result["success"]:
-                    successful_imports += 1
-                else:
-                    errors.append(f"Row {row_num}: {result['error']}")
-                    failed_imports += 1
+                candidates.append((row_num, student_data))
                     
             except Exception as e:
                 errors.append(f"Row {row_num}: {str(e)}")
-                failed_imports += 1
+        
+        # Check which students already exist with one batched lookup
+        existing = await db.loader("students", key="student_id", select_fields="id").load_many(
+            [student_data["student_id"] for _, student_data in candidates]
+        )
+        
+        students = []
+        row_numbers = []
+        seen_ids = set()
+        for (row_num, student_data), existing_student in zip(candidates, existing):
+            if existing_student or student_data["student_id"] in seen_ids:
+                errors.append(f"Row {row_num}: Student ID {student_data['student_id']} already exists")
+                continue
+            seen_ids.add(student_data["student_id"])
+            students.append(student_data)
+            row_numbers.append(row_num)
+        
+        # Create students
+        result = await db.bulk_insert("students", students)
+        if not result["success"] and not result.get("failed"):
+            errors.extend(f"Row {row_num}: {result.get('error', 'Insert failed')}" for row_num in row_numbers)
+        else:
+            errors.extend(f"Row {row_numbers[failure['index']]}: {failure['error']}" for failure in result["failed"])
+        successful_imports = result.get("inserted", 0)
+        failed_imports = len(errors)
+        if successful_imports:
+            await event_bus.publish(STUDENT_CHANGED, action="imported", count=successful_imports)
         
         return APIResponse(
             success=True,
@@ -562,7 +614,7 @@ async def get_students_overview(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/student-lookup", response_model=APIResponse)
+@router.post("/student-lookup", response_model=APIResponse, dependencies=[Depends(query_deadline(settings.query_deadline_fast))])
 async def student_lookup(
     payload: dict = Body(..., example={
         "student_id": "STU12345",
@@ -16,6 +16,7 @@ import json
 from ..config import settings
 from ..database import db
 from .cache_service import cache_service
+from .analytics_service import ANALYTICS_TAG
 
 logger = logging.getLogger(__name__)
 
@@ -33,20 +34,19 @@ class AdvancedAnalyticsService:
 
     async def get_financial_forecast(self, days_ahead: int = 30) -> Dict:
         """Forecast revenue for the next N days using linear regression"""
-        cache_key = f"financial_forecast_{days_ahead}"
-        cached = await cache_service.get(cache_key)
-        if cached:
-            return {"success": True, "forecast": cached, "cached": True}
-        try:
-            # Fetch payment data
-            result = await db.execute_query(
+        computed = False
+        
+        async def compute():
+            nonlocal computed
+            computed = True
+            # Fetch payment data as columns; the DataFrame wraps the arrays without per-row dicts
+            result = await db.fetch_columns(
                 "payments",
-                "select",
-                select_fields=["payment_date", "amount"],
+                {"payment_date": "datetime64", "amount": "float64"},
                 order_by="payment_date ASC"
             )
-            if not result["success"] or not result["data"]:
-                return {"success": False, "error": "No payment data available"}
+            if not result["success"] or not result["count"]:
+                return None
             df = pd.DataFrame(result["data"])
             df["payment_date"] = pd.to_datetime(df["payment_date"])
             df = df.groupby(df["payment_date"].dt.date)["amount"].sum().reset_index()
@@ -59,28 +59,33 @@ class AdvancedAnalyticsService:
             forecast_dates = [last_date + timedelta(days=i) for i in range(1, days_ahead + 1)]
             forecast_ordinals = np.array([d.toordinal() for d in forecast_dates]).reshape(-1, 1)
             forecast_amounts = model.predict(forecast_ordinals)
-            forecast = [{"date": str(d), "predicted_amount": float(a)} for d, a in zip(forecast_dates, forecast_amounts)]
-            await cache_service.set(cache_key, forecast, self.cache_ttl)
-            return {"success": True, "forecast": forecast, "cached": False}
+            return [{"date": str(d), "predicted_amount": float(a)} for d, a in zip(forecast_dates, forecast_amounts)]
+        
+        try:
+            forecast = await cache_service.get_or_set(
+                f"financial_forecast_{days_ahead}", compute, self.cache_ttl, tags=[ANALYTICS_TAG, "payments"]
+            )
+            if forecast is None:
+                return {"success": False, "error": "No payment data available"}
+            return {"success": True, "forecast": forecast, "cached": not computed}
         except Exception as e:
             logger.error(f"Failed to generate financial forecast: {e}")
             return {"success": False, "error": str(e)}
 
     async def get_payment_trends(self, months: int = 6) -> Dict:
         """Analyze payment trends for the last N months"""
-        cache_key = f"payment_trends_{months}"
-        cached = await cache_service.get(cache_key)
-        if cached:
-            return {"success": True, "trends": cached, "cached": True}
-        try:
-            result = await db.execute_query(
+        computed = False
+        
+        async def compute():
+            nonlocal computed
+            computed = True
+            result = await db.fetch_columns(
                 "payments",
-                "select",
-                select_fields=["payment_date", "amount"],
+                {"payment_date": "datetime64", "amount": "float64"},
                 order_by="payment_date ASC"
             )
-            if not result["success"] or not result["data"]:
-                return {"success": False, "error": "No payment data available"}
+            if not result["success"] or not result["count"]:
+                return None
             df = pd.DataFrame(result["data"])
             df["payment_date"] = pd.to_datetime(df["payment_date"])
             cutoff = datetime.now() - timedelta(days=months * 30)
@@ -88,20 +93,26 @@ class AdvancedAnalyticsService:
             df["month"] = df["payment_date"].dt.to_period("M")
             trends = df.groupby("month")["amount"].sum().reset_index()
             trends["month"] = trends["month"].astype(str)
-            trends_list = trends.to_dict(orient="records")
-            await cache_service.set(cache_key, trends_list, self.cache_ttl)
-            return {"success": True, "trends": trends_list, "cached": False}
+            return trends.to_dict(orient="records")
+        
+        try:
+            trends_list = await cache_service.get_or_set(
+                f"payment_trends_{months}", compute, self.cache_ttl, tags=[ANALYTICS_TAG, "payments"]
+            )
+            if trends_list is None:
+                return {"success": False, "error": "No payment data available"}
+            return {"success": True, "trends": trends_list, "cached": not computed}
         except Exception as e:
             logger.error(f"Failed to analyze payment trends: {e}")
             return {"success": False, "error": str(e)}
 
     async def get_student_performance_analytics(self, grade: Optional[str] = None) -> Dict:
         """Analyze student performance (dummy implementation, extend as needed)"""
-        cache_key = f"student_performance_{grade or 'all'}"
-        cached = await cache_service.get(cache_key)
-        if cached:
-            return {"success": True, "performance": cached, "cached": True}
-        try:
+        computed = False
+        
+        async def compute():
+            nonlocal computed
+            computed = True
             # Example: Analyze payment completion rate by grade
             filters = {"grade": grade} if grade else None
             result = await db.execute_query(
@@ -111,45 +122,53 @@ class AdvancedAnalyticsService:
                 select_fields=["id", "first_name", "last_name", "grade"]
             )
             if not result["success"] or not result["data"]:
-                return {"success": False, "error": "No student data available"}
+                return None
             students = result["data"]
             perf = []
-            for student in students:
-                payment_result = await db.execute_query(
-                    "payments",
-                    "select",
-                    filters={"student_id": student["id"]},
-                    select_fields=["amount", "payment_status"]
-                )
-                total_paid = sum([p["amount"] for p in payment_result["data"] if p["payment_status"] == "completed"]) if payment_result["success"] else 0
+            # One batched payments query for all students instead of one per student
+            payments_loader = db.loader(
+                "payments",
+                key="student_id",
+                select_fields=["amount", "payment_status"],
+                many=True
+            )
+            student_payments = await payments_loader.load_many([student["id"] for student in students])
+            for student, payments in zip(students, student_payments):
+                total_paid = sum([p["amount"] for p in payments if p["payment_status"] == "completed"])
                 perf.append({
                     "student_id": student["id"],
                     "name": f"{student['first_name']} {student['last_name']}",
                     "grade": student["grade"],
                     "total_paid": total_paid
                 })
-            await cache_service.set(cache_key, perf, self.cache_ttl)
-            return {"success": True, "performance": perf, "cached": False}
+            return perf
+        
+        try:
+            perf = await cache_service.get_or_set(
+                f"student_performance_{grade or 'all'}", compute, self.cache_ttl, tags=[ANALYTICS_TAG, "payments", "students"]
+            )
+            if perf is None:
+                return {"success": False, "error": "No student data available"}
+            return {"success": True, "performance": perf, "cached": not computed}
         except Exception as e:
             logger.error(f"Failed to analyze student performance: {e}")
             return {"success": False, "error": str(e)}
 
     async def get_revenue_optimization_insights(self) -> Dict:
         """Provide actionable insights for revenue optimization"""
-        cache_key = "revenue_optimization_insights"
-        cached = await cache_service.get(cache_key)
-        if cached:
-            return {"success": True, "insights": cached, "cached": True}
-        try:
+        computed = False
+        
+        async def compute():
+            nonlocal computed
+            computed = True
             # Example: Identify months with lowest collection rates
-            result = await db.execute_query(
+            result = await db.fetch_columns(
                 "payments",
-                "select",
-                select_fields=["payment_date", "amount", "payment_status"],
+                {"payment_date": "datetime64", "amount": "float64", "payment_status": "object"},
                 order_by="payment_date ASC"
             )
-            if not result["success"] or not result["data"]:
-                return {"success": False, "error": "No payment data available"}
+            if not result["success"] or not result["count"]:
+                return None
             df = pd.DataFrame(result["data"])
             df["payment_date"] = pd.to_datetime(df["payment_date"])
             df["month"] = df["payment_date"].dt.to_period("M")
@@ -157,12 +176,18 @@ class AdvancedAnalyticsService:
             all_payments = df.groupby("month")["amount"].sum()
             collection_rate = (completed / all_payments).fillna(0)
             lowest_months = collection_rate.nsmallest(3).index.astype(str).tolist()
-            insights = {
+            return {
                 "lowest_collection_months": lowest_months,
                 "collection_rates": collection_rate.round(2).to_dict()
             }
-            await cache_service.set(cache_key, insights, self.cache_ttl)
-            return {"success": True, "insights": insights, "cached": False}
+        
+        try:
+            insights = await cache_service.get_or_set(
+                "revenue_optimization_insights", compute, self.cache_ttl, tags=[ANALYTICS_TAG, "payments"]
+            )
+            if insights is None:
+                return {"success": False, "error": "No payment data available"}
+            return {"success": True, "insights": insights, "cached": not computed}
         except Exception as e:
             logger.error(f"Failed to generate revenue optimization insights: {e}")
             return {"success": False, "error": str(e)}
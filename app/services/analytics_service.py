@@ -5,13 +5,17 @@ import asyncio
 
 from ..database import db
 from ..config import settings
+from .cache_service import cache_service
 
 logger = logging.getLogger(__name__)
 
+# Every analytics entry carries this tag plus the tables it reads from; domain
+# events invalidate the table tags (see event_bus.EVENT_TAGS)
+ANALYTICS_TAG = "analytics"
+
 class AnalyticsService:
     def __init__(self):
-        self.cache = {}
-        self.cache_ttl = 300  # 5 minutes
+        self.cache_ttl = settings.analytics_cache_ttl
         self.initialized = False
     
     async def initialize(self):
@@ -25,7 +29,6 @@ class AnalyticsService:
     async def cleanup(self):
         """Cleanup analytics service resources"""
         try:
-            self.cache.clear()
             self.initialized = False
             logger.info("Analytics service cleaned up")
         except Exception as e:
@@ -33,46 +36,12 @@ class AnalyticsService:
     
     def _get_cache_key(self, prefix: str, params: Dict) -> str:
         """Generate cache key for analytics data"""
-        import hashlib
-        key_data = f"{prefix}_{str(sorted(params.items()))}"
-        return hashlib.md5(key_data.encode()).hexdigest()
-    
-    def _is_cache_valid(self, cache_entry: Dict) -> bool:
-        """Check if cache entry is still valid"""
-        if not cache_entry:
-            return False
-        
-        cache_time = cache_entry.get("timestamp", 0)
-        return (datetime.utcnow().timestamp() - cache_time) < self.cache_ttl
+        return cache_service.get_key(f"analytics:{prefix}", *(f"{key}={value}" for key, value in sorted(params.items())))
     
     async def get_payment_trends(self, period: str = "month", date_from: Optional[date] = None, date_to: Optional[date] = None) -> Dict[str, Any]:
         """Get payment trends analysis"""
         try:
-            # Create materialized view for payment trends
-            trends_view_query = """
-                CREATE MATERIALIZED VIEW IF NOT EXISTS payment_trends AS
-                SELECT 
-                    DATE_TRUNC('month', payment_date) as period,
-                    COUNT(*) as transaction_count,
-                    COALESCE(SUM(CASE WHEN payment_status = 'completed' THEN amount ELSE 0 END), 0) as completed_amount,
-                    COALESCE(SUM(CASE WHEN payment_status = 'pending' THEN amount ELSE 0 END), 0) as pending_amount,
-                    COALESCE(AVG(CASE WHEN payment_status = 'completed' THEN amount END), 0) as avg_amount,
-                    COUNT(CASE WHEN payment_status = 'completed' THEN 1 END) as completed_count,
-                    COUNT(CASE WHEN payment_status = 'failed' THEN 1 END) as failed_count
-                FROM payments
-                GROUP BY DATE_TRUNC('month', payment_date)
-                WITH DATA;
-            """
-            
-            # Create index on materialized view
-            trends_view_index = """
-                CREATE UNIQUE INDEX IF NOT EXISTS idx_payment_trends_period ON payment_trends(period);
-            """
-            
-            # Execute view creation
-            await db.execute_raw_query(trends_view_query)
-            await db.execute_raw_query(trends_view_index)
-            
+            # payment_trends is created and kept fresh by the materialized view service
             # Calculate date range
             end_date = date_to or datetime.now().date()
             if period == "week":
@@ -140,8 +109,9 @@ class AnalyticsService:
             
             # Check cache
             cache_key = self._get_cache_key("student_analytics", {})
-            if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
-                return self.cache[cache_key]["data"]
+            cached = await cache_service.get(cache_key)
+            if cached is not None:
+                return cached
             
             # Query student analytics
             analytics_query = """
@@ -194,10 +164,12 @@ class AnalyticsService:
             }
             
             # Cache the result
-            self.cache[cache_key] = {
-                "data": {"success": True, "data": analytics_data},
-                "timestamp": datetime.utcnow().timestamp()
-            }
+            await cache_service.set(
+                cache_key,
+                {"success": True, "data": analytics_data},
+                self.cache_ttl,
+                tags=[ANALYTICS_TAG, "students", "student_fees"]
+            )
             
             return {"success": True, "data": analytics_data}
             
@@ -213,8 +185,9 @@ class AnalyticsService:
             
             # Check cache
             cache_key = self._get_cache_key("financial_analytics", {"period": period})
-            if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
-                return self.cache[cache_key]["data"]
+            cached = await cache_service.get(cache_key)
+            if cached is not None:
+                return cached
             
             # Calculate date range
             end_date = datetime.now().date()
@@ -304,10 +277,12 @@ class AnalyticsService:
             }
             
             # Cache the result
-            self.cache[cache_key] = {
-                "data": {"success": True, "data": analytics_data},
-                "timestamp": datetime.utcnow().timestamp()
-            }
+            await cache_service.set(
+                cache_key,
+                {"success": True, "data": analytics_data},
+                self.cache_ttl,
+                tags=[ANALYTICS_TAG, "payments"]
+            )
             
             return {"success": True, "data": analytics_data}
             
@@ -424,7 +399,7 @@ class AnalyticsService:
     
     async def clear_cache(self):
         """Clear analytics cache"""
-        self.cache.clear()
+        await cache_service.invalidate_tags([ANALYTICS_TAG])
         logger.info("Analytics cache cleared")
 
 # Create global analytics service instance
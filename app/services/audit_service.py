@@ -6,6 +6,7 @@ import asyncio
 
 from ..config import settings
 from ..database import db
+from ..utils.export import stream_csv, stream_json_array
 
 logger = logging.getLogger(__name__)
 
@@ -177,14 +178,16 @@ class AuditService:
                 select_fields="*",
                 limit=limit,
                 offset=offset,
-                order_by="timestamp DESC"
+                order_by="timestamp DESC",
+                with_total=True,
+                cache_ttl=settings.count_cache_ttl
             )
             
             if result["success"]:
                 return {
                     "success": True,
                     "data": result["data"],
-                    "total": len(result["data"])
+                    "total": result.get("total", 0)
                 }
             else:
                 return {"success": False, "error": result.get("error")}
@@ -331,47 +334,51 @@ class AuditService:
     async def export_audit_logs(self, 
                                start_date: Optional[datetime] = None,
                                end_date: Optional[datetime] = None,
-                               format: str = "json") -> Dict:
-        """Export audit logs"""
+                               format: str = "json",
+                               limit: Optional[int] = None) -> Dict:
+        """Export audit logs.
+
+        ``content`` is an async iterator of text chunks streamed from a
+        server-side cursor, so exports are no longer capped at 10,000 rows
+        (pass ``limit`` to cap them).
+        """
         try:
-            # Get logs
-            logs = await self.get_audit_logs(
-                start_date=start_date,
-                end_date=end_date,
-                limit=10000  # Large limit for export
-            )
+            if format.lower() not in ("json", "csv"):
+                return {"success": False, "error": f"Unsupported format: {format}"}
+            
+            conditions = []
+            params = []
+            if start_date:
+                params.append(start_date)
+                conditions.append(f"timestamp >= ${len(params)}")
+            if end_date:
+                params.append(end_date)
+                conditions.append(f"timestamp <= ${len(params)}")
             
-            if not logs["success"]:
-                return logs
+            query = "SELECT * FROM audit_logs"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY timestamp DESC"
+            if limit:
+                params.append(limit)
+                query += f" LIMIT ${len(params)}"
+            
+            rows = db.stream(query, params)
             
             if format.lower() == "json":
                 return {
                     "success": True,
                     "format": "json",
-                    "data": logs["data"],
-                    "count": len(logs["data"])
+                    "media_type": "application/json",
+                    "content": stream_json_array(rows)
                 }
-            elif format.lower() == "csv":
-                # Convert to CSV format
-                csv_data = []
-                if logs["data"]:
-                    # Headers
-                    headers = list(logs["data"][0].keys())
-                    csv_data.append(",".join(headers))
-                    
-                    # Data rows
-                    for log in logs["data"]:
-                        row = [str(log.get(header, "")) for header in headers]
-                        csv_data.append(",".join(row))
-                
+            else:
                 return {
                     "success": True,
                     "format": "csv",
-                    "data": "\n".join(csv_data),
-                    "count": len(logs["data"])
+                    "media_type": "text/csv",
+                    "content": stream_csv(rows)
                 }
-            else:
-                return {"success": False, "error": f"Unsupported format: {format}"}
                 
         except Exception as e:
             logger.error(f"Failed to export audit logs: {e}")
@@ -380,10 +387,12 @@ class AuditService:
     async def get_audit_statistics(self) -> Dict:
         """Get audit trail statistics"""
         try:
-            # Get basic statistics
+            # Get basic statistics (planner estimate; audit_logs is too large to scan for a badge)
             total_logs = await db.execute_query(
                 "audit_logs",
-                "count"
+                "count",
+                approximate=True,
+                cache_ttl=settings.count_cache_ttl
             )
             
             # Get logs from last 24 hours
@@ -10,6 +10,8 @@ from fastapi import UploadFile
 
 from ..config import settings
 from ..database import db
+from ..utils.export import stream_csv
+from .event_bus import event_bus, PAYMENT_CREATED, STUDENT_CHANGED
 
 logger = logging.getLogger(__name__)
 
@@ -156,36 +158,32 @@ class BulkOperationsService:
                 ORDER BY p.payment_date DESC
             """
             
-            result = await db.execute_raw_query(query)
-            
-            if not result["success"]:
-                return {"success": False, "error": "Failed to fetch payments data"}
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(result["data"])
-            
             # Export based on format
             if format.lower() == "csv":
-                output = io.StringIO()
-                df.to_csv(output, index=False)
-                content = output.getvalue()
-                filename = f"payments_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                # CSV is streamed from a server-side cursor: content is an async
+                # iterator of text chunks suitable for a StreamingResponse
+                return {
+                    "success": True,
+                    "filename": f"payments_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    "content": stream_csv(db.stream(query)),
+                    "format": format,
+                    "streaming": True
+                }
             elif format.lower() == "excel":
+                # xlsx has to be assembled in memory, but rows still arrive in batches
+                df = pd.DataFrame([row async for row in db.stream(query)])
                 output = io.BytesIO()
                 df.to_excel(output, index=False)
-                content = output.getvalue()
-                filename = f"payments_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                return {
+                    "success": True,
+                    "filename": f"payments_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                    "content": output.getvalue(),
+                    "record_count": len(df),
+                    "format": format
+                }
             else:
                 return {"success": False, "error": "Unsupported export format"}
             
-            return {
-                "success": True,
-                "filename": filename,
-                "content": content,
-                "record_count": len(df),
-                "format": format
-            }
-            
         except Exception as e:
             logger.error(f"Failed to bulk export payments: {e}")
             return {"success": False, "error": str(e)}
@@ -228,6 +226,9 @@ class BulkOperationsService:
                     failed += 1
                     errors.append({"record": update, "error": str(e)})
             
+            if successful:
+                await event_bus.publish(STUDENT_CHANGED, action="bulk_updated", count=successful)
+            
             # Log bulk operation
             await self._log_bulk_operation(
                 user_id, "update", "students", len(updates), successful, failed, errors
@@ -278,6 +279,9 @@ class BulkOperationsService:
                     failed += 1
                     errors.append({"student_id": student_id, "error": str(e)})
             
+            if successful:
+                await event_bus.publish(STUDENT_CHANGED, action="bulk_deleted", count=successful)
+            
             # Log bulk operation
             await self._log_bulk_operation(
                 user_id, "delete", "students", len(student_ids), successful, failed, errors
@@ -391,14 +395,14 @@ class BulkOperationsService:
     async def _process_student_import(self, df: pd.DataFrame, user_id: str) -> Dict:
         """Process student import"""
         try:
-            successful = 0
-            failed = 0
             errors = []
+            students = []
+            row_numbers = []
             
             for index, row in df.iterrows():
                 try:
                     # Prepare student data
-                    student_data = {
+                    students.append({
                         "student_id": row.get("student_id", f"STU{datetime.now().strftime('%Y%m%d%H%M%S')}{index}"),
                         "first_name": row["first_name"],
                         "last_name": row["last_name"],
@@ -408,24 +412,19 @@ class BulkOperationsService:
                         "section": row.get("section"),
                         "status": row.get("status", "active"),
                         "admission_date": pd.to_datetime(row.get("admission_date", datetime.now())).date().isoformat()
-                    }
-                    
-                    result = await db.execute_query(
-                        "students",
-                        "insert",
-                        data=student_data
-                    )
-                    
-                    if result["success"]:
-                        successful += 1
-                    else:
-                        failed += 1
-                        errors.append({"row": index + 1, "error": result.get("error", "Insert failed")})
-                        
+                    })
+                    row_numbers.append(index + 1)
                 except Exception as e:
-                    failed += 1
                     errors.append({"row": index + 1, "error": str(e)})
             
+            result = await db.bulk_insert("students", students)
+            errors.extend(self._bulk_insert_errors(result, row_numbers))
+            successful = result.get("inserted", 0)
+            failed = len(df) - successful
+            
+            if successful:
+                await event_bus.publish(STUDENT_CHANGED, action="imported", count=successful)
+            
             # Log bulk operation
             await self._log_bulk_operation(
                 user_id, "import", "students", len(df), successful, failed, errors
@@ -446,29 +445,32 @@ class BulkOperationsService:
     async def _process_payment_import(self, df: pd.DataFrame, user_id: str) -> Dict:
         """Process payment import"""
         try:
-            successful = 0
-            failed = 0
             errors = []
+            payments = []
+            row_numbers = []
+            
+            # Resolve all referenced students in one query
+            student_numbers = [str(value) for value in df["student_id"].dropna().unique()]
+            student_result = await db.execute_query(
+                "students",
+                "select",
+                filters={"student_id__in": student_numbers},
+                select_fields="id, student_id"
+            ) if student_numbers else {"success": True, "data": []}
+            student_ids = {
+                student["student_id"]: student["id"]
+                for student in (student_result["data"] if student_result["success"] else [])
+            }
             
             for index, row in df.iterrows():
                 try:
-                    # Get student ID
-                    student_result = await db.execute_query(
-                        "students",
-                        "select",
-                        filters={"student_id": row["student_id"]},
-                        select_fields="id"
-                    )
-                    
-                    if not student_result["success"] or not student_result["data"]:
-                        failed += 1
+                    student_id = student_ids.get(str(row["student_id"]))
+                    if not student_id:
                         errors.append({"row": index + 1, "error": f"Student not found: {row['student_id']}"})
                         continue
                     
-                    student_id = student_result["data"][0]["id"]
-                    
                     # Prepare payment data
-                    payment_data = {
+                    payments.append({
                         "receipt_number": row.get("receipt_number", f"RCP{datetime.now().strftime('%Y%m%d%H%M%S')}{index}"),
                         "student_id": student_id,
                         "amount": float(row["amount"]),
@@ -476,24 +478,19 @@ class BulkOperationsService:
                         "payment_status": row.get("payment_status", "completed"),
                         "payment_date": pd.to_datetime(row["payment_date"]).isoformat(),
                         "notes": row.get("notes")
-                    }
-                    
-                    result = await db.execute_query(
-                        "payments",
-                        "insert",
-                        data=payment_data
-                    )
-                    
-                    if result["success"]:
-                        successful += 1
-                    else:
-                        failed += 1
-                        errors.append({"row": index + 1, "error": result.get("error", "Insert failed")})
-                        
+                    })
+                    row_numbers.append(index + 1)
                 except Exception as e:
-                    failed += 1
                     errors.append({"row": index + 1, "error": str(e)})
             
+            result = await db.bulk_insert("payments", payments)
+            errors.extend(self._bulk_insert_errors(result, row_numbers))
+            successful = result.get("inserted", 0)
+            failed = len(df) - successful
+            
+            if successful:
+                await event_bus.publish(PAYMENT_CREATED, imported=True, count=successful)
+            
             # Log bulk operation
             await self._log_bulk_operation(
                 user_id, "import", "payments", len(df), successful, failed, errors
@@ -511,6 +508,15 @@ class BulkOperationsService:
             logger.error(f"Failed to process payment import: {e}")
             return {"success": False, "error": str(e)}
     
+    def _bulk_insert_errors(self, result: Dict, row_numbers: List[int]) -> List[Dict]:
+        """Map bulk_insert failures back to spreadsheet row numbers"""
+        if not result["success"] and not result.get("failed"):
+            return [{"row": row, "error": result.get("error", "Insert failed")} for row in row_numbers]
+        return [
+            {"row": row_numbers[failure["index"]], "error": failure["error"]}
+            for failure in result.get("failed", [])
+        ]
+    
     async def _check_student_dependencies(self, student_ids: List[str]) -> Dict:
         """Check if students have dependencies before deletion"""
         try:
@@ -1,3 +1,8 @@
+import asyncio
+import contextvars
+import json
+import logging
+
 # Optional imports for cache service
 try:
     import redis.asyncio as redis
@@ -5,106 +10,439 @@ try:
 except ImportError:
     REDIS_AVAILABLE = False
     logger = logging.getLogger(__name__)
-    logger.warning("Redis not available - caching will be disabled")
+    logger.warning("Redis not available - caching will be in-process only")
 
-import json
-import logging
-from typing import Any, Optional
+import math
+import random
+import time
+import uuid
+from typing import Any, Iterable, Optional, List
 from datetime import datetime, timedelta
 from ..config import settings
+from ..utils.memory_cache import MemoryCache
+from ..utils.cache_codecs import CacheCodec
+from .event_bus import event_bus, EVENT_TAGS, DomainEvent
 
 logger = logging.getLogger(__name__)
 
+# Hot keys read on most requests; writers delete them so readers can use long TTLs
+ACADEMIC_CONTEXT_KEY = "academic_context:current"
+
+# get_or_set stores {ENVELOPE_MARKER: 1, "value", "delta", "expires_at"} so it can refresh early and serve stale
+ENVELOPE_MARKER = "__cache_envelope__"
+
+# Deletes the lock only if it still holds our token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _is_envelope(entry: Any) -> bool:
+    return isinstance(entry, dict) and ENVELOPE_MARKER in entry
+
 class CacheService:
+    """Two-tier cache: a bounded in-process LRU in front of Redis.
+
+    Reads are answered from the local tier when possible and fall through
+    to Redis, whose hits are copied into the local tier. Local entries live
+    at most ``settings.cache_local_ttl`` seconds; deletes and overwrites are
+    broadcast over Redis pub/sub so other workers drop their copies
+    straight away. Without Redis the local tier works on its own.
+
+    Keys can be tagged on ``set`` and dropped together with
+    ``invalidate_tags``. Each tag is a Redis set of its member keys, and
+    members are deleted in pipelined UNLINK batches, so invalidation never
+    walks the whole keyspace the way ``KEYS`` does.
+
+    Values are stored in Redis through ``CacheCodec`` (msgpack or orjson
+    when installed, compressed above ``settings.cache_compression_threshold``).
+
+    Domain events published on ``event_bus`` invalidate the tags listed in
+    ``EVENT_TAGS``, so entries tagged with the tables they read can use
+    long TTLs.
+    """
+
     def __init__(self):
         self.redis_client = None
         self.default_ttl = 3600  # 1 hour
-        
+        self.initialized = False
+        self.local = MemoryCache(
+            "cache_service",
+            max_entries=settings.cache_local_max_entries,
+            max_bytes=settings.cache_local_max_bytes,
+            default_ttl=settings.cache_local_ttl
+        )
+        self.codec = CacheCodec(
+            settings.cache_codec,
+            settings.cache_compression,
+            settings.cache_compression_threshold
+        )
+        self._worker_id = uuid.uuid4().hex
+        self._listener_task = None
+        self._inflight: dict = {}  # foreground fills, shared by concurrent misses
+        self._refreshing: dict = {}  # background refreshes; may end with None, so misses never join them
+
     async def initialize(self):
         """Initialize Redis connection"""
         try:
+            for event in EVENT_TAGS:
+                event_bus.subscribe(event, self._on_domain_event)
+            self.initialized = True
             if not REDIS_AVAILABLE:
-                logger.warning("Redis not available - caching disabled")
+                logger.warning("Redis not available - using in-process cache only")
                 return
-                
+
             if settings.redis_url:
                 self.redis_client = redis.from_url(
                     settings.redis_url,
                     password=settings.redis_password,
-                    decode_responses=True
+                    decode_responses=False
                 )
+                self._listener_task = asyncio.create_task(self._listen_invalidations())
                 logger.info("Redis cache initialized successfully")
         except Exception as e:
             logger.error(f"Redis initialization failed: {e}")
             self.redis_client = None
-    
+
+    async def cleanup(self):
+        """Stop the invalidation listener and close Redis"""
+        if self._listener_task:
+            self._listener_task.cancel()
+            self._listener_task = None
+        if self.redis_client:
+            await self.redis_client.close()
+            self.redis_client = None
+
+    async def _on_domain_event(self, event: DomainEvent):
+        """Drop every entry tagged with a table the event changed"""
+        await self.invalidate_tags(event.tags)
+
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
+        entry = await self._get_entry(key)
+        if _is_envelope(entry):
+            return entry["value"] if entry["expires_at"] > time.time() else None
+        return entry
+
+    async def _get_entry(self, key: str) -> Optional[Any]:
+        """Stored value of a key as written, envelope included"""
+        value = self.local.get(key)
+        if value is not None:
+            return value
         try:
             if not self.redis_client:
                 return None
-                
-            value = await self.redis_client.get(key)
-            return json.loads(value) if value else None
+
+            payload = await self.redis_client.get(key)
+            if not payload:
+                return None
+            value = self.codec.loads(payload)
+            self.local.set(key, value, size=len(payload))
+            return value
         except Exception as e:
             logger.error(f"Cache get failed for key {key}: {e}")
             return None
-    
-    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in cache"""
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> bool:
+        """Set value in cache, optionally recording it under ``tags``"""
+        stored, _ = await self._store(key, value, ttl, tags)
+        return stored
+
+    async def _store(self, key: str, value: Any, ttl: Optional[int], tags: Optional[List[str]]):
+        """Write both tiers; returns (stored, value as readers will get it back)"""
+        ttl = ttl or self.default_ttl
+        tags = tags or []
+        try:
+            # The local copy has the types Redis hits will return (e.g. orjson turns Decimal into str)
+            payload, local_value = self.codec.encode(value)
+        except Exception as e:
+            logger.error(f"Cache set failed for key {key}: {e}")
+            return False, value
+        # With Redis the local copy is short-lived; alone it is the cache and keeps the full TTL
+        local_ttl = min(ttl, settings.cache_local_ttl) if self.redis_client else ttl
+        self.local.set(key, local_value, ttl=local_ttl, size=len(payload), tags=tags)
         try:
             if not self.redis_client:
-                return False
-                
-            ttl = ttl or self.default_ttl
-            await self.redis_client.set(
-                key,
-                json.dumps(value),
-                ex=ttl
-            )
-            return True
+                return True, local_value
+
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(key, payload, ex=ttl)
+                for tag in tags:
+                    # Tag sets outlive their members; stale members are harmless to UNLINK
+                    pipe.sadd(self._tag_key(tag), key)
+                    pipe.expire(self._tag_key(tag), max(ttl, settings.cache_tag_ttl))
+                await pipe.execute()
+            await self._publish_invalidation(keys=[key])
+            return True, local_value
         except Exception as e:
             logger.error(f"Cache set failed for key {key}: {e}")
-            return False
-    
+            return False, local_value
+
     async def delete(self, key: str) -> bool:
         """Delete value from cache"""
+        self.local.delete(key)
         try:
             if not self.redis_client:
-                return False
-                
+                return True
+
             await self.redis_client.delete(key)
+            await self._publish_invalidation(keys=[key])
             return True
         except Exception as e:
             logger.error(f"Cache delete failed for key {key}: {e}")
             return False
-    
+
     async def clear_pattern(self, pattern: str) -> bool:
-        """Clear all keys matching pattern"""
+        """Clear all keys matching pattern.
+
+        Walks the keyspace incrementally with SCAN so Redis keeps serving
+        other clients; prefer tags for anything on a hot path.
+        """
+        self.local.delete_pattern(pattern)
         try:
             if not self.redis_client:
-                return False
-                
-            keys = await self.redis_client.keys(pattern)
-            if keys:
-                await self.redis_client.delete(*keys)
+                return True
+
+            batch_size = settings.cache_invalidation_batch_size
+            await self._unlink_batches(self.redis_client.scan_iter(match=pattern, count=batch_size))
+            await self._publish_invalidation(pattern=pattern)
             return True
         except Exception as e:
             logger.error(f"Cache clear pattern failed for {pattern}: {e}")
             return False
-    
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> bool:
+        """Delete every key recorded under any of ``tags``"""
+        tags = list(tags)
+        self.local.delete_tags(tags)
+        try:
+            if not self.redis_client:
+                return True
+
+            batch_size = settings.cache_invalidation_batch_size
+            for tag in tags:
+                # Move the set aside first so keys tagged during the purge land in a fresh set
+                purge_key = f"{self._tag_key(tag)}:purge:{uuid.uuid4().hex}"
+                try:
+                    await self.redis_client.rename(self._tag_key(tag), purge_key)
+                except redis.ResponseError:
+                    continue  # no keys carry this tag
+                # Promoted copies in other workers' local tiers carry no tags, so name the keys too
+                await self._unlink_batches(self.redis_client.sscan_iter(purge_key, count=batch_size), publish=True)
+                await self.redis_client.unlink(purge_key)
+            await self._publish_invalidation(tags=tags)
+            return True
+        except Exception as e:
+            logger.error(f"Cache tag invalidation failed for {tags}: {e}")
+            return False
+
+    async def _unlink_batches(self, keys, publish: bool = False) -> int:
+        """UNLINK keys from an async iterator in pipelined batches, optionally broadcasting each batch"""
+        batch_size = settings.cache_invalidation_batch_size
+        removed = 0
+        batch: List[str] = []
+        async for key in keys:
+            batch.append(key.decode() if isinstance(key, bytes) else key)
+            if len(batch) >= batch_size:
+                removed += await self._unlink(batch, publish)
+                batch = []
+        if batch:
+            removed += await self._unlink(batch, publish)
+        return removed
+
+    async def _unlink(self, keys: List[str], publish: bool = False) -> int:
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.unlink(key)
+            await pipe.execute()
+        if publish:
+            await self._publish_invalidation(keys=keys)
+        return len(keys)
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{settings.cache_tag_prefix}{tag}"
+
+    async def _publish_invalidation(
+        self,
+        keys: Optional[List[str]] = None,
+        pattern: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ):
+        """Tell other workers to drop their local copies"""
+        message = {"origin": self._worker_id, "keys": keys or [], "pattern": pattern, "tags": tags or []}
+        await self.redis_client.publish(settings.cache_invalidation_channel, json.dumps(message))
+
+    async def _listen_invalidations(self):
+        """Apply invalidations published by other workers to the local tier"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis_client.pubsub()
+                await pubsub.subscribe(settings.cache_invalidation_channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    if data.get("origin") == self._worker_id:
+                        continue
+                    for key in data.get("keys", []):
+                        self.local.delete(key)
+                    if data.get("pattern"):
+                        self.local.delete_pattern(data["pattern"])
+                    if data.get("tags"):
+                        self.local.delete_tags(data["tags"])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                # Messages may have been missed while disconnected
+                logger.error(f"Cache invalidation listener failed: {e}")
+                self.local.clear()
+                await asyncio.sleep(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> dict:
+        """Local tier statistics, codec settings and whether Redis is in use"""
+        return {"local": self.local.stats(), "codec": self.codec.describe(), "redis": self.redis_client is not None}
+
     def get_key(self, prefix: str, *args) -> str:
         """Generate cache key"""
         return f"{prefix}:{':'.join(str(arg) for arg in args)}"
-    
-    async def get_or_set(self, key: str, getter_func, ttl: Optional[int] = None) -> Any:
-        """Get from cache or set if not exists"""
-        value = await self.get(key)
-        if value is None:
+
+    async def get_or_set(
+        self,
+        key: str,
+        getter_func,
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+        allow_stale: bool = True
+    ) -> Any:
+        """Get from cache or compute and store, without stampedes.
+
+        - Concurrent misses in this worker share one ``getter_func`` call,
+          and a Redis lock per key lets one worker recompute while the
+          others wait for its result.
+        - Entries are refreshed early with probability rising as expiry
+          nears (XFetch, scaled by how long the last computation took), so
+          hot keys are usually recomputed in the background before anyone
+          sees a miss.
+        - With ``allow_stale`` an expired entry is kept for
+          ``settings.cache_stale_ttl`` seconds and returned while a
+          background refresh runs.
+
+        ``getter_func`` returning None is not cached.
+        """
+        ttl = ttl or self.default_ttl
+        entry = await self._get_entry(key)
+        if _is_envelope(entry):
+            remaining = entry["expires_at"] - time.time()
+            if remaining > 0 and not self._refresh_early(entry["delta"], remaining):
+                return entry["value"]
+            if remaining > 0 or allow_stale:
+                self._refresh_in_background(key, getter_func, ttl, tags)
+                return entry["value"]
+        elif entry is not None:
+            return entry
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start_recompute(key, getter_func, ttl, tags, wait_for_lock=True)
+        # Shielded so one caller giving up does not cancel the others' result
+        return await asyncio.shield(task)
+
+    def _refresh_early(self, delta: float, remaining: float) -> bool:
+        """XFetch: recompute before expiry with probability growing as expiry nears"""
+        return delta * settings.cache_xfetch_beta * -math.log(1.0 - random.random()) >= remaining
+
+    def _refresh_in_background(self, key: str, getter_func, ttl: int, tags: Optional[List[str]]):
+        if key in self._inflight or key in self._refreshing:
+            return
+        task = self._start_recompute(key, getter_func, ttl, tags, wait_for_lock=False)
+        
+        def log_failure(done):
+            if not done.cancelled() and done.exception() is not None:
+                logger.error(f"Background cache refresh failed for key {key}: {done.exception()}")
+        
+        task.add_done_callback(log_failure)
+
+    def _start_recompute(self, key: str, getter_func, ttl: int, tags: Optional[List[str]], wait_for_lock: bool):
+        coro = self._recompute(key, getter_func, ttl, tags, wait_for_lock)
+        if wait_for_lock:
+            task = asyncio.ensure_future(coro)
+        else:
+            # Background refreshes outlive the request that noticed the stale entry, so they must
+            # not inherit its context (query deadline, pinned transaction, request loaders)
+            task = contextvars.Context().run(asyncio.ensure_future, coro)
+        registry = self._inflight if wait_for_lock else self._refreshing
+        registry[key] = task
+        task.add_done_callback(lambda _: registry.pop(key, None))
+        return task
+
+    async def _recompute(self, key: str, getter_func, ttl: int, tags: Optional[List[str]], wait_for_lock: bool) -> Any:
+        """Run getter_func under the key's distributed lock and store the result"""
+        token = await self._acquire_lock(key)
+        if token is None:
+            if not wait_for_lock:
+                return None  # another worker is already refreshing
+            value = await self._wait_for_fill(key)
+            if value is not None:
+                return value
+        try:
+            started = time.monotonic()
             value = await getter_func()
             if value is not None:
-                await self.set(key, value, ttl)
-        return value
+                envelope = {
+                    ENVELOPE_MARKER: 1,
+                    "value": value,
+                    "delta": time.monotonic() - started,
+                    "expires_at": time.time() + ttl
+                }
+                _, stored = await self._store(key, envelope, ttl + settings.cache_stale_ttl, tags)
+                # Hand back what later hits will return, not the getter's original objects
+                value = stored["value"] if _is_envelope(stored) else value
+            return value
+        finally:
+            if token:
+                await self._release_lock(key, token)
+
+    async def _acquire_lock(self, key: str) -> Optional[str]:
+        """Take the key's recompute lock; "" means no Redis (no lock needed), None means held elsewhere"""
+        if not self.redis_client:
+            return ""
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis_client.set(
+                f"lock:{key}", token, nx=True, px=int(settings.cache_lock_timeout * 1000)
+            )
+        except Exception as e:
+            logger.error(f"Cache lock failed for key {key}: {e}")
+            return ""
+        return token if acquired else None
+
+    async def _release_lock(self, key: str, token: str):
+        try:
+            await self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
+        except Exception as e:
+            logger.error(f"Cache lock release failed for key {key}: {e}")
+
+    async def _wait_for_fill(self, key: str) -> Optional[Any]:
+        """Poll for the value another worker is computing, up to cache_lock_wait seconds"""
+        deadline = time.monotonic() + settings.cache_lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            # A stale local copy would hide the fresh value in Redis
+            self.local.delete(key)
+            value = await self.get(key)
+            if value is not None:
+                return value
+        return None
 
 # Create cache service instance
-cache_service = CacheService() 
\ No newline at end of file
+cache_service = CacheService()
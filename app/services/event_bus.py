@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Domain events published by the write paths
+PAYMENT_CREATED = "payment.created"
+PAYMENT_UPDATED = "payment.updated"
+FEE_UPDATED = "fee.updated"
+STUDENT_CHANGED = "student.changed"
+
+# Cache tags each event makes stale; tags name the tables the cached reads depend on
+EVENT_TAGS: Dict[str, Tuple[str, ...]] = {
+    PAYMENT_CREATED: ("payments", "student_fees"),
+    PAYMENT_UPDATED: ("payments", "student_fees"),
+    FEE_UPDATED: ("student_fees",),
+    STUDENT_CHANGED: ("students", "student_fees"),
+}
+
+DOMAIN_EVENTS = Counter('domain_events_total', 'Domain events published', ['event'])
+DOMAIN_EVENT_HANDLER_ERRORS = Counter(
+    'domain_event_handler_errors_total',
+    'Domain event handlers that raised',
+    ['event', 'handler']
+)
+DOMAIN_EVENT_HANDLER_SECONDS = Histogram(
+    'domain_event_handler_seconds',
+    'Time spent in domain event handlers',
+    ['event', 'handler'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+
+class DomainEvent:
+    """Something that changed in the data, with the ids needed to act on it"""
+
+    __slots__ = ("name", "payload", "occurred_at")
+
+    def __init__(self, name: str, payload: Dict[str, Any]):
+        self.name = name
+        self.payload = payload
+        self.occurred_at = datetime.utcnow()
+
+    @property
+    def tags(self) -> Tuple[str, ...]:
+        return EVENT_TAGS.get(self.name, ())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"event": self.name, "occurred_at": self.occurred_at.isoformat(), **self.payload}
+
+
+Handler = Callable[[DomainEvent], Awaitable[None]]
+
+
+class EventBus:
+    """In-process publish/subscribe for domain events.
+
+    Publish after the write has committed. Inline subscribers (cache
+    invalidation) are awaited before ``publish`` returns, so the caller's
+    next read sees fresh data; background subscribers (WebSocket pushes)
+    run as tasks so slow clients never hold up the request. A failing
+    handler is logged and counted and does not affect the others.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Tuple[Handler, bool]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def subscribe(self, event: str, handler: Handler, background: bool = False):
+        handlers = self._handlers.setdefault(event, [])
+        if all(existing is not handler for existing, _ in handlers):
+            handlers.append((handler, background))
+
+    def unsubscribe(self, event: str, handler: Handler):
+        self._handlers[event] = [entry for entry in self._handlers.get(event, []) if entry[0] is not handler]
+
+    async def publish(self, name: str, **payload) -> DomainEvent:
+        event = DomainEvent(name, payload)
+        DOMAIN_EVENTS.labels(event=name).inc()
+        inline = []
+        for handler, background in self._handlers.get(name, []):
+            if background:
+                task = asyncio.create_task(self._run(handler, event))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                inline.append(self._run(handler, event))
+        if inline:
+            await asyncio.gather(*inline)
+        return event
+
+    async def _run(self, handler: Handler, event: DomainEvent):
+        name = getattr(handler, "__qualname__", repr(handler))
+        started = time.perf_counter()
+        try:
+            await handler(event)
+        except Exception as e:
+            DOMAIN_EVENT_HANDLER_ERRORS.labels(event=event.name, handler=name).inc()
+            logger.error(f"Handler {name} failed for {event.name}: {e}")
+        finally:
+            DOMAIN_EVENT_HANDLER_SECONDS.labels(event=event.name, handler=name).observe(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscriptions": {
+                event: [getattr(handler, "__qualname__", repr(handler)) for handler, _ in handlers]
+                for event, handlers in self._handlers.items()
+            },
+            "pending_background_tasks": len(self._tasks)
+        }
+
+    async def cleanup(self):
+        """Let in-flight background handlers finish, then cancel stragglers"""
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(list(self._tasks), timeout=5)
+        for task in pending:
+            task.cancel()
+
+
+event_bus = EventBus()
@@ -0,0 +1,403 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Any, Tuple
+
+from ..config import settings
+from ..database import db
+
+logger = logging.getLogger(__name__)
+
+MAX_CREATE_BACKOFF = 3600  # seconds between CREATE retries once a view keeps failing
+
+# When each view was last refreshed by any worker; written under the view's advisory lock
+REFRESH_LOG_TABLE = """
+    CREATE TABLE IF NOT EXISTS materialized_view_refreshes (
+        name TEXT PRIMARY KEY,
+        refreshed_at TIMESTAMPTZ NOT NULL
+    )
+"""
+
+# Server clock, last shared refresh, and whether REFRESH ... CONCURRENTLY can run
+VIEW_STATE_QUERY = """
+    SELECT
+        clock_timestamp() AS now,
+        r.refreshed_at,
+        c.relispopulated AS populated,
+        EXISTS (
+            SELECT 1 FROM pg_index i
+            WHERE i.indrelid = c.oid AND i.indisunique AND i.indisvalid AND i.indpred IS NULL
+        ) AS has_unique_index
+    FROM pg_class c
+    LEFT JOIN materialized_view_refreshes r ON r.name = c.relname
+    WHERE c.relname = $1 AND c.relkind = 'm'
+"""
+
+
+class MaterializedView:
+    """Definition and refresh state of one materialized view"""
+
+    def __init__(self,
+                 name: str,
+                 definition: str,
+                 indexes: List[str],
+                 source_tables: Tuple[str, ...],
+                 max_staleness: int,
+                 refresh_after_writes: int):
+        self.name = name
+        self.definition = definition
+        self.indexes = indexes
+        self.source_tables = source_tables
+        self.max_staleness = max_staleness  # seconds the view may lag its source tables
+        self.refresh_after_writes = refresh_after_writes  # written rows that trigger an early refresh
+        self.created = False
+        self.last_refreshed: Optional[float] = None
+        self.pending_writes = 0
+        self.pending_since: Optional[float] = None  # when the oldest uncovered write was counted
+        self.last_error: Optional[str] = None
+        self.create_failures = 0
+        self.next_create_attempt = 0.0
+        self.lock = asyncio.Lock()
+
+    def is_due(self) -> bool:
+        if not self.created:
+            return False
+        if self.last_refreshed is None:
+            return True
+        if self.pending_writes >= self.refresh_after_writes:
+            return True
+        # Also without writes: views can depend on CURRENT_DATE, and other workers' writes are not counted here
+        return time.monotonic() - self.last_refreshed >= self.max_staleness
+
+    def mark_refreshed(self, refreshed_at: float, pending: int):
+        """Record a refresh that started at ``refreshed_at`` and covers ``pending`` counted writes"""
+        self.last_refreshed = refreshed_at
+        self.pending_writes = max(self.pending_writes - pending, 0)
+        self.pending_since = refreshed_at if self.pending_writes else None
+
+    def covered_by(self, age: float) -> bool:
+        """Whether a refresh that started ``age`` seconds ago leaves this view fresh enough"""
+        if age >= self.max_staleness:
+            return False
+        if self.pending_writes < self.refresh_after_writes or self.pending_since is None:
+            return True
+        # Write-triggered: only a refresh that started after our writes picked them up
+        return age <= time.monotonic() - self.pending_since
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "created": self.created,
+            "refreshing": self.lock.locked(),
+            "age_seconds": round(time.monotonic() - self.last_refreshed, 1) if self.last_refreshed else None,
+            "max_staleness": self.max_staleness,
+            "pending_writes": self.pending_writes,
+            "refresh_after_writes": self.refresh_after_writes,
+            "last_error": self.last_error,
+            "create_failures": self.create_failures
+        }
+
+
+DASHBOARD_STATS_VIEW = """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS dashboard_stats AS
+    WITH current_term AS (
+        SELECT id, term_name
+        FROM academic_terms
+        WHERE is_current = true
+        LIMIT 1
+    ),
+    fee_stats AS (
+        SELECT
+            COUNT(*) as total_students,
+            SUM(CASE WHEN is_paid = true THEN 1 ELSE 0 END) as paid_students,
+            SUM(CASE WHEN is_paid = false AND due_date < CURRENT_DATE THEN 1 ELSE 0 END) as overdue_students,
+            SUM(amount) as total_fees,
+            SUM(CASE WHEN is_paid = true THEN amount ELSE 0 END) as paid_amount,
+            SUM(CASE WHEN is_paid = false AND due_date < CURRENT_DATE THEN amount ELSE 0 END) as overdue_amount
+        FROM student_fees sf
+        JOIN current_term ct ON sf.academic_term_id = ct.id
+    ),
+    payment_stats AS (
+        SELECT
+            COUNT(*) as total_payments,
+            SUM(amount) as total_revenue,
+            COUNT(DISTINCT student_id) as students_paid,
+            COUNT(CASE WHEN payment_status = 'completed' THEN 1 END) as successful_payments
+        FROM payments
+        WHERE payment_date >= CURRENT_DATE - INTERVAL '30 days'
+    ),
+    recent_activities AS (
+        SELECT
+            p.id,
+            p.payment_date,
+            s.student_id,
+            CONCAT(s.first_name, ' ', s.last_name) as student_name,
+            p.amount,
+            p.payment_status
+        FROM payments p
+        JOIN students s ON p.student_id = s.id
+        ORDER BY p.payment_date DESC
+        LIMIT 5
+    )
+    SELECT
+        fs.*,
+        ps.*,
+        json_agg(ra.*) as recent_activities
+    FROM fee_stats fs
+    CROSS JOIN payment_stats ps
+    CROSS JOIN recent_activities ra
+    GROUP BY
+        fs.total_students, fs.paid_students, fs.overdue_students,
+        fs.total_fees, fs.paid_amount, fs.overdue_amount,
+        ps.total_payments, ps.total_revenue, ps.students_paid,
+        ps.successful_payments
+    WITH DATA
+"""
+
+PAYMENT_DETAILS_VIEW = """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS payment_details AS
+    SELECT
+        p.*,
+        s.student_id as student_number,
+        s.first_name || ' ' || s.last_name as student_name,
+        s.grade,
+        pr.receipt_number as receipt_issued,
+        pr.file_url as receipt_url,
+        COALESCE(
+            json_agg(
+                json_build_object(
+                    'fee_type_name', ft.name,
+                    'fee_type', ft.fee_type,
+                    'allocated_amount', pa.amount
+                )
+            ) FILTER (WHERE pa.id IS NOT NULL),
+            '[]'
+        ) as fee_allocations
+    FROM payments p
+    JOIN students s ON p.student_id = s.id
+    LEFT JOIN payment_receipts pr ON p.id = pr.payment_id
+    LEFT JOIN payment_allocations pa ON p.id = pa.payment_id
+    LEFT JOIN student_fees sf ON pa.student_fee_id = sf.id
+    LEFT JOIN fee_types ft ON sf.fee_type_id = ft.id
+    GROUP BY p.id, s.student_id, s.first_name, s.last_name, s.grade, pr.receipt_number, pr.file_url
+    WITH DATA
+"""
+
+PAYMENT_TRENDS_VIEW = """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS payment_trends AS
+    SELECT
+        DATE_TRUNC('month', payment_date) as period,
+        COUNT(*) as transaction_count,
+        COALESCE(SUM(CASE WHEN payment_status = 'completed' THEN amount ELSE 0 END), 0) as completed_amount,
+        COALESCE(SUM(CASE WHEN payment_status = 'pending' THEN amount ELSE 0 END), 0) as pending_amount,
+        COALESCE(AVG(CASE WHEN payment_status = 'completed' THEN amount END), 0) as avg_amount,
+        COUNT(CASE WHEN payment_status = 'completed' THEN 1 END) as completed_count,
+        COUNT(CASE WHEN payment_status = 'failed' THEN 1 END) as failed_count
+    FROM payments
+    GROUP BY DATE_TRUNC('month', payment_date)
+    WITH DATA
+"""
+
+
+class MaterializedViewService:
+    """Owns the lifecycle of the reporting materialized views.
+
+    Views are created once at startup. A background task refreshes each one
+    when its staleness budget runs out or as soon as enough rows have been
+    written to its source tables, so request handlers only ever read from
+    them. The last refresh time is shared through materialized_view_refreshes,
+    so a view is refreshed about once per budget however many workers run.
+    """
+
+    def __init__(self):
+        self.initialized = False
+        self.views: Dict[str, MaterializedView] = {}
+        self._refresh_task = None
+        self._wakeup = asyncio.Event()
+
+        self.register(MaterializedView(
+            "dashboard_stats",
+            DASHBOARD_STATS_VIEW,
+            ["CREATE UNIQUE INDEX IF NOT EXISTS idx_dashboard_stats ON dashboard_stats(total_students)"],
+            source_tables=("payments", "student_fees", "students", "academic_terms"),
+            max_staleness=60,
+            refresh_after_writes=50
+        ))
+        self.register(MaterializedView(
+            "payment_details",
+            PAYMENT_DETAILS_VIEW,
+            [
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_payment_details_id ON payment_details(id)",
+                "CREATE INDEX IF NOT EXISTS idx_payment_details_date ON payment_details(payment_date)",
+                "CREATE INDEX IF NOT EXISTS idx_payment_details_status ON payment_details(payment_status)"
+            ],
+            source_tables=("payments", "students", "payment_receipts", "payment_allocations", "student_fees", "fee_types"),
+            max_staleness=30,
+            refresh_after_writes=20
+        ))
+        self.register(MaterializedView(
+            "payment_trends",
+            PAYMENT_TRENDS_VIEW,
+            ["CREATE UNIQUE INDEX IF NOT EXISTS idx_payment_trends_period ON payment_trends(period)"],
+            source_tables=("payments",),
+            max_staleness=300,
+            refresh_after_writes=200
+        ))
+
+    def register(self, view: MaterializedView):
+        """Add a view to the registry (before initialize)"""
+        self.views[view.name] = view
+
+    async def initialize(self):
+        """Create registered views and start the background refresher"""
+        try:
+            if not db.pool:
+                # Views are created through the asyncpg pool; Supabase-only setups
+                # must create them with a migration
+                logger.warning("No PostgreSQL pool - materialized views are not managed")
+                return
+
+            result = await db.execute_raw_query(REFRESH_LOG_TABLE)
+            if not result["success"]:
+                logger.warning(f"Could not create materialized_view_refreshes: {result.get('error')}")
+
+            for view in self.views.values():
+                await self.create(view)
+
+            db.add_write_listener(self._on_write)
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+            self.initialized = True
+            logger.info("Materialized view service initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize materialized view service: {e}")
+
+    async def create(self, view: MaterializedView) -> bool:
+        """Create a view and its indexes if they do not exist yet"""
+        result = await db.execute_raw_query(view.definition)
+        for index in view.indexes:
+            if result["success"]:
+                result = await db.execute_raw_query(index)
+        if not result["success"]:
+            view.last_error = result.get("error")
+            view.create_failures += 1
+            backoff = min(settings.materialized_view_check_interval * 2 ** view.create_failures, MAX_CREATE_BACKOFF)
+            view.next_create_attempt = time.monotonic() + backoff
+            logger.error(
+                f"Failed to create materialized view {view.name} "
+                f"(attempt {view.create_failures}, retrying in {backoff:.0f}s): {view.last_error}"
+            )
+            return False
+        view.create_failures = 0
+        view.created = True
+        view.last_refreshed = time.monotonic()
+        return True
+
+    async def refresh(self, name: str, force: bool = False) -> Dict[str, Any]:
+        """Refresh a view now; concurrent callers share a single refresh.
+
+        Within a worker callers share the refresh through ``view.lock``;
+        across workers a session advisory lock on the view name serializes
+        refreshes, and a refresh another worker recorded recently enough is
+        reused instead of repeated unless ``force`` is set.
+        """
+        view = self.views.get(name)
+        if not view:
+            return {"success": False, "error": f"Unknown materialized view: {name}"}
+        if view.lock.locked():
+            # Single flight: wait for the refresh already running instead of starting another
+            async with view.lock:
+                return {"success": view.last_error is None, "error": view.last_error, "shared": True}
+
+        async with view.lock:
+            pending = view.pending_writes
+            started = time.monotonic()
+            lock_key = f"matview:{view.name}"
+            try:
+                # The advisory lock is per session, so lock, refresh and unlock share one connection
+                async with db.get_connection() as conn:
+                    if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", lock_key):
+                        # Another worker is refreshing; its result covers our pending writes
+                        view.mark_refreshed(time.monotonic(), pending)
+                        return {"success": True, "error": None, "shared": True}
+                    try:
+                        state = await conn.fetchrow(VIEW_STATE_QUERY, view.name)
+                        if state and state["refreshed_at"] and not force:
+                            age = max((state["now"] - state["refreshed_at"]).total_seconds(), 0.0)
+                            if view.covered_by(age):
+                                view.mark_refreshed(time.monotonic() - age, pending)
+                                return {"success": True, "error": None, "shared": True}
+
+                        if state and state["populated"] and state["has_unique_index"]:
+                            # CONCURRENTLY keeps the view readable during the refresh. A failure
+                            # (including a timeout) is left for the next cycle: the plain refresh
+                            # would block every reader of the view for the whole rebuild.
+                            await conn.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}")
+                        else:
+                            # CONCURRENTLY cannot fill an unpopulated view or run without a unique index
+                            await conn.execute(f"REFRESH MATERIALIZED VIEW {view.name}")
+
+                        if state:
+                            await conn.execute(
+                                """
+                                INSERT INTO materialized_view_refreshes (name, refreshed_at) VALUES ($1, $2)
+                                ON CONFLICT (name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+                                """,
+                                view.name, state["now"]
+                            )
+                    finally:
+                        await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", lock_key)
+            except Exception as e:
+                view.last_error = str(e)
+                logger.error(f"Failed to refresh materialized view {view.name}: {view.last_error}")
+                return {"success": False, "error": view.last_error}
+
+            view.last_error = None
+            # Writes that arrived during the refresh may not be in it
+            view.mark_refreshed(started, pending)
+            logger.info(f"Refreshed materialized view {view.name} in {time.monotonic() - started:.2f}s")
+            return {"success": True, "error": None, "shared": False}
+
+    def _on_write(self, table: str, rows: int):
+        """Database write listener: count writes against dependent views"""
+        for view in self.views.values():
+            if table in view.source_tables:
+                if view.pending_since is None:
+                    view.pending_since = time.monotonic()
+                view.pending_writes += max(rows, 1)
+                if view.pending_writes >= view.refresh_after_writes:
+                    self._wakeup.set()
+
+    async def _refresh_loop(self):
+        """Refresh views whose staleness budget or write threshold is exceeded"""
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.materialized_view_check_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+                for view in self.views.values():
+                    if not view.created:
+                        if time.monotonic() >= view.next_create_attempt:
+                            await self.create(view)
+                    elif view.is_due() and not view.lock.locked():
+                        await self.refresh(view.name)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Materialized view refresh loop failed: {e}")
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """Refresh state of every registered view"""
+        return [view.status() for view in self.views.values()]
+
+    async def cleanup(self):
+        """Stop the background refresher"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+
+# Initialize service
+materialized_view_service = MaterializedViewService()
@@ -308,25 +308,30 @@ class NotificationService:
             overdue_fees = result["data"]
             stats = {"processed": 0, "failed": 0, "skipped": 0}
             
-            for fee in overdue_fees:
+            # Resolve SMS opt-outs for all students up front: primary parent, then preference
+            with db.loader_scope():
+                primary_links = await db.loader(
+                    "parent_student_links",
+                    key="student_id",
+                    select_fields=["parent_id"],
+                    filters={"is_primary_contact": True}
+                ).load_many([fee["student_id"] for fee in overdue_fees])
+                parent_ids = [link["parent_id"] if link else None for link in primary_links]
+                sms_preferences = await db.loader(
+                    "parent_notification_preferences",
+                    key="parent_id",
+                    select_fields=["is_enabled"],
+                    filters={"channel": "sms"}
+                ).load_many([parent_id for parent_id in parent_ids if parent_id])
+            opted_out = {
+                str(preference["parent_id"]) for preference in sms_preferences
+                if preference and not preference["is_enabled"]
+            }
+            
+            for fee, parent_id in zip(overdue_fees, parent_ids):
                 try:
                     # Check if parent has opted out of notifications
-                    opt_out_query = """
-                        SELECT is_enabled 
-                        FROM parent_notification_preferences 
-                        WHERE parent_id = (
-                            SELECT parent_id 
-                            FROM parent_student_links 
-                            WHERE student_id = $1 
-                            AND is_primary_contact = true
-                        )
-                        AND channel = 'sms';
-                    """
-                    
-                    opt_out_result = await db.execute_raw_query(opt_out_query, [fee["student_id"]])
-                    
-                    if (opt_out_result["success"] and opt_out_result["data"] and 
-                        not opt_out_result["data"][0]["is_enabled"]):
+                    if parent_id and str(parent_id) in opted_out:
                         stats["skipped"] += 1
                         continue
                     
@@ -8,6 +8,7 @@ from enum import Enum
 
 from ..config import settings
 from ..database import db
+from .event_bus import event_bus, DomainEvent, PAYMENT_CREATED, PAYMENT_UPDATED, FEE_UPDATED, STUDENT_CHANGED
 
 logger = logging.getLogger(__name__)
 
@@ -32,11 +33,36 @@ class WebSocketService:
     async def initialize(self):
         """Initialize WebSocket service"""
         try:
+            # Pushes run in the background so slow clients never delay the write that published them
+            event_bus.subscribe(PAYMENT_CREATED, self._on_payment_created, background=True)
+            event_bus.subscribe(PAYMENT_UPDATED, self._on_financial_change, background=True)
+            event_bus.subscribe(FEE_UPDATED, self._on_financial_change, background=True)
+            event_bus.subscribe(STUDENT_CHANGED, self._on_student_changed, background=True)
             self.initialized = True
             logger.info("WebSocket service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize WebSocket service: {e}")
     
+    async def _on_payment_created(self, event: DomainEvent):
+        """Push new payments to cashiers and admins"""
+        if event.payload.get("imported"):
+            await self.send_dashboard_update(event.to_dict(), ConnectionType.ADMIN)
+        else:
+            await self.send_payment_notification(event.payload)
+    
+    async def _on_financial_change(self, event: DomainEvent):
+        """Tell admin dashboards that fee or payment figures changed"""
+        await self.send_dashboard_update(event.to_dict(), ConnectionType.ADMIN)
+    
+    async def _on_student_changed(self, event: DomainEvent):
+        """Push student record changes to staff"""
+        student_ids = event.payload.get("student_ids") or [None]
+        await self.send_student_update({
+            "id": student_ids[0] if len(student_ids) == 1 else None,
+            "name": event.payload.get("student_name"),
+            "action": event.payload.get("action")
+        })
+    
     async def connect(self, websocket: WebSocket, user_id: str, connection_type: ConnectionType, metadata: Dict = None):
         """Connect a new WebSocket client"""
         try:
@@ -0,0 +1,198 @@
+import json
+import time
+import uuid
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Tuple
+
+from prometheus_client import Histogram
+
+# Optional fast codecs and compressors
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+CACHE_CODEC_SECONDS = Histogram(
+    'cache_codec_seconds',
+    'Time spent encoding and decoding cached values',
+    ['codec', 'operation'],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+)
+CACHE_PAYLOAD_BYTES = Histogram(
+    'cache_payload_bytes',
+    'Size of cached values before and after compression',
+    ['codec', 'stage'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+
+# Stored payloads start with two header bytes: codec id, then compression id.
+# Both are control characters, so legacy JSON strings (no header) are still recognised.
+_CODEC_IDS = {"json": b"\x01", "orjson": b"\x02", "msgpack": b"\x03"}
+_COMPRESSION_IDS = {"none": b"\x00", "zlib": b"\x01", "lz4": b"\x02"}
+_CODEC_NAMES = {value: name for name, value in _CODEC_IDS.items()}
+_COMPRESSION_NAMES = {value: name for name, value in _COMPRESSION_IDS.items()}
+
+# msgpack extension type codes
+_EXT_DECIMAL = 1
+_EXT_DATETIME = 2
+_EXT_DATE = 3
+_EXT_UUID = 4
+
+
+def _fallback(value: Any) -> Any:
+    """Last-resort conversion for values no codec handles natively"""
+    if hasattr(value, "item"):
+        return value.item()  # NumPy scalars from pandas results
+    return str(value)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return _fallback(value)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(value).encode())
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode())
+    if isinstance(value, uuid.UUID):
+        return msgpack.ExtType(_EXT_UUID, value.bytes)
+    return _fallback(value)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_DECIMAL:
+        return Decimal(data.decode())
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode())
+    if code == _EXT_UUID:
+        return uuid.UUID(bytes=data)
+    return msgpack.ExtType(code, data)
+
+
+def _encode(codec: str, value: Any) -> bytes:
+    if codec == "msgpack":
+        return msgpack.packb(value, default=_msgpack_default, datetime=False)
+    if codec == "orjson":
+        # orjson writes datetime, date and UUID natively; Decimal keeps its precision as a string
+        return orjson.dumps(value, default=_fallback, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+
+def _decode(codec: str, data: bytes) -> Any:
+    if codec == "msgpack":
+        return msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, strict_map_key=False)
+    if codec == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def resolve_codec(name: str) -> str:
+    """Pick the configured codec, or the fastest installed one for "auto" """
+    if name == "auto":
+        return "msgpack" if MSGPACK_AVAILABLE else "orjson" if ORJSON_AVAILABLE else "json"
+    if name not in _CODEC_IDS:
+        raise ValueError(f"Unsupported cache codec: {name}")
+    if (name == "msgpack" and not MSGPACK_AVAILABLE) or (name == "orjson" and not ORJSON_AVAILABLE):
+        return "json"
+    return name
+
+
+def resolve_compression(name: str) -> str:
+    """Pick the configured compressor, or lz4 when installed for "auto" """
+    if name == "auto":
+        return "lz4" if LZ4_AVAILABLE else "zlib"
+    if name not in _COMPRESSION_IDS:
+        raise ValueError(f"Unsupported cache compression: {name}")
+    if name == "lz4" and not LZ4_AVAILABLE:
+        return "zlib"
+    return name
+
+
+class CacheCodec:
+    """Serialize cached values to self-describing, optionally compressed bytes.
+
+    Payloads of at least ``compression_threshold`` bytes are compressed.
+    The header records how a payload was written, so values stored under a
+    previous codec or compression setting stay readable, as do plain JSON
+    strings written before the header existed.
+    """
+
+    def __init__(self, codec: str = "auto", compression: str = "auto", compression_threshold: int = 4096):
+        self.codec = resolve_codec(codec)
+        self.compression = resolve_compression(compression)
+        self.compression_threshold = compression_threshold
+
+    def dumps(self, value: Any) -> bytes:
+        return self._dumps(value)[0]
+
+    def encode(self, value: Any) -> Tuple[bytes, Any]:
+        """``dumps(value)`` plus the value as ``loads`` will return it.
+
+        msgpack round-trips Decimal, datetime, date and UUID, so the value is
+        returned as given. The JSON codecs turn those into strings, so the
+        value is decoded again, from the bytes before compression.
+        """
+        payload, data = self._dumps(value)
+        if self.codec == "msgpack":
+            return payload, value
+        started = time.perf_counter()
+        decoded = _decode(self.codec, data)
+        CACHE_CODEC_SECONDS.labels(codec=self.codec, operation="decode").observe(time.perf_counter() - started)
+        return payload, decoded
+
+    def _dumps(self, value: Any) -> Tuple[bytes, bytes]:
+        """Stored payload and the encoded bytes before compression"""
+        started = time.perf_counter()
+        encoded = data = _encode(self.codec, value)
+        CACHE_PAYLOAD_BYTES.labels(codec=self.codec, stage="encoded").observe(len(data))
+        compression = "none"
+        if self.compression != "none" and len(data) >= self.compression_threshold:
+            compression = self.compression
+            data = lz4.frame.compress(data) if compression == "lz4" else zlib.compress(data, 6)
+        CACHE_CODEC_SECONDS.labels(codec=self.codec, operation="encode").observe(time.perf_counter() - started)
+        CACHE_PAYLOAD_BYTES.labels(codec=self.codec, stage="stored").observe(len(data) + 2)
+        return _CODEC_IDS[self.codec] + _COMPRESSION_IDS[compression] + data, encoded
+
+    def loads(self, payload: bytes) -> Any:
+        started = time.perf_counter()
+        codec = _CODEC_NAMES.get(payload[:1])
+        compression = _COMPRESSION_NAMES.get(payload[1:2])
+        if codec is None or compression is None:
+            return json.loads(payload)
+        data = payload[2:]
+        if compression == "lz4":
+            data = lz4.frame.decompress(data)
+        elif compression == "zlib":
+            data = zlib.decompress(data)
+        value = _decode(codec, data)
+        CACHE_CODEC_SECONDS.labels(codec=codec, operation="decode").observe(time.perf_counter() - started)
+        return value
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "codec": self.codec,
+            "compression": self.compression,
+            "compression_threshold": self.compression_threshold
+        }
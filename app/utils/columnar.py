@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+# Postgres-side conversion per column kind. Values arrive from asyncpg as plain
+# int/float/bool so arrays can be filled with np.fromiter without building
+# datetime/Decimal objects; NULLs become NaT, NaN, 0 or False.
+_COLUMN_SQL = {
+    "datetime64": "COALESCE((EXTRACT(EPOCH FROM {column}) * 1000000)::int8, -9223372036854775808)",
+    "float64": "COALESCE({column}::float8, 'NaN'::float8)",
+    "minor_units": "COALESCE(ROUND({column} * 100)::int8, 0)",
+    "int64": "COALESCE({column}::int8, 0)",
+    "bool": "COALESCE({column}::bool, false)",
+    "object": "{column}"
+}
+
+_COLUMN_DTYPES = {
+    "datetime64": np.int64,
+    "float64": np.float64,
+    "minor_units": np.int64,
+    "int64": np.int64,
+    "bool": np.bool_
+}
+
+COLUMN_KINDS = tuple(_COLUMN_SQL)
+
+
+def column_sql(column: str, kind: str) -> str:
+    """SQL select expression converting ``column`` for the given kind"""
+    if kind not in _COLUMN_SQL:
+        raise ValueError(f"Unsupported column kind {kind!r}; expected one of {', '.join(COLUMN_KINDS)}")
+    return f"{_COLUMN_SQL[kind].format(column=column)} AS {column}"
+
+
+def to_array(values: Iterable[Any], count: int, kind: str) -> np.ndarray:
+    """Build an array from values already converted by ``column_sql``"""
+    if kind == "object":
+        array = np.empty(count, dtype=object)
+        array[:] = list(values)
+        return array
+    array = np.fromiter(values, dtype=_COLUMN_DTYPES[kind], count=count)
+    if kind == "datetime64":
+        # Epoch microseconds; int64 min is the NaT sentinel
+        return array.view("datetime64[us]")
+    return array
+
+
+def _parse_timestamp(value: Any) -> Any:
+    if value is None:
+        return "NaT"
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def from_python(values: List[Any], kind: str) -> np.ndarray:
+    """Build an array from JSON/Python values (Supabase rows), matching ``to_array``"""
+    if kind == "datetime64":
+        return np.array([_parse_timestamp(value) for value in values], dtype="datetime64[us]")
+    if kind == "float64":
+        return np.array([float(value) if value is not None else np.nan for value in values], dtype=np.float64)
+    if kind == "minor_units":
+        return np.array(
+            [int((Decimal(str(value)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)) if value is not None else 0 for value in values],
+            dtype=np.int64
+        )
+    if kind == "int64":
+        return np.array([int(value) if value is not None else 0 for value in values], dtype=np.int64)
+    if kind == "bool":
+        return np.array([bool(value) for value in values], dtype=np.bool_)
+    if kind == "object":
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    raise ValueError(f"Unsupported column kind {kind!r}; expected one of {', '.join(COLUMN_KINDS)}")
+
+
+def records_to_columns(records: List[Any], columns: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """Turn asyncpg records selected with ``column_sql`` into column-major arrays"""
+    count = len(records)
+    return {
+        name: to_array((record[index] for record in records), count, kind)
+        for index, (name, kind) in enumerate(columns.items())
+    }
+
+
+def rows_to_columns(rows: List[Dict[str, Any]], columns: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """Turn dict rows (Supabase responses) into column-major arrays"""
+    return {name: from_python([row.get(name) for row in rows], kind) for name, kind in columns.items()}
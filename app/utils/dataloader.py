@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+BatchFunction = Callable[[List[Hashable]], Awaitable[List[Any]]]
+
+
+class DataLoader:
+    """Coalesce keyed lookups into batched queries.
+
+    Every ``load()`` issued during the same event-loop tick (e.g. by the
+    coroutines of one ``asyncio.gather``) is queued and resolved by a single
+    call to ``batch_fn``, which must return one value per key in the same
+    order. Results are memoized for the lifetime of the loader, so repeated
+    keys within a request cost nothing.
+    """
+
+    def __init__(self, batch_fn: BatchFunction, max_batch_size: int = 1000):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max_batch_size
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Tuple[Hashable, asyncio.Future]] = []
+
+    async def load(self, key: Hashable) -> Any:
+        future = self._cache.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._cache[key] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self._dispatch)
+            self._queue.append((key, future))
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: List[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any):
+        """Seed the memo with a value that is already known"""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    def clear(self, key: Optional[Hashable] = None):
+        """Forget one memoized key, or all of them"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    def _dispatch(self):
+        batch, self._queue = self._queue, []
+        for start in range(0, len(batch), self._max_batch_size):
+            asyncio.ensure_future(self._resolve(batch[start:start + self._max_batch_size]))
+
+    async def _resolve(self, batch: List[Tuple[Hashable, asyncio.Future]]):
+        keys = [key for key, _ in batch]
+        try:
+            values = await self._batch_fn(keys)
+            if len(values) != len(keys):
+                raise ValueError(f"Batch function returned {len(values)} values for {len(keys)} keys")
+        except Exception as e:
+            for key, future in batch:
+                # Failures are not memoized so a later load can retry
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (key, future), value in zip(batch, values):
+            if not future.done():
+                future.set_result(value)
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+
+from fastapi import Request
+from prometheus_client import Counter
+
+from ..database import db
+
+logger = logging.getLogger(__name__)
+
+REQUESTS_CANCELLED = Counter(
+    'http_requests_cancelled_total',
+    'Requests whose handler was cancelled because the client disconnected',
+    ['route']
+)
+
+DISCONNECT_POLL_INTERVAL = 0.5  # seconds
+
+
+def _route_label(request: Request) -> str:
+    # The route template keeps the label set bounded (/payments/{payment_id}, not every id)
+    route = request.scope.get("route")
+    return f"{request.method} {getattr(route, 'path', request.url.path)}"
+
+
+async def _cancel_on_disconnect(request: Request, handler: asyncio.Task, route: str):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+    if not handler.done():
+        logger.info(f"Client disconnected, cancelling {route}")
+        REQUESTS_CANCELLED.labels(route=route).inc()
+        handler.cancel()
+
+
+def query_deadline(seconds: float):
+    """Route dependency giving every query of the request a shared time budget.
+
+    Usage: ``@router.get("/", dependencies=[Depends(query_deadline(5))])`` or
+    on a whole ``APIRouter``. Queries past the budget are cancelled on the
+    server (see ``Database.deadline``), and the handler is cancelled if the
+    client disconnects, which releases its connection. Do not use on
+    streaming responses: the body is produced after the handler returns.
+    """
+    async def dependency(request: Request):
+        route = _route_label(request)
+        # Each request runs in its own task, so the deadline ends with it
+        db.set_deadline(seconds, route)
+        watcher = asyncio.create_task(_cancel_on_disconnect(request, asyncio.current_task(), route))
+        try:
+            yield
+        finally:
+            watcher.cancel()
+    return dependency
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+async def stream_csv(
+    rows: AsyncIterator[Dict[str, Any]],
+    columns: Optional[List[str]] = None,
+    headers: Optional[List[str]] = None,
+    chunk_rows: int = 500
+) -> AsyncIterator[str]:
+    """Render rows as CSV text, yielding a chunk every ``chunk_rows`` rows.
+
+    ``columns`` defaults to the keys of the first row and ``headers`` to
+    ``columns``. Only one chunk is held in memory at a time.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    if columns:
+        writer.writerow(headers or columns)
+    pending = 0
+    async for row in rows:
+        if columns is None:
+            columns = list(row.keys())
+            writer.writerow(headers or columns)
+        writer.writerow([row.get(column) for column in columns])
+        pending += 1
+        if pending >= chunk_rows:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+            pending = 0
+    if output.tell():
+        yield output.getvalue()
+
+
+async def stream_json_array(rows: AsyncIterator[Dict[str, Any]], chunk_rows: int = 500) -> AsyncIterator[str]:
+    """Render rows as a JSON array, yielding a chunk every ``chunk_rows`` rows"""
+    buffer = ["["]
+    separator = ""
+    async for row in rows:
+        buffer.append(separator + json.dumps(row, default=str))
+        separator = ","
+        if len(buffer) >= chunk_rows:
+            yield "".join(buffer)
+            buffer = []
+    buffer.append("]")
+    yield "".join(buffer)
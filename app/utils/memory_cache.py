@@ -0,0 +1,151 @@
+import fnmatch
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from prometheus_client import Counter, Gauge
+
+MEMORY_CACHE_REQUESTS = Counter('memory_cache_requests_total', 'In-process cache lookups', ['cache', 'result'])
+MEMORY_CACHE_EVICTIONS = Counter('memory_cache_evictions_total', 'In-process cache entries dropped', ['cache', 'reason'])
+MEMORY_CACHE_ENTRIES = Gauge('memory_cache_entries', 'Entries held by an in-process cache', ['cache'])
+MEMORY_CACHE_BYTES = Gauge('memory_cache_bytes', 'Approximate payload bytes held by an in-process cache', ['cache'])
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory a cached value holds by its JSON length"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class MemoryCache:
+    """Bounded in-process LRU cache with per-entry TTL.
+
+    Entries are dropped least recently used first once either
+    ``max_entries`` or ``max_bytes`` is exceeded; expired entries are
+    dropped when they are next read. Entries can carry tags so related
+    keys are invalidated together. Values are returned as stored, so
+    callers must not mutate what they get back.
+    """
+
+    def __init__(self, name: str, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, default_ttl: float = 60.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._key_tags: Dict[str, Tuple[str, ...]] = {}
+        self._tag_keys: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._miss()
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            MEMORY_CACHE_EVICTIONS.labels(cache=self.name, reason="expired").inc()
+            self._miss()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        MEMORY_CACHE_REQUESTS.labels(cache=self.name, result="hit").inc()
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, size: Optional[int] = None, tags: Iterable[str] = ()):
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + (ttl or self.default_ttl), size, value)
+        self._bytes += size
+        tags = tuple(tags)
+        if tags:
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+            MEMORY_CACHE_EVICTIONS.labels(cache=self.name, reason="capacity").inc()
+        self._update_gauges()
+
+    def delete(self, key: str) -> bool:
+        removed = self._remove(key)
+        self._update_gauges()
+        return removed
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Drop every key matching a Redis-style glob pattern"""
+        keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            self._remove(key)
+        self._update_gauges()
+        return len(keys)
+
+    def delete_tags(self, tags: Iterable[str]) -> int:
+        """Drop every key carrying any of ``tags``"""
+        removed = 0
+        for tag in tags:
+            for key in list(self._tag_keys.get(tag, ())):
+                removed += self._remove(key)
+        self._update_gauges()
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+        self._key_tags.clear()
+        self._tag_keys.clear()
+        self._bytes = 0
+        self._update_gauges()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions
+        }
+
+    def _miss(self):
+        self.misses += 1
+        MEMORY_CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        for tag in self._key_tags.pop(key, ()):
+            members = self._tag_keys.get(tag)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._tag_keys[tag]
+        return True
+
+    def _update_gauges(self):
+        MEMORY_CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+        MEMORY_CACHE_BYTES.labels(cache=self.name).set(self._bytes)
@@ -0,0 +1,151 @@
+import difflib
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from .query_stats import fingerprint, SAMPLE_LENGTH
+
+# Conditions embed the parameter values of the captured run (EXPLAIN ANALYZE plans them as custom plans)
+_CONDITION_KEYS = ("Hash Cond", "Merge Cond", "Index Cond", "Recheck Cond", "Filter", "Join Filter")
+
+
+def _walk(node: Dict[str, Any], depth: int = 0):
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from _walk(child, depth + 1)
+
+
+def plan_shape(plan: Dict[str, Any]) -> List[str]:
+    """Render a JSON plan as one line per node, without timings or row counts.
+
+    Only the choices the planner made (node types, relations, indexes, join
+    and filter conditions) are kept, so two captures of an unchanged plan
+    compare equal however long each run took. Literals in conditions are
+    normalized like query fingerprints, so captures with different
+    parameters compare equal too.
+    """
+    lines = []
+    for depth, node in _walk(plan):
+        line = node.get("Node Type", "?")
+        if node.get("Relation Name"):
+            line += f" on {node['Relation Name']}"
+        if node.get("Index Name"):
+            line += f" using {node['Index Name']}"
+        for key in ("Join Type", "Strategy", "Sort Key", "Group Key") + _CONDITION_KEYS:
+            if node.get(key):
+                value = node[key]
+                value = ', '.join(value) if isinstance(value, list) else value
+                line += f" {key}={fingerprint(value) if key in _CONDITION_KEYS else value}"
+        lines.append("  " * depth + line)
+    return lines
+
+
+def diff_plans(previous: Optional[List[str]], current: List[str]) -> List[str]:
+    """Unified diff between two plan shapes; empty when the plan is unchanged"""
+    if previous is None:
+        return []
+    return list(difflib.unified_diff(previous, current, "previous", "current", lineterm="", n=1))
+
+
+class PlanCapture:
+    """One EXPLAIN (ANALYZE, BUFFERS) run of a slow statement"""
+
+    __slots__ = ("captured_at", "duration", "plan", "shape", "planning_time", "execution_time", "diff")
+
+    def __init__(self, duration: float, plan: Dict[str, Any], previous: Optional["PlanCapture"]):
+        self.captured_at = time.time()
+        self.duration = duration
+        self.plan = plan
+        self.shape = plan_shape(plan["Plan"])
+        self.planning_time = plan.get("Planning Time")
+        self.execution_time = plan.get("Execution Time")
+        self.diff = diff_plans(previous.shape if previous else None, self.shape)
+
+    def to_dict(self, include_plan: bool = True) -> Dict[str, Any]:
+        entry = {
+            "captured_at": datetime.utcfromtimestamp(self.captured_at).isoformat(),
+            "duration": round(self.duration, 6),
+            "planning_time_ms": self.planning_time,
+            "execution_time_ms": self.execution_time,
+            "plan_changed": bool(self.diff),
+            "shape": self.shape,
+            "diff": self.diff
+        }
+        if include_plan:
+            entry["plan"] = self.plan
+        return entry
+
+
+class PlanStore:
+    """Bounded store of captured plans keyed by query fingerprint.
+
+    Each fingerprint keeps a ring of its last ``history`` captures; once
+    ``max_fingerprints`` statements are tracked the least recently captured
+    one is dropped. ``should_capture`` rate-limits captures per fingerprint
+    to one per ``min_interval`` seconds.
+    """
+
+    def __init__(self, max_fingerprints: int = 100, history: int = 5, min_interval: float = 300.0):
+        self.max_fingerprints = max_fingerprints
+        self.history = history
+        self.min_interval = min_interval
+        self.reset()
+
+    def reset(self):
+        self._plans: "OrderedDict[str, deque]" = OrderedDict()
+        self._samples: Dict[str, str] = {}
+        self._last_attempt: Dict[str, float] = {}
+        self._in_flight: set = set()
+
+    def should_capture(self, query: str) -> bool:
+        key = fingerprint(query)
+        now = time.monotonic()
+        if key in self._in_flight or now - self._last_attempt.get(key, float("-inf")) < self.min_interval:
+            return False
+        self._last_attempt[key] = now
+        self._in_flight.add(key)
+        if len(self._last_attempt) > self.max_fingerprints * 4:
+            oldest = min(self._last_attempt, key=self._last_attempt.get)
+            del self._last_attempt[oldest]
+        return True
+
+    def finish(self, query: str):
+        self._in_flight.discard(fingerprint(query))
+
+    def add(self, query: str, duration: float, plan: Dict[str, Any]) -> PlanCapture:
+        key = fingerprint(query)
+        ring = self._plans.get(key)
+        if ring is None:
+            ring = self._plans[key] = deque(maxlen=self.history)
+            while len(self._plans) > self.max_fingerprints:
+                dropped, _ = self._plans.popitem(last=False)
+                self._samples.pop(dropped, None)
+        self._plans.move_to_end(key)
+        self._samples[key] = query[:SAMPLE_LENGTH]
+        capture = PlanCapture(duration, plan, ring[-1] if ring else None)
+        ring.append(capture)
+        return capture
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Latest capture of every fingerprint, most recent first"""
+        entries = []
+        for key in reversed(self._plans):
+            latest = self._plans[key][-1]
+            entries.append({
+                "fingerprint": key,
+                "captures": len(self._plans[key]),
+                **latest.to_dict(include_plan=False)
+            })
+        return entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Every retained capture of a fingerprint, newest first, with diffs to the one before"""
+        ring = self._plans.get(key)
+        if ring is None:
+            return None
+        return {
+            "fingerprint": key,
+            "sample": self._samples.get(key),
+            "captures": [capture.to_dict() for capture in reversed(ring)]
+        }
@@ -0,0 +1,221 @@
+import math
+import re
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Literals and placeholders that vary between executions of the same statement
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER_RE = re.compile(r"\$\d+")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+OTHER_FINGERPRINT = "<other>"
+SAMPLE_LENGTH = 8000  # long enough to keep full statements replayable by the index advisor
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(query: str) -> str:
+    """Normalize SQL so executions differing only in literals share one key"""
+    normalized = _COMMENT_RE.sub(" ", query)
+    normalized = _STRING_RE.sub("?", normalized)
+    normalized = _PLACEHOLDER_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _LIST_RE.sub("(...)", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip().rstrip(";").lower()
+
+
+class LogHistogram:
+    """Streaming latency histogram over fixed logarithmic buckets.
+
+    Bucket ``i`` covers ``[min_value * growth**i, min_value * growth**(i+1))``
+    so memory is constant and quantiles are accurate to within one growth
+    factor (10% by default) anywhere between 0.1ms and ~100s.
+    """
+
+    __slots__ = ("counts", "total")
+
+    MIN_VALUE = 0.0001
+    GROWTH = 1.1
+    BUCKETS = 146  # 0.1ms * 1.1**146 ~= 110s
+    _LOG_GROWTH = math.log(GROWTH)
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+
+    def observe(self, value: float):
+        if value <= self.MIN_VALUE:
+            index = 0
+        else:
+            index = min(int(math.log(value / self.MIN_VALUE) / self._LOG_GROWTH), self.BUCKETS - 1)
+        self.counts[index] += 1
+        self.total += 1
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding the q-th observation"""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(q * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.MIN_VALUE * self.GROWTH ** (index + 1)
+        return self.MIN_VALUE * self.GROWTH ** self.BUCKETS
+
+
+class QueryStat:
+    """Aggregated statistics for one query fingerprint"""
+
+    __slots__ = ("fingerprint", "operation", "sample", "calls", "errors",
+                 "total_time", "max_time", "rows", "histogram", "last_seen")
+
+    def __init__(self, fingerprint: str, operation: str, sample: str):
+        self.fingerprint = fingerprint
+        self.operation = operation
+        self.sample = sample
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.histogram = LogHistogram()
+        self.last_seen = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "operation": self.operation,
+            "sample": self.sample,
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_time": round(self.total_time, 6),
+            "mean_time": round(self.total_time / self.calls, 6) if self.calls else 0,
+            "max_time": round(self.max_time, 6),
+            "p50": round(self.histogram.quantile(0.50), 6),
+            "p95": round(self.histogram.quantile(0.95), 6),
+            "p99": round(self.histogram.quantile(0.99), 6),
+            "rows": self.rows,
+            "last_seen": datetime.utcfromtimestamp(self.last_seen).isoformat() if self.last_seen else None
+        }
+
+
+class QueryStatsRegistry:
+    """Per-fingerprint query statistics.
+
+    Recording is O(1): a dict lookup plus a histogram bucket increment.
+    Once ``max_fingerprints`` distinct statements have been seen, new ones
+    are folded into a single ``<other>`` entry so memory stays bounded.
+    """
+
+    SORT_KEYS = ("total_time", "calls", "mean_time", "p95", "p99", "max_time", "errors", "rows")
+
+    def __init__(self, max_fingerprints: int = 500, slow_threshold: float = 1.0):
+        self.max_fingerprints = max_fingerprints
+        self.slow_threshold = slow_threshold
+        self.reset()
+
+    def reset(self):
+        self._stats: Dict[str, QueryStat] = {}
+        self.total_queries = 0
+        self.total_time = 0.0
+        self.slow_queries = 0
+        self.recent_slow_queries = deque(maxlen=10)
+        self.started_at = time.time()
+
+    def record(self, operation: str, query: str, duration: float, status: str, rows: Optional[int] = None):
+        key = fingerprint(query)
+        stat = self._stats.get(key)
+        if stat is None:
+            if len(self._stats) >= self.max_fingerprints:
+                key = OTHER_FINGERPRINT
+                stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = QueryStat(key, operation, query[:SAMPLE_LENGTH])
+
+        stat.calls += 1
+        stat.total_time += duration
+        stat.max_time = max(stat.max_time, duration)
+        stat.histogram.observe(duration)
+        stat.last_seen = time.time()
+        if status != "success":
+            stat.errors += 1
+        if rows:
+            stat.rows += rows
+
+        self.total_queries += 1
+        self.total_time += duration
+        if duration > self.slow_threshold:
+            self.slow_queries += 1
+            self.recent_slow_queries.append({
+                "timestamp": datetime.utcnow().isoformat(),
+                "operation": operation,
+                "fingerprint": key,
+                "query": query[:500],
+                "duration": duration,
+                "status": status
+            })
+
+    def top(self, limit: int = 20, sort_by: str = "total_time") -> List[Dict[str, Any]]:
+        """Return the ``limit`` most expensive fingerprints ordered by ``sort_by``"""
+        if sort_by not in self.SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {', '.join(self.SORT_KEYS)}")
+        entries = [stat.to_dict() for stat in self._stats.values()]
+        entries.sort(key=lambda entry: entry[sort_by], reverse=True)
+        return entries[:limit]
+
+    def get(self, key: str) -> Optional[QueryStat]:
+        return self._stats.get(key)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "since": datetime.utcfromtimestamp(self.started_at).isoformat(),
+            "total_queries": self.total_queries,
+            "slow_queries": self.slow_queries,
+            "average_duration": self.total_time / self.total_queries if self.total_queries else 0,
+            "fingerprints": len(self._stats),
+            "recent_slow_queries": list(self.recent_slow_queries)
+        }
+
+
+class QueryStatsCollector:
+    """Prometheus collector exporting the top-N fingerprints by total time.
+
+    Only the most expensive fingerprints are exported so label cardinality
+    stays bounded no matter how many distinct statements run.
+    """
+
+    def __init__(self, registry: QueryStatsRegistry, top_n: int = 20):
+        self.registry = registry
+        self.top_n = top_n
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        calls = CounterMetricFamily(
+            "db_fingerprint_calls", "Query executions per fingerprint", labels=["fingerprint", "operation"]
+        )
+        seconds = CounterMetricFamily(
+            "db_fingerprint_seconds", "Total query time per fingerprint", labels=["fingerprint", "operation"]
+        )
+        latency = GaugeMetricFamily(
+            "db_fingerprint_latency_seconds", "Query latency quantiles per fingerprint",
+            labels=["fingerprint", "operation", "quantile"]
+        )
+        for entry in self.registry.top(self.top_n):
+            labels = [entry["fingerprint"][:200], entry["operation"]]
+            calls.add_metric(labels, entry["calls"])
+            seconds.add_metric(labels, entry["total_time"])
+            for quantile in ("p50", "p95", "p99"):
+                latency.add_metric(labels + [f"0.{quantile[1:]}"], entry[quantile])
+        yield calls
+        yield seconds
+        yield latency
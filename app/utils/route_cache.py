@@ -0,0 +1,124 @@
+import functools
+import hashlib
+import inspect
+import json
+from typing import Callable, List, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from prometheus_client import Counter
+
+from ..services.cache_service import cache_service
+
+ROUTE_CACHE_RESPONSES = Counter(
+    'route_cache_responses_total',
+    'Responses of cached routes by outcome',
+    ['route', 'result']
+)
+
+_REQUEST_PARAM = "_cached_route_request"
+
+
+class uncached:
+    """Wrap a handler's result to send it without caching it (fallbacks, partial data)"""
+
+    __slots__ = ("result",)
+
+    def __init__(self, result):
+        self.result = result
+
+
+def _is_cacheable(result) -> bool:
+    if isinstance(result, uncached):
+        return False
+    success = result.get("success") if isinstance(result, dict) else getattr(result, "success", None)
+    return success is not False
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in candidates or etag in [candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates]
+
+
+def _cache_key(request: Request, vary_on: Optional[List[str]], role: str) -> str:
+    params = sorted(
+        (name, value) for name, value in request.query_params.multi_items()
+        if vary_on is None or name in vary_on
+    )
+    digest = hashlib.sha256(json.dumps([role, params]).encode()).hexdigest()[:32]
+    return f"route:{request.url.path}:{digest}"
+
+
+def cached_route(ttl: int, vary_on: Optional[List[str]] = None, tags: Optional[List[str]] = None):
+    """Cache a GET route's JSON response in CacheService and answer conditional requests.
+
+    The key is built from the request path, the query parameters named in
+    ``vary_on`` (all of them when None) and the caller's role, taken from
+    the route's ``current_user`` dependency when it has one. Responses
+    carry a strong ETag of the body; a matching ``If-None-Match`` gets a
+    bodyless 304. Entries are stored with ``tags`` so writes can drop
+    them, and are refreshed through ``get_or_set`` so an expiring key is
+    recomputed once. HTTPExceptions are raised as usual and not cached;
+    neither are results with ``success=False`` or wrapped in ``uncached``.
+
+    Usage (below the router decorator)::
+
+        @router.get("/summary")
+        @cached_route(ttl=60, tags=["payments"])
+        async def get_summary(current_user: dict = Depends(get_current_user)): ...
+    """
+    def decorator(func: Callable):
+        signature = inspect.signature(func)
+        request_param = next(
+            (name for name, param in signature.parameters.items() if param.annotation is Request),
+            None
+        )
+        parameters = list(signature.parameters.values())
+        if request_param is None:
+            parameters.append(inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.pop(_REQUEST_PARAM) if request_param is None else kwargs[request_param]
+            current_user = kwargs.get("current_user")
+            role = current_user.get("role", "unknown") if isinstance(current_user, dict) else "anonymous"
+            route = getattr(request.scope.get("route"), "path", request.url.path)
+
+            computed = False
+            skipped = None
+
+            async def render():
+                nonlocal computed, skipped
+                computed = True
+                result = await func(*args, **kwargs)
+                if not _is_cacheable(result):
+                    skipped = result.result if isinstance(result, uncached) else result
+                    return None  # get_or_set does not store None
+                body = json.dumps(jsonable_encoder(result), separators=(",", ":"))
+                return {"body": body, "etag": f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'}
+
+            entry = await cache_service.get_or_set(_cache_key(request, vary_on, role), render, ttl, tags=tags)
+            if entry is None:
+                if skipped is None:
+                    # A concurrent caller's render produced an uncacheable result; compute our own
+                    result = await func(*args, **kwargs)
+                    skipped = result.result if isinstance(result, uncached) else result
+                ROUTE_CACHE_RESPONSES.labels(route=route, result="uncached").inc()
+                return skipped
+            headers = {
+                "ETag": entry["etag"],
+                "Cache-Control": "private, no-cache",
+                "Vary": "Authorization"
+            }
+            if _etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+                ROUTE_CACHE_RESPONSES.labels(route=route, result="not_modified").inc()
+                return Response(status_code=304, headers=headers)
+            ROUTE_CACHE_RESPONSES.labels(route=route, result="miss" if computed else "hit").inc()
+            return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+    return decorator
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import the app package from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Manual scripts that need a running server or a live database (see README.md)
+collect_ignore = ["test_dashboard_endpoints.py", "test_raw_query.py", "debug_students.py"]
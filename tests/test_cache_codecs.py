@@ -0,0 +1,81 @@
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.utils import cache_codecs
+from app.utils.cache_codecs import CacheCodec
+
+AVAILABLE_CODECS = ["json"] + [
+    name for name, available in (("orjson", cache_codecs.ORJSON_AVAILABLE), ("msgpack", cache_codecs.MSGPACK_AVAILABLE))
+    if available
+]
+
+VALUE = {"name": "Grade 7", "count": 3, "ratio": 0.5, "items": [1, 2, None], "nested": {"ok": True}}
+
+
+@pytest.mark.parametrize("codec", AVAILABLE_CODECS)
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_round_trip(codec, compression):
+    cache_codec = CacheCodec(codec, compression, compression_threshold=16)
+    payload = cache_codec.dumps(VALUE)
+    assert cache_codec.loads(payload) == VALUE
+
+
+def test_small_payloads_are_not_compressed():
+    cache_codec = CacheCodec("json", "zlib", compression_threshold=4096)
+    assert cache_codec.dumps(VALUE)[1:2] == b"\x00"
+    assert CacheCodec("json", "zlib", compression_threshold=1).dumps(VALUE)[1:2] == b"\x01"
+
+
+@pytest.mark.skipif(not cache_codecs.MSGPACK_AVAILABLE, reason="msgpack not installed")
+def test_msgpack_keeps_python_types():
+    value = {
+        "amount": Decimal("1250.50"),
+        "paid_at": datetime(2024, 1, 31, 8, 30),
+        "due": date(2024, 2, 1),
+        "id": uuid.UUID("3fa85f64-5717-4562-b3fc-2c963f66afa6")
+    }
+    cache_codec = CacheCodec("msgpack", "none")
+    assert cache_codec.loads(cache_codec.dumps(value)) == value
+
+
+@pytest.mark.parametrize("codec", AVAILABLE_CODECS)
+def test_text_codecs_write_decimals_losslessly(codec):
+    cache_codec = CacheCodec(codec, "none")
+    decoded = cache_codec.loads(cache_codec.dumps({"amount": Decimal("1250.10")}))
+    assert Decimal(str(decoded["amount"])) == Decimal("1250.10")
+
+
+def test_payloads_stay_readable_across_settings():
+    written = CacheCodec("json", "zlib", compression_threshold=1).dumps(VALUE)
+    assert CacheCodec(AVAILABLE_CODECS[-1], "none").loads(written) == VALUE
+
+
+def test_legacy_plain_json_is_readable():
+    assert CacheCodec("json", "none").loads(json.dumps(VALUE).encode()) == VALUE
+
+
+def test_unknown_settings_are_rejected():
+    with pytest.raises(ValueError):
+        CacheCodec("pickle")
+    with pytest.raises(ValueError):
+        CacheCodec("json", "brotli")
+
+
+@pytest.mark.parametrize("codec", AVAILABLE_CODECS)
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_encode_returns_the_value_loads_will(codec, compression):
+    cache_codec = CacheCodec(codec, compression, compression_threshold=16)
+    value = {"amount": Decimal("1250.50"), "due": date(2024, 2, 1), "items": [1, 2]}
+    payload, local = cache_codec.encode(value)
+    assert payload == cache_codec.dumps(value)
+    assert local == cache_codec.loads(payload)
+
+
+@pytest.mark.skipif(not cache_codecs.MSGPACK_AVAILABLE, reason="msgpack not installed")
+def test_msgpack_encode_skips_the_round_trip():
+    value = {"amount": Decimal("1250.50")}
+    assert CacheCodec("msgpack", "none").encode(value)[1] is value
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.cache_service import CacheService
+
+
+class LockedElsewhereRedis:
+    """Redis stand-in where another worker holds every recompute lock"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        return None if nx else True
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def publish(self, channel, message):
+        return 0
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.redis.values[key] = value
+
+    def sadd(self, key, member):
+        pass
+
+    def expire(self, key, ttl):
+        pass
+
+    async def execute(self):
+        return []
+
+
+@pytest.mark.asyncio
+async def test_miss_does_not_join_a_background_refresh(monkeypatch):
+    monkeypatch.setattr(settings, "cache_lock_wait", 0.1)
+    cache = CacheService()
+    cache.redis_client = LockedElsewhereRedis()
+
+    async def getter():
+        return {"total": 42}
+
+    # The background refresh finds the lock taken and gives up with None
+    cache._refresh_in_background("stats", getter, 60, None)
+    assert await cache.get_or_set("stats", getter, ttl=60) == {"total": 42}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fill():
+    cache = CacheService()
+    calls = 0
+
+    async def getter():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [1, 2, 3]
+
+    results = await asyncio.gather(*(cache.get_or_set("rows", getter, ttl=60) for _ in range(5)))
+    assert results == [[1, 2, 3]] * 5
+    assert calls == 1
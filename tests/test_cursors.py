@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import pytest
+
+from app.database import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    values = ["2024-01-31T08:30:00", "3fa85f64-5717-4562-b3fc-2c963f66afa6"]
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2) == values
+
+
+def test_non_json_values_are_encoded_as_strings():
+    cursor = encode_cursor([datetime(2024, 1, 31, 8, 30), 7])
+    assert decode_cursor(cursor, 2) == ["2024-01-31T08:30:00", 7]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor!", encode_cursor({"a": 1}), ""])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 1)
+
+
+def test_cursor_for_a_different_sort_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([1, 2]), 3)
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.utils.dataloader import DataLoader
+
+
+class Recorder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, keys):
+        self.batches.append(list(keys))
+        if self.fail:
+            raise RuntimeError("lookup failed")
+        return [key * 10 for key in keys]
+
+
+@pytest.mark.asyncio
+async def test_loads_in_one_tick_share_a_batch():
+    batch = Recorder()
+    loader = DataLoader(batch)
+    results = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1))
+    assert results == [10, 20, 10]
+    assert batch.batches == [[1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_results_are_memoized_and_primed_keys_skip_the_batch():
+    batch = Recorder()
+    loader = DataLoader(batch)
+    loader.prime(3, "primed")
+    assert await loader.load_many([1, 3]) == [10, "primed"]
+    assert await loader.load(1) == 10
+    assert batch.batches == [[1]]
+
+    loader.clear(1)
+    assert await loader.load(1) == 10
+    assert batch.batches == [[1], [1]]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_split_at_max_batch_size():
+    batch = Recorder()
+    loader = DataLoader(batch, max_batch_size=2)
+    assert await loader.load_many([1, 2, 3]) == [10, 20, 30]
+    assert batch.batches == [[1, 2], [3]]
+
+
+@pytest.mark.asyncio
+async def test_failures_propagate_and_are_not_memoized():
+    batch = Recorder(fail=True)
+    loader = DataLoader(batch)
+    with pytest.raises(RuntimeError):
+        await loader.load(1)
+    batch.fail = False
+    assert await loader.load(1) == 10
+
+
+@pytest.mark.asyncio
+async def test_batch_function_must_return_one_value_per_key():
+    async def short(keys):
+        return keys[:-1]
+
+    loader = DataLoader(short)
+    with pytest.raises(ValueError):
+        await loader.load_many([1, 2])
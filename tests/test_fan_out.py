@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from app.database import Database, _query_deadline, _transaction_connection
+
+
+async def query(delay, result=None, error=None):
+    await asyncio.sleep(delay)
+    if error:
+        raise error
+    return result or {"success": True, "data": [delay]}
+
+
+@pytest.mark.asyncio
+async def test_runs_calls_concurrently_and_keeps_order():
+    db = Database()
+    started = time.monotonic()
+    results = await db.fan_out(query(0.2), query(0.1), query(0.15))
+    assert time.monotonic() - started < 0.35
+    assert [result["data"] for result in results] == [[0.2], [0.1], [0.15]]
+
+
+@pytest.mark.asyncio
+async def test_failures_stay_per_call():
+    db = Database()
+    failed = {"success": False, "error": "syntax error", "data": []}
+    results = await db.fan_out(query(0.01), query(0.01, error=RuntimeError("boom")), query(0.01, result=failed))
+    assert results[0]["success"] is True
+    assert results[1] == {"success": False, "error": "boom", "data": []}
+    assert results[2] is failed
+
+
+@pytest.mark.asyncio
+async def test_calls_past_the_deadline_are_cancelled():
+    db = Database()
+    started = time.monotonic()
+    fast, slow = await db.fan_out(query(0.01), query(5), timeout=0.2)
+    assert time.monotonic() - started < 1
+    assert fast["success"] is True
+    assert slow == {"success": False, "error": "Query deadline exceeded", "data": []}
+    # The tightened deadline does not leak into the caller
+    assert _query_deadline.get() is None
+
+
+@pytest.mark.asyncio
+async def test_calls_share_the_request_deadline():
+    db = Database()
+    seen = []
+
+    async def record():
+        seen.append(_query_deadline.get())
+        return {"success": True, "data": []}
+
+    with db.deadline(30, "GET /reports/overview"):
+        outer = _query_deadline.get()
+        await db.fan_out(record(), record())
+    assert seen == [outer, outer]
+
+
+@pytest.mark.asyncio
+async def test_runs_sequentially_inside_a_transaction():
+    db = Database()
+    order = []
+
+    async def step(name):
+        order.append(f"start {name}")
+        await asyncio.sleep(0.01)
+        order.append(f"end {name}")
+        return {"success": True, "data": [name]}
+
+    token = _transaction_connection.set(object())
+    try:
+        results = await db.fan_out(step("a"), step("b"))
+    finally:
+        _transaction_connection.reset(token)
+    assert order == ["start a", "end a", "start b", "end b"]
+    assert [result["data"] for result in results] == [["a"], ["b"]]
+
+
+@pytest.mark.asyncio
+async def test_no_calls():
+    assert await Database().fan_out() == []
@@ -0,0 +1,87 @@
+import pytest
+
+from app.utils import memory_cache
+from app.utils.memory_cache import MemoryCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memory_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_set_and_stats():
+    cache = MemoryCache("test")
+    assert cache.get("missing") is None
+    cache.set("a", {"x": 1})
+    assert cache.get("a") == {"x": 1}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_evicts_least_recently_used_by_entries():
+    cache = MemoryCache("test", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a is now most recently used
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.evictions == 1
+
+
+def test_evicts_by_bytes_and_rejects_oversized_values():
+    cache = MemoryCache("test", max_bytes=100)
+    cache.set("a", "x", size=60)
+    cache.set("b", "y", size=60)
+    assert "a" not in cache and "b" in cache
+    assert cache.stats()["bytes"] == 60
+
+    cache.set("b", "z", size=500)
+    assert "b" not in cache
+    assert cache.stats()["bytes"] == 0
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = MemoryCache("test", default_ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    clock[0] += 30
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_delete_tags_drops_every_tagged_key():
+    cache = MemoryCache("test")
+    cache.set("payments:1", 1, tags=["payments"])
+    cache.set("summary", 2, tags=["payments", "students"])
+    cache.set("students:1", 3, tags=["students"])
+    cache.set("untagged", 4)
+
+    assert cache.delete_tags(["payments"]) == 2
+    assert "payments:1" not in cache and "summary" not in cache
+    assert "students:1" in cache and "untagged" in cache
+    # The evicted key no longer counts as a member of its other tags
+    assert cache.delete_tags(["students"]) == 1
+
+
+def test_overwrite_replaces_tags_and_size():
+    cache = MemoryCache("test")
+    cache.set("a", 1, size=10, tags=["old"])
+    cache.set("a", 2, size=20, tags=["new"])
+    assert cache.delete_tags(["old"]) == 0
+    assert cache.stats()["bytes"] == 20
+    assert cache.delete_tags(["new"]) == 1
+
+
+def test_delete_pattern_and_clear():
+    cache = MemoryCache("test")
+    cache.set("route:/a:1", 1)
+    cache.set("route:/b:2", 2)
+    cache.set("other", 3)
+    assert cache.delete_pattern("route:*") == 2
+    assert list(cache._entries) == ["other"]
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
@@ -0,0 +1,78 @@
+from app.utils.query_plans import PlanStore, diff_plans, plan_shape
+
+
+def _plan(index_cond, index_name="payments_student_id_idx", execution_time=1.5):
+    return {
+        "Plan": {
+            "Node Type": "Nested Loop",
+            "Join Type": "Inner",
+            "Actual Total Time": execution_time,
+            "Plans": [
+                {
+                    "Node Type": "Index Scan",
+                    "Relation Name": "payments",
+                    "Index Name": index_name,
+                    "Index Cond": index_cond,
+                    "Actual Rows": 10
+                }
+            ]
+        },
+        "Planning Time": 0.1,
+        "Execution Time": execution_time
+    }
+
+
+def test_plan_shape_ignores_timings_and_parameter_values():
+    first = plan_shape(_plan("(student_id = '3fa85f64-5717-4562-b3fc-2c963f66afa6'::uuid)")["Plan"])
+    second = plan_shape(_plan("(student_id = '0b1c2d3e-0000-4000-8000-000000000000'::uuid)", execution_time=90.0)["Plan"])
+    assert first == second
+    assert first[1].startswith("  Index Scan on payments using payments_student_id_idx")
+
+
+def test_diff_plans_reports_index_change():
+    before = plan_shape(_plan("(student_id = $1)")["Plan"])
+    after = plan_shape(_plan("(student_id = $1)", index_name=None)["Plan"])
+    assert diff_plans(None, after) == []
+    assert diff_plans(before, before) == []
+    assert any(line.startswith("-") and "payments_student_id_idx" in line for line in diff_plans(before, after))
+
+
+def test_should_capture_rate_limits_and_tracks_in_flight():
+    store = PlanStore(min_interval=300)
+    query = "SELECT * FROM payments WHERE student_id = 1"
+    assert store.should_capture(query)
+    # Same fingerprint, different literal: still in flight and inside the interval
+    assert not store.should_capture("SELECT * FROM payments WHERE student_id = 2")
+    store.finish(query)
+    assert not store.should_capture(query)
+
+    store = PlanStore(min_interval=0)
+    assert store.should_capture(query)
+    assert not store.should_capture(query)
+    store.finish(query)
+    assert store.should_capture(query)
+
+
+def test_store_keeps_history_and_flags_plan_changes():
+    store = PlanStore(history=2)
+    query = "SELECT * FROM payments WHERE student_id = $1"
+    store.add(query, 1.0, _plan("(student_id = 'a')"))
+    store.add(query, 1.0, _plan("(student_id = 'b')"))
+    store.add(query, 1.0, _plan("(student_id = 'c')", index_name="payments_other_idx"))
+
+    [summary] = store.summary()
+    assert summary["captures"] == 2
+    assert summary["plan_changed"] is True
+
+    detail = store.get(summary["fingerprint"])
+    assert detail["sample"] == query
+    assert [capture["plan_changed"] for capture in detail["captures"]] == [True, False]
+    assert "plan" in detail["captures"][0]
+    assert store.get("unknown") is None
+
+
+def test_store_evicts_least_recently_captured_fingerprint():
+    store = PlanStore(max_fingerprints=2)
+    for table in ("a", "b", "c"):
+        store.add(f"SELECT * FROM {table}", 1.0, _plan("(id = 1)"))
+    assert [entry["fingerprint"] for entry in store.summary()] == ["select * from c", "select * from b"]
@@ -0,0 +1,50 @@
+import pytest
+
+from app.utils.query_stats import fingerprint, LogHistogram
+
+
+def test_fingerprint_normalizes_literals_and_placeholders():
+    assert fingerprint("SELECT * FROM t WHERE id = 5 AND name = 'x'") == fingerprint(
+        "select *  from t where id = 42 and name = 'it''s'"
+    )
+    assert fingerprint("SELECT * FROM t WHERE id = $1") == "select * from t where id = ?"
+
+
+def test_fingerprint_collapses_in_lists_and_strips_comments():
+    assert fingerprint("SELECT 1 FROM t WHERE z IN (1, 2, 3) -- trailing") == fingerprint(
+        "/* tag */ SELECT 1 FROM t WHERE z IN ($1)"
+    )
+
+
+def test_fingerprint_keeps_identifiers_with_digits():
+    assert fingerprint("SELECT col1 FROM t2;") == "select col1 from t2"
+
+
+def test_histogram_empty_quantile_is_zero():
+    assert LogHistogram().quantile(0.99) == 0.0
+
+
+@pytest.mark.parametrize("value", [0.0005, 0.01, 0.25, 3.0])
+def test_histogram_quantile_within_one_bucket(value):
+    histogram = LogHistogram()
+    for _ in range(10):
+        histogram.observe(value)
+    estimate = histogram.quantile(0.5)
+    assert value <= estimate <= value * LogHistogram.GROWTH
+
+
+def test_histogram_quantiles_are_ordered():
+    histogram = LogHistogram()
+    for index in range(1, 101):
+        histogram.observe(index / 1000)
+    assert histogram.total == 100
+    assert histogram.quantile(0.5) <= histogram.quantile(0.95) <= histogram.quantile(0.99)
+    assert 0.05 <= histogram.quantile(0.5) <= 0.05 * LogHistogram.GROWTH ** 2
+
+
+def test_histogram_clamps_out_of_range_values():
+    histogram = LogHistogram()
+    histogram.observe(0)
+    histogram.observe(10_000)
+    assert histogram.counts[0] == 1
+    assert histogram.counts[-1] == 1
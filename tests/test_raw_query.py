@@ -22,8 +22,7 @@ async def test_raw_query():
     if result["success"] and result["data"]:
         print("Data:", result["data"])
         print("Type of data:", type(result["data"]))
-        if result["data"].get("data"):
-            print("First item:", result["data"]["data"][0] if result["data"]["data"] else "No data")
+        print("First item:", result["data"][0])
     print()
     
     # Test 2: Grade distribution